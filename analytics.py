@@ -0,0 +1,262 @@
+"""
+Number-frequency analytics per lottery
+
+Each lottery gets a LotteryAggregates: a draws x balls incidence matrix (one
+column per distinct (ball_type, value)) plus running all-time ball counts and a
+co-occurrence matrix. It is loaded once from ball_index and then updated
+incrementally from the save path (database.on_results_saved), so requests never
+re-read winning_numbers JSON. Corrections (database.on_results_corrected) drop
+a lottery's aggregates, so its next summary reloads them. All-time summaries
+come straight from the running totals; date windows are a vectorized mask over
+the incidence matrix. Response size depends only on `top` and the number of
+distinct balls, not on history.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from database import BallIndex, LotteryResult, on_results_corrected, on_results_saved
+from ticket_verify import normalize_ball
+
+logger = logging.getLogger(__name__)
+
+# Reload from the database after this long, to pick up writes from other processes
+MAX_AGE_SECONDS = float(os.getenv("ANALYTICS_MAX_AGE_SECONDS", 3600))
+
+NUMBER = "number"
+NEVER = np.iinfo(np.int64).min   # last_seen of a ball not drawn (also NaT's integer view)
+
+
+def _ball_key(ball_type: Optional[str], value: str) -> Tuple[str, str]:
+    """Legacy plain-string balls count as numbers when numeric"""
+    if not ball_type:
+        ball_type = NUMBER if value.isdigit() else "other"
+    return ball_type, value
+
+
+def _last_seen(block: np.ndarray, dates: np.ndarray) -> np.ndarray:
+    """Latest date (days since epoch) each column is set in `block`, NEVER if not at all"""
+    if not len(block):
+        return np.full(block.shape[1], NEVER, dtype=np.int64)
+    days = dates.astype("datetime64[D]").view(np.int64)
+    return np.where(block.astype(bool), days[:, None], NEVER).max(axis=0)
+
+
+def _sort_key(value: str):
+    return (0, int(value), "") if value.isdigit() else (1, 0, value)
+
+
+class LotteryAggregates:
+    """Incidence matrix and running counts for one lottery"""
+
+    def __init__(self, lottery_name: str):
+        self.lottery_name = lottery_name
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()                      # add_draws vs summary
+        self.columns: Dict[Tuple[str, str], int] = {}    # (ball_type, value) -> column
+        self.labels: List[Tuple[str, str]] = []
+        self.draw_ids = set()
+        self.size = 0                                     # draws stored
+        self.incidence = np.zeros((64, 16), dtype=np.uint8)
+        self.dates = np.zeros(64, dtype="datetime64[D]")
+        self.totals = np.zeros(16, dtype=np.int64)        # all-time draws containing each ball
+        self.pairs = np.zeros((16, 16), dtype=np.int64)   # all-time draws containing both balls
+        self.last_seen = np.full(16, NEVER, dtype=np.int64)  # all-time last draw date (days since epoch)
+
+    def _column(self, key) -> int:
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = len(self.labels)
+            self.labels.append(key)
+            width = self.incidence.shape[1]
+            if column >= width:
+                grow = width
+                self.incidence = np.pad(self.incidence, ((0, 0), (0, grow)))
+                self.totals = np.pad(self.totals, (0, grow))
+                self.pairs = np.pad(self.pairs, ((0, grow), (0, grow)))
+                self.last_seen = np.pad(self.last_seen, (0, grow), constant_values=NEVER)
+        return column
+
+    def add_draws(self, draws):
+        """Add (id, draw_date, [(ball_type, value), ...]) draws not seen before"""
+        draws = [draw for draw in draws if draw[0] not in self.draw_ids]
+        if not draws:
+            return
+        needed = self.size + len(draws)
+        if needed > len(self.dates):
+            capacity = max(needed, 2 * len(self.dates))
+            self.incidence = np.pad(self.incidence, ((0, capacity - len(self.dates)), (0, 0)))
+            self.dates = np.pad(self.dates, (0, capacity - len(self.dates)))
+
+        start = self.size
+        for offset, (draw_id, draw_date, balls) in enumerate(draws):
+            columns = [self._column(_ball_key(ball_type, value)) for ball_type, value in balls]
+            self.incidence[start + offset, columns] = 1
+            self.dates[start + offset] = np.datetime64(draw_date, "D") if draw_date else np.datetime64("NaT")
+            self.draw_ids.add(draw_id)
+        self.size = needed
+
+        block = self.incidence[start:needed].astype(np.int64)
+        self.totals += block.sum(axis=0)
+        self.pairs += block.T @ block
+        self.last_seen = np.maximum(self.last_seen, _last_seen(block, self.dates[start:needed]))
+
+    def summary(self, from_date: Optional[date] = None, to_date: Optional[date] = None, top: int = 10) -> dict:
+        width = len(self.labels)
+        if from_date or to_date:
+            dates = self.dates[:self.size]
+            mask = np.ones(self.size, dtype=bool)
+            if from_date:
+                mask &= dates >= np.datetime64(from_date, "D")
+            if to_date:
+                mask &= dates <= np.datetime64(to_date, "D")
+            window = self.incidence[:self.size][mask, :width].astype(np.int64)
+            draws = window.shape[0]
+            counts = window.sum(axis=0)
+            pairs = window.T @ window
+            last_seen = _last_seen(window, dates[mask])
+        else:
+            draws = self.size
+            counts = self.totals[:width]
+            pairs = self.pairs[:width, :width]
+            last_seen = self.last_seen[:width]
+
+        def entry(column):
+            seen = last_seen[column]
+            return {
+                "value": self.labels[column][1],
+                "count": int(counts[column]),
+                "frequency": round(float(counts[column]) / draws, 4) if draws else 0.0,
+                "last_seen": str(np.datetime64(int(seen), "D")) if seen != NEVER else None,
+            }
+
+        numbers = np.array([c for c, (t, _) in enumerate(self.labels) if t == NUMBER], dtype=np.int64)
+        hot, cold, top_pairs = [], [], []
+        if len(numbers):
+            order = numbers[np.lexsort((numbers, -counts[numbers]))]
+            hot = [entry(c) for c in order[:top]]
+            cold = [entry(c) for c in order[::-1][:top]]
+
+            sub = pairs[np.ix_(numbers, numbers)]
+            upper_i, upper_j = np.triu_indices(len(numbers), k=1)
+            pair_counts = sub[upper_i, upper_j]
+            best = np.argsort(-pair_counts, kind="stable")[:top]
+            top_pairs = [
+                {"pair": sorted((self.labels[numbers[upper_i[k]]][1], self.labels[numbers[upper_j[k]]][1]), key=_sort_key),
+                 "count": int(pair_counts[k])}
+                for k in best if pair_counts[k] > 0
+            ]
+
+        by_type = {}
+        for column, (ball_type, value) in enumerate(self.labels):
+            if ball_type != NUMBER and counts[column]:
+                by_type.setdefault(ball_type, []).append(entry(column))
+        for entries in by_type.values():
+            entries.sort(key=lambda e: (-e["count"], _sort_key(e["value"])))
+
+        return {
+            "lottery_name": self.lottery_name,
+            "from_date": from_date.isoformat() if from_date else None,
+            "to_date": to_date.isoformat() if to_date else None,
+            "draws": int(draws),
+            "hot_numbers": hot,
+            "cold_numbers": cold,
+            "top_pairs": top_pairs,
+            "other_balls": by_type,   # letter / zodiac / super frequencies
+        }
+
+
+_aggregates: Dict[str, LotteryAggregates] = {}
+_pending: Dict[str, List[list]] = {}   # lottery -> a buffer of saved draws per load in progress
+_corrections: Dict[str, int] = {}      # lottery -> corrections seen, so a load that overlaps one isn't cached
+_lock = threading.Lock()               # guards the dicts above, never held over a query
+
+
+def _load(db, lottery_name: str) -> LotteryAggregates:
+    aggregates = LotteryAggregates(lottery_name)
+    draws = {}
+    rows = db.query(BallIndex.result_id, LotteryResult.draw_date, BallIndex.ball_type, BallIndex.value).join(
+        LotteryResult, LotteryResult.id == BallIndex.result_id
+    ).filter(BallIndex.lottery_name == lottery_name).yield_per(5000)
+    for result_id, draw_date, ball_type, value in rows:
+        draws.setdefault(result_id, (result_id, draw_date, []))[2].append((ball_type, value))
+    aggregates.add_draws(draws.values())
+    logger.info(f"Analytics loaded for {lottery_name}: {aggregates.size} draws, {len(aggregates.labels)} balls")
+    return aggregates
+
+
+def _fresh(aggregates: Optional[LotteryAggregates]) -> bool:
+    return aggregates is not None and time.monotonic() - aggregates.loaded_at <= MAX_AGE_SECONDS
+
+
+def _drop_buffer(lottery_name: str, buffer: list):
+    buffers = [b for b in _pending.pop(lottery_name) if b is not buffer]
+    if buffers:
+        _pending[lottery_name] = buffers
+
+
+def _get_aggregates(db, lottery_name: str) -> LotteryAggregates:
+    with _lock:
+        aggregates = _aggregates.get(lottery_name)
+        if _fresh(aggregates):
+            return aggregates
+        # Draws saved while the query runs land in this buffer, so none is lost
+        # whether or not the query sees them (add_draws skips ids it has)
+        buffer = []
+        _pending.setdefault(lottery_name, []).append(buffer)
+        corrections = _corrections.get(lottery_name, 0)
+    try:
+        aggregates = _load(db, lottery_name)
+    except Exception:
+        with _lock:
+            _drop_buffer(lottery_name, buffer)
+        raise
+    with _lock:
+        _drop_buffer(lottery_name, buffer)
+        aggregates.add_draws(buffer)   # ids the query already saw are skipped
+        # Unknown names stay uncached: a URL must not be able to grow the cache
+        if aggregates.size and _corrections.get(lottery_name, 0) == corrections:
+            _aggregates[lottery_name] = aggregates
+    return aggregates
+
+
+def lottery_summary(db, lottery_name: str, from_date: Optional[date] = None,
+                    to_date: Optional[date] = None, top: int = 10) -> dict:
+    """Analytics summary for one lottery, loading its aggregates on first use"""
+    aggregates = _get_aggregates(db, lottery_name.lower())
+    with aggregates.lock:
+        return aggregates.summary(from_date, to_date, top)
+
+
+@on_results_saved
+def _apply_new_draws(new_draws):
+    """Fold freshly saved draws into the loaded aggregates (others load them from the DB later)"""
+    by_lottery = {}
+    for draw in new_draws:
+        balls = {normalize_ball(ball) for ball in draw.winning_numbers or []}
+        by_lottery.setdefault(draw.lottery_name, []).append((draw.id, draw.draw_date, [b for b in balls if b[1]]))
+    loaded = []
+    with _lock:
+        for lottery_name, draws in by_lottery.items():
+            for buffer in _pending.get(lottery_name, ()):
+                buffer.extend(draws)
+            if lottery_name in _aggregates:
+                loaded.append((_aggregates[lottery_name], draws))
+    for aggregates, draws in loaded:
+        with aggregates.lock:
+            aggregates.add_draws(draws)
+
+
+@on_results_corrected
+def _drop_corrected(lottery_names):
+    """Corrected draws can change any count: reload those lotteries on next use"""
+    with _lock:
+        for lottery_name in lottery_names:
+            _aggregates.pop(lottery_name, None)
+            _corrections[lottery_name] = _corrections.get(lottery_name, 0) + 1
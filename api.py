@@ -1,14 +1,34 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, Security
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import and_, false, func, or_, tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, TypeAdapter
+import base64
+import binascii
+import csv
+import io
+import json
 import os
+import zlib
 
-from database import get_db, LotteryResult, LotteryType, init_db
-from scraper import run_scraper
-from auth import get_api_key
+import anyio.to_thread
+
+from database import get_db, BallIndex, LotteryResult, LotteryStats, ScrapeRun, SessionLocal, init_db, DB_POOL_SIZE, BULK_CHUNK_SIZE
+import analytics
+import metrics
+import scrape_jobs
+import scrape_runs
+from lottery_registry import registry
+from response_cache import CachedBody, response_cache, with_session
+from result_stream import STREAM_MAX_SUBSCRIBERS, broadcaster, draw_filter, sse_events
+from fetch_cache import fetch_cache_stats
+from page_archive import page_archive
+from auth import api_key_header, get_api_key, get_stream_api_key, API_KEY
+from ticket_verify import DrawMatcher, normalize_ball
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -24,8 +44,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# Request counts and latency per route for GET /metrics (outermost, so it times CORS too)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Pydantic models for API responses
 class LotteryTypeResponse(BaseModel):
     id: int
@@ -42,7 +66,7 @@ class LotteryResultResponse(BaseModel):
     id: int
     lottery_name: str
     draw_number: Optional[str] = None  # Allow None values
-    draw_date: datetime
+    draw_date: Optional[datetime] = None  # None when the draw page had no date
     winning_numbers: List
     prize_amount: Optional[str] = None
     scraped_at: datetime
@@ -51,9 +75,15 @@ class LotteryResultResponse(BaseModel):
         from_attributes = True
 
 
+class BallInput(BaseModel):
+    """A ticket ball in the stored {"type", "value"} format; type is optional"""
+    type: Optional[str] = None
+    value: str
+
+
 class VerifyTicketRequest(BaseModel):
     lottery_name: str
-    ticket_numbers: List[str]
+    ticket_numbers: List[Union[str, BallInput]]
     draw_number: Optional[str] = None
     draw_date: Optional[str] = None
 
@@ -61,20 +91,167 @@ class VerifyTicketRequest(BaseModel):
 class VerifyTicketResponse(BaseModel):
     is_winner: bool
     matched_numbers: List[str]
+    match_count: int
     lottery_name: str
     draw_number: str
-    draw_date: datetime
+    draw_date: Optional[datetime]
     prize_info: Optional[str]
 
 
+MAX_BATCH_TICKETS = int(os.getenv("MAX_BATCH_TICKETS", 10000))
+
+
+class BatchTicket(VerifyTicketRequest):
+    ticket_id: Optional[str] = None  # echoed back to tie results to tickets
+
+
+class BatchVerifyRequest(BaseModel):
+    tickets: List[BatchTicket] = Field(..., min_length=1, max_length=MAX_BATCH_TICKETS)
+
+
+# Query builders shared by the endpoints and check_query_plans.py
+
+# Draws without a date (draw_date NULL) can't be placed among the newest: the
+# results pages list dated draws only. Exports keep them, first (NULLS FIRST).
+
+def _before(query, after: Optional[Tuple[Optional[datetime], int]]):
+    """Dated rows strictly after `after` in (draw_date DESC, id DESC) order"""
+    query = query.filter(LotteryResult.draw_date.isnot(None))
+    if after is None:
+        return query
+    if after[0] is None:   # an export cursor at an undated row: no dated row follows it here
+        return query.filter(false())
+    return query.filter(tuple_(LotteryResult.draw_date, LotteryResult.id) < tuple_(*after))
+
+
+def encode_cursor(row) -> str:
+    """Opaque cursor pointing just past `row` in its query's keyset order (the date part is empty for NULL)"""
+    raw = f"{row.draw_date.isoformat() if row.draw_date else ''}|{row.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[Optional[datetime], int]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        draw_date, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(draw_date) if draw_date else None, int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def latest_results_query(db: Session, board: Optional[str] = None,
+                         after: Optional[Tuple[Optional[datetime], int]] = None):
+    """Newest draws first, optionally for one board (uses ix_lottery_results_board_date)"""
+    query = db.query(LotteryResult)
+    if board:
+        query = query.filter(LotteryResult.board == board.upper())
+    return _before(query, after).order_by(LotteryResult.draw_date.desc(), LotteryResult.id.desc())
+
+
+def lottery_results_query(db: Session, lottery_name: str, after: Optional[Tuple[Optional[datetime], int]] = None):
+    """Newest draws of one lottery first (uses ix_lottery_results_name_date)"""
+    query = db.query(LotteryResult).filter(LotteryResult.lottery_name == registry.canonical_name(lottery_name))
+    return _before(query, after).order_by(LotteryResult.draw_date.desc(), LotteryResult.id.desc())
+
+
+def date_results_query(db: Session, target_date: datetime):
+    """All draws held on one day (uses ix_lottery_results_draw_date)"""
+    return db.query(LotteryResult).filter(
+        LotteryResult.draw_date >= target_date,
+        LotteryResult.draw_date < target_date + timedelta(days=1)
+    )
+
+
+def draw_query(db: Session, lottery_name: str, draw_number: Optional[str] = None,
+               draw_date: Optional[datetime] = None):
+    """
+    A single draw by number, by date, or the latest one
+    (uses uq_lottery_results_name_draw or ix_lottery_results_name_date)
+    """
+    query = db.query(LotteryResult).filter(LotteryResult.lottery_name == registry.canonical_name(lottery_name))
+    if draw_number:
+        return query.filter(LotteryResult.draw_number == draw_number)
+    if draw_date:
+        return query.filter(
+            LotteryResult.draw_date >= draw_date,
+            LotteryResult.draw_date < draw_date + timedelta(days=1)
+        )
+    # Use latest draw if no specific draw specified (an undated draw is never the latest)
+    return query.order_by(LotteryResult.draw_date.desc().nulls_last())
+
+
+def export_query(db: Session, lottery_name: Optional[str] = None, board: Optional[str] = None,
+                 from_date: Optional[datetime] = None, to_date: Optional[datetime] = None,
+                 after: Optional[Tuple[Optional[datetime], int]] = None):
+    """
+    Matching draws oldest first, in (draw_date, id) order so an export can resume
+    after any row; undated draws come first (uses ix_lottery_results_name_date /
+    _board_date / _draw_date)
+    """
+    query = db.query(
+        LotteryResult.id, LotteryResult.lottery_name, LotteryResult.board, LotteryResult.draw_number,
+        LotteryResult.draw_date, LotteryResult.winning_numbers, LotteryResult.prize_amount, LotteryResult.scraped_at
+    )
+    if lottery_name:
+        query = query.filter(LotteryResult.lottery_name == registry.canonical_name(lottery_name))
+    if board:
+        query = query.filter(LotteryResult.board == board.upper())
+    if from_date:
+        query = query.filter(LotteryResult.draw_date >= from_date)
+    if to_date:
+        query = query.filter(LotteryResult.draw_date < to_date + timedelta(days=1))
+    if after and after[0] is None:
+        query = query.filter(or_(
+            and_(LotteryResult.draw_date.is_(None), LotteryResult.id > after[1]),
+            LotteryResult.draw_date.isnot(None),
+        ))
+    elif after:
+        query = query.filter(tuple_(LotteryResult.draw_date, LotteryResult.id) > tuple_(*after))
+    return query.order_by(LotteryResult.draw_date.asc().nulls_first(), LotteryResult.id.asc())
+
+
+# Worker threads for the database endpoints (AnyIO's default limiter, 40 otherwise)
+API_THREADS = int(os.getenv("API_THREADS", DB_POOL_SIZE))
+
+
+def ball_search_query(db: Session, lottery_name: str, terms: List[Tuple[Optional[str], str]], min_matches: int):
+    """
+    Draws of a lottery containing at least `min_matches` of the given balls, best matches first
+    
+    terms are normalized (ball_type or None, value) pairs; an untyped term
+    matches a ball of any type (uses ix_ball_index_lookup).
+    """
+    conditions = [
+        and_(BallIndex.value == value, BallIndex.ball_type == ball_type) if ball_type else BallIndex.value == value
+        for ball_type, value in terms
+    ]
+    matched = func.count(func.distinct(BallIndex.value)).label("matched")
+    return db.query(LotteryResult, matched).join(
+        BallIndex, BallIndex.result_id == LotteryResult.id
+    ).filter(
+        BallIndex.lottery_name == registry.canonical_name(lottery_name),
+        BallIndex.value.in_({value for _, value in terms}),  # index seek per value
+        or_(*conditions)
+    ).group_by(LotteryResult.id).having(matched >= min_matches).order_by(
+        matched.desc(), LotteryResult.draw_date.desc()
+    )
+
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
-    init_db()
-    print("Database initialized")
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADS
+    await anyio.to_thread.run_sync(init_db)
+    print(f"Database initialized ({API_THREADS} API worker threads)")
 
 
 # API Endpoints
+#
+# Endpoints that query the database are plain `def`: FastAPI runs them and
+# get_db on the bounded worker threadpool, so a slow query never blocks the
+# event loop. Only endpoints without blocking work are `async def`.
 
 @app.get("/")
 async def root():
@@ -88,61 +265,130 @@ async def root():
             "latest_results": "/api/results/latest",
             "results_by_lottery": "/api/results/{lottery_name}",
             "verify_ticket": "/api/verify",
-            "trigger_scrape": "/api/scrape"
+            "verify_tickets_batch": "/api/verify/batch",
+            "search_history": "/api/search/{lottery_name}",
+            "export": "/api/export",
+            "stream": "/api/stream",
+            "analytics": "/api/analytics/{lottery_name}",
+            "trigger_scrape": "/api/scrape",
+            "scrape_job": "/api/scrape/{job_id}",
+            "scrape_runs": "/api/scrape/runs",
+            "metrics": "/metrics"
         }
     }
 
 
+# Conditional GETs
+#
+# Cached responses carry a strong ETag: a hash of the encoded body, computed once
+# per cache entry and so only again after the data version changes. A client
+# whose copy is current gets a 304 straight from the cache, without a query or
+# any serialization.
+
+CACHE_MAX_AGE = int(os.getenv("API_CACHE_MAX_AGE", 60))
+
+RESULTS_ADAPTER = TypeAdapter(List[LotteryResultResponse])
+LOTTERIES_ADAPTER = TypeAdapter(List[LotteryTypeResponse])
+
+
+def _cache_control() -> str:
+    # Shared caches must not hand API-key protected responses to other clients
+    return f"{'private' if API_KEY else 'public'}, max-age={CACHE_MAX_AGE}"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 specifies for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = lambda tag: tag.strip().removeprefix("W/")
+    return opaque(etag) in {opaque(tag) for tag in header.split(",")}
+
+
+def cached_json(key: Hashable, query: Callable[[Session], object], adapter: TypeAdapter) -> CachedBody:
+    """Cached payload, JSON body and ETag for `key`; runs query(db) only on a cache miss"""
+    def compute(db):
+        content = query(db)
+        return CachedBody(content, adapter.dump_json(content))
+    return response_cache.get_or_compute(key, with_session(compute))
+
+
+def cached_page(key: Hashable, query: Callable[[Session], object], limit: int) -> CachedBody:
+    """
+    Like cached_json for a keyset-paginated results query
+
+    Fetches one row past `limit` to learn whether another page exists; if so the
+    cursor to it is sent in the X-Next-Cursor header, keeping the body a plain list.
+    """
+    def compute(db):
+        rows = query(db).limit(limit + 1).all()
+        page = [LotteryResultResponse.model_validate(row) for row in rows[:limit]]
+        headers = {"X-Next-Cursor": encode_cursor(rows[limit - 1])} if len(rows) > limit else {}
+        return CachedBody(page, RESULTS_ADAPTER.dump_json(page), headers)
+    return response_cache.get_or_compute(key, with_session(compute))
+
+
+def conditional_response(request: Request, etag: str, body: Callable[[], bytes],
+                         extra_headers: Optional[dict] = None) -> Response:
+    """304 if the client's ETag is current, else the body from body()"""
+    headers = {"ETag": etag, "Cache-Control": _cache_control(), **(extra_headers or {})}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body(), media_type="application/json", headers=headers)
+
+
 @app.get("/api/lotteries", response_model=List[LotteryTypeResponse])
-async def get_lotteries(
-    db: Session = Depends(get_db),
+def get_lotteries(
+    request: Request,
     api_key: str = Depends(get_api_key)
 ):
-    """Get all available lottery types"""
-    lotteries = db.query(LotteryType).filter(LotteryType.is_active == 1).all()
-    return lotteries
+    """Get all available lottery types (from the in-memory lottery registry)"""
+    cached = cached_json(("lotteries",), lambda db: [
+        LotteryTypeResponse.model_validate(lottery)
+        for lottery in registry.all(active_only=True) if lottery.id is not None
+    ], LOTTERIES_ADAPTER)
+    return conditional_response(request, cached.etag, lambda: cached.body)
 
 
 @app.get("/api/results/latest", response_model=List[LotteryResultResponse])
-async def get_latest_results(
+def get_latest_results(
+    request: Request,
     limit: int = Query(10, ge=1, le=100),
     board: Optional[str] = Query(None, description="Filter by board: DLB or NLB"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     api_key: str = Depends(get_api_key)
 ):
     """Get latest lottery results across all lotteries"""
-    query = db.query(LotteryResult).order_by(LotteryResult.draw_date.desc())
-    
-    if board:
-        # Join with lottery_types to filter by board
-        lottery_types = db.query(LotteryType).filter(LotteryType.board == board.upper()).all()
-        lottery_names = [lt.name for lt in lottery_types]
-        query = query.filter(LotteryResult.lottery_name.in_(lottery_names))
-    
-    results = query.limit(limit).all()
-    return results
+    board = board.upper() if board else None
+    after = decode_cursor(cursor)
+    cached = cached_page(("latest", limit, board, after),
+                         lambda db: latest_results_query(db, board, after), limit)
+    return conditional_response(request, cached.etag, lambda: cached.body, cached.headers)
 
 
 @app.get("/api/results/{lottery_name}", response_model=List[LotteryResultResponse])
-async def get_results_by_lottery(
+def get_results_by_lottery(
+    request: Request,
     lottery_name: str,
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     api_key: str = Depends(get_api_key)
 ):
-    """Get results for a specific lottery"""
-    results = db.query(LotteryResult).filter(
-        LotteryResult.lottery_name == lottery_name.lower()
-    ).order_by(LotteryResult.draw_date.desc()).limit(limit).all()
+    """Get results for a specific lottery, newest first; follow X-Next-Cursor for older draws"""
+    after = decode_cursor(cursor)
+    cached = cached_page(("lottery", registry.canonical_name(lottery_name), limit, after),
+                         lambda db: lottery_results_query(db, lottery_name, after), limit)
     
-    if not results:
+    if not cached.content and after is None:
         raise HTTPException(status_code=404, detail=f"No results found for lottery: {lottery_name}")
     
-    return results
+    return conditional_response(request, cached.etag, lambda: cached.body, cached.headers)
 
 
 @app.get("/api/results/date/{date}", response_model=List[LotteryResultResponse])
-async def get_results_by_date(
+def get_results_by_date(
     date: str,
     db: Session = Depends(get_db),
     api_key: str = Depends(get_api_key)
@@ -150,20 +396,19 @@ async def get_results_by_date(
     """Get results for a specific date (format: YYYY-MM-DD)"""
     try:
         target_date = datetime.strptime(date, "%Y-%m-%d")
-        next_day = target_date + timedelta(days=1)
-        
-        results = db.query(LotteryResult).filter(
-            LotteryResult.draw_date >= target_date,
-            LotteryResult.draw_date < next_day
-        ).all()
+        results = date_results_query(db, target_date).all()
         
         return results
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
 
+def _parse_draw_date(value: Optional[str]) -> Optional[datetime]:
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
 @app.post("/api/verify", response_model=VerifyTicketResponse)
-async def verify_ticket(
+def verify_ticket(
     request: VerifyTicketRequest,
     db: Session = Depends(get_db),
     api_key: str = Depends(get_api_key)
@@ -171,80 +416,433 @@ async def verify_ticket(
     """Verify if ticket numbers match winning numbers"""
     
     # Find the appropriate draw result
-    query = db.query(LotteryResult).filter(
-        LotteryResult.lottery_name == request.lottery_name.lower()
-    )
-    
-    if request.draw_number:
-        query = query.filter(LotteryResult.draw_number == request.draw_number)
-    elif request.draw_date:
-        target_date = datetime.strptime(request.draw_date, "%Y-%m-%d")
-        next_day = target_date + timedelta(days=1)
-        query = query.filter(
-            LotteryResult.draw_date >= target_date,
-            LotteryResult.draw_date < next_day
-        )
-    else:
-        # Use latest draw if no specific draw specified
-        query = query.order_by(LotteryResult.draw_date.desc())
-    
-    result = query.first()
+    try:
+        draw_date = _parse_draw_date(request.draw_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    result = draw_query(db, request.lottery_name, request.draw_number, draw_date).first()
     
     if not result:
         raise HTTPException(status_code=404, detail="No matching lottery draw found")
     
-    # Check for matching numbers
-    winning_numbers = [str(num) for num in result.winning_numbers]
-    ticket_numbers = [str(num) for num in request.ticket_numbers]
-    matched_numbers = list(set(ticket_numbers) & set(winning_numbers))
-    
-    is_winner = len(matched_numbers) > 0
+    # Match against the structured {"type", "value"} balls
+    verdict = DrawMatcher(result).verify(request.ticket_numbers)
     
     return VerifyTicketResponse(
-        is_winner=is_winner,
-        matched_numbers=matched_numbers,
+        **verdict,
         lottery_name=result.lottery_name,
         draw_number=result.draw_number,
-        draw_date=result.draw_date,
-        prize_info=result.prize_amount if is_winner else None
+        draw_date=result.draw_date
     )
 
 
-@app.post("/api/scrape")
-async def trigger_scrape():
-    """Manually trigger the scraper to fetch latest results"""
+def fetch_draws(db: Session, refs) -> Dict[tuple, LotteryResult]:
+    """
+    Load every referenced draw once
+    
+    refs are (lottery_name, draw_number, draw_date) tuples. Draws referenced by
+    number are fetched with one query per BULK_CHUNK_SIZE keys; by-date and
+    latest-draw references (few distinct values per batch) use draw_query.
+    """
+    draws = {}
+    by_number = sorted({(name, number) for name, number, _ in refs if number})
+    for i in range(0, len(by_number), BULK_CHUNK_SIZE):
+        chunk = by_number[i:i + BULK_CHUNK_SIZE]
+        for result in db.query(LotteryResult).filter(
+            tuple_(LotteryResult.lottery_name, LotteryResult.draw_number).in_(chunk)
+        ):
+            draws[(result.lottery_name, result.draw_number, None)] = result
+    
+    for ref in refs:
+        name, number, draw_date = ref
+        if number:
+            draws[ref] = draws.get((name, number, None))
+        elif ref not in draws:
+            draws[ref] = draw_query(db, name, draw_date=draw_date).first()
+    return draws
+
+
+@app.post("/api/verify/batch")
+def verify_tickets_batch(
+    request: BatchVerifyRequest,
+    db: Session = Depends(get_db),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Verify many tickets across one or more draws
+    
+    Each referenced draw is loaded once and turned into a DrawMatcher; results
+    stream back as NDJSON, one line per ticket in request order, then a summary line.
+    """
+    refs = []
+    for ticket in request.tickets:
+        try:
+            draw_date = _parse_draw_date(ticket.draw_date) if not ticket.draw_number else None
+        except ValueError:
+            refs.append(None)
+            continue
+        refs.append((registry.canonical_name(ticket.lottery_name), ticket.draw_number, draw_date))
+    
+    draws = fetch_draws(db, {ref for ref in refs if ref})
+    matchers = {id(result): DrawMatcher(result) for result in draws.values() if result}
+    
+    def lines():
+        winners = 0
+        for index, (ticket, ref) in enumerate(zip(request.tickets, refs)):
+            line = {"index": index, "ticket_id": ticket.ticket_id}
+            result = draws.get(ref) if ref else None
+            if ref is None:
+                line["error"] = "Invalid date format. Use YYYY-MM-DD"
+            elif result is None:
+                line["error"] = "No matching lottery draw found"
+            else:
+                verdict = matchers[id(result)].verify(ticket.ticket_numbers)
+                winners += verdict["is_winner"]
+                line.update(verdict, lottery_name=result.lottery_name, draw_number=result.draw_number,
+                            draw_date=result.draw_date.isoformat() if result.draw_date else None)
+            yield json.dumps(line) + "\n"
+        yield json.dumps({"summary": {"tickets": len(refs), "winners": winners, "draws": len(matchers)}}) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/api/search/{lottery_name}")
+def search_ball_history(
+    lottery_name: str,
+    numbers: str = Query(..., description="Comma-separated balls; prefix a type to restrict it, e.g. 07,23,letter:U"),
+    min_matches: Optional[int] = Query(None, ge=1, description="Default: all given balls"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(get_api_key)
+):
+    """Which past draws of a lottery contained these balls (served from the ball_index table)"""
+    terms = []
+    for item in numbers.split(","):
+        ball_type, _, value = item.strip().rpartition(":")
+        term = normalize_ball({"type": ball_type.lower() or None, "value": value})
+        if term[1] and term not in terms:
+            terms.append(term)
+    if not terms:
+        raise HTTPException(status_code=400, detail="No balls given")
+    distinct_values = len({value for _, value in terms})
+    min_matches = min(min_matches or distinct_values, distinct_values)
+    
+    query = ball_search_query(db, lottery_name, terms, min_matches)
+    
+    results = []
+    for result, matched in query.limit(limit).all():
+        verdict = DrawMatcher(result).verify([{"type": t, "value": v} for t, v in terms])
+        results.append({
+            "id": result.id,
+            "draw_number": result.draw_number,
+            "draw_date": result.draw_date,
+            "match_count": matched,
+            "matched_numbers": verdict["matched_numbers"],
+            "winning_numbers": result.winning_numbers,
+        })
+    
+    return {
+        "lottery_name": registry.canonical_name(lottery_name),
+        "numbers": [{"type": t, "value": v} for t, v in terms],
+        "min_matches": min_matches,
+        "total_draws": query.order_by(None).count(),
+        "results": results,
+    }
+
+
+@app.get("/api/analytics/{lottery_name}")
+def get_lottery_analytics(
+    lottery_name: str,
+    from_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    to_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    top: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    api_key: str = Depends(get_api_key)
+):
+    """Hot/cold numbers, most frequent pairs and other-ball frequencies for a lottery"""
+    try:
+        start, end = _parse_draw_date(from_date), _parse_draw_date(to_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    summary = analytics.lottery_summary(db, registry.canonical_name(lottery_name), start and start.date(), end and end.date(), top)
+    if not summary["draws"] and not (start or end):
+        raise HTTPException(status_code=404, detail=f"No results found for {lottery_name}")
+    return summary
+
+
+# Bulk export
+#
+# Rows are read through yield_per (a server-side cursor on PostgreSQL) and
+# encoded into ~64 KB chunks as the client reads them, so memory stays flat
+# however many rows match. Every row carries the cursor to resume after it.
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CSV_COLUMNS = ["id", "lottery_name", "board", "draw_number", "draw_date",
+                      "winning_numbers", "prize_amount", "scraped_at", "cursor"]
+
+
+def _accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def _export_records(query_args: dict):
+    """Export rows as dicts, read in batches on a session owned by the stream"""
+    db = SessionLocal()
     try:
-        saved_count = run_scraper()
-        return {
-            "status": "success",
-            "message": f"Scraper completed. Saved {saved_count} new results.",
-            "timestamp": datetime.now()
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Scraper error: {str(e)}")
+        for row in export_query(db, **query_args).yield_per(EXPORT_BATCH_SIZE):
+            yield {
+                "id": row.id,
+                "lottery_name": row.lottery_name,
+                "board": row.board,
+                "draw_number": row.draw_number,
+                "draw_date": row.draw_date.isoformat() if row.draw_date else None,
+                "winning_numbers": row.winning_numbers,
+                "prize_amount": row.prize_amount,
+                "scraped_at": row.scraped_at.isoformat() if row.scraped_at else None,
+                "cursor": encode_cursor(row),
+            }
+    finally:
+        db.close()
 
 
-@app.get("/api/stats")
-async def get_stats(
+def _encode_export(records, format: str):
+    """Encoded text for each record (and a CSV header first)"""
+    if format == "ndjson":
+        for record in records:
+            yield json.dumps(record) + "\n"
+        return
+    
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    for record in records:
+        record["winning_numbers"] = json.dumps(record["winning_numbers"])
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _chunked(pieces, compress: bool):
+    """Join encoded pieces into ~EXPORT_CHUNK_BYTES chunks, gzipped if asked"""
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending, size = [], 0
+    for piece in pieces:
+        pending.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_BYTES:
+            chunk = "".join(pending).encode()
+            pending, size = [], 0
+            chunk = gzip.compress(chunk) if gzip else chunk
+            if chunk:
+                yield chunk
+    chunk = "".join(pending).encode()
+    yield gzip.compress(chunk) + gzip.flush() if gzip else chunk
+
+
+@app.get("/api/export")
+def export_results(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    lottery: Optional[str] = Query(None, description="Lottery name, e.g. govisetha"),
+    board: Optional[str] = Query(None, description="DLB or NLB"),
+    from_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    to_date: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    cursor: Optional[str] = Query(None, description="cursor of the last row received, to resume"),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Stream every matching result, oldest first, as NDJSON or CSV
+    
+    Sent gzip-compressed when the client accepts it. An interrupted export
+    resumes from the `cursor` of the last row received.
+    """
+    try:
+        start, end = _parse_draw_date(from_date), _parse_draw_date(to_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    query_args = {"lottery_name": lottery, "board": board, "from_date": start, "to_date": end,
+                  "after": decode_cursor(cursor)}
+    compress = _accepts_gzip(request)
+    headers = {
+        "Content-Disposition": f'attachment; filename="lottery_results.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    body = _chunked(_encode_export(_export_records(query_args), format), compress)
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+
+@app.get("/api/stream")
+async def stream_results(
+    request: Request,
+    lottery: Optional[str] = Query(None, description="Only this lottery"),
+    board: Optional[str] = Query(None, description="Only this board: DLB or NLB"),
+    api_key: str = Depends(get_stream_api_key)
+):
+    """
+    Server-Sent Events: a `draws` event as soon as new results are saved
+    
+    Each event's data is {"draws": [...]} with the id, lottery, board, draw
+    number, date and balls of every new draw matching the filters. A client
+    reconnecting with Last-Event-ID receives the events it missed, if they are
+    still in the recent history.
+    """
+    if broadcaster.subscribers >= STREAM_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many stream subscribers, retry later")
+    last_event_id = request.headers.get("last-event-id", "")
+    return StreamingResponse(
+        sse_events(draw_filter(lottery, board), int(last_event_id) if last_event_id.isdigit() else None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/scrape", status_code=202)
+async def trigger_scrape(
+    profile: bool = Query(False, description="Attach a cProfile report to the scrape run (needs the API key)"),
+    api_key: Optional[str] = Security(api_key_header)
+):
+    """
+    Queue a background scrape of both boards and return its job ID
+    
+    If a scrape covering both boards is already queued or running (another
+    trigger or the scheduler), its job is returned instead of starting a new one.
+    Profiled scrapes skip that, so only key holders may ask for them.
+    """
+    if profile:
+        await get_api_key(api_key)
+    job, created = scrape_jobs.submit(source='api', profile=profile)
+    return {
+        "status": job.status,
+        "job_id": job.job_id,
+        "deduplicated": not created,
+        "status_url": f"/api/scrape/{job.job_id}",
+        "timestamp": datetime.now()
+    }
+
+
+# Declared before /api/scrape/{job_id}, which would otherwise take "runs" for a job ID
+@app.get("/api/scrape/runs")
+def list_scrape_runs(
+    limit: int = Query(20, ge=1, le=200),
+    board: Optional[str] = Query(None, description="DLB or NLB"),
+    source: Optional[str] = Query(None, description="api, scheduler, startup or cli"),
+    status: Optional[str] = Query(None, description="succeeded, partial or failed"),
+    job_id: Optional[str] = None,
     db: Session = Depends(get_db),
     api_key: str = Depends(get_api_key)
 ):
-    """Get database statistics"""
-    total_results = db.query(LotteryResult).count()
-    total_lotteries = db.query(LotteryType).filter(LotteryType.is_active == 1).count()
+    """Recent scrape runs, newest first, with per-board / per-stage wall and CPU time"""
+    query = db.query(ScrapeRun)
+    if board:
+        query = query.filter(ScrapeRun.boards.contains(board.upper()))
+    if source:
+        query = query.filter(ScrapeRun.source == source)
+    if status:
+        query = query.filter(ScrapeRun.status == status)
+    if job_id:
+        query = query.filter(ScrapeRun.job_id == job_id)
+    runs = query.order_by(ScrapeRun.started_at.desc(), ScrapeRun.id.desc()).limit(limit).all()
+    return [scrape_runs.run_to_dict(run) for run in runs]
+
+
+@app.get("/api/scrape/runs/{run_id}")
+def get_scrape_run(run_id: int, db: Session = Depends(get_db), api_key: str = Depends(get_api_key)):
+    """One scrape run, including its cProfile report if it was profiled"""
+    run = db.get(ScrapeRun, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Scrape run not found: {run_id}")
+    return scrape_runs.run_to_dict(run, include_profile=True)
+
+
+@app.get("/api/scrape/{job_id}")
+async def get_scrape_job(job_id: str):
+    """Progress, timings and results of a scrape job"""
+    job = scrape_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Scrape job not found: {job_id}")
+    return job.to_dict()
+
+
+def _database_stats(db: Session) -> dict:
+    """Totals per board and per lottery, read from the lottery_stats table (one row per lottery)"""
+    lotteries = [
+        {
+            "lottery_name": row.lottery_name,
+            "board": row.board,
+            "draws": row.draws,
+            "first_draw_date": row.first_draw_date,
+            "last_draw_date": row.last_draw_date,
+            "last_scraped_at": row.last_scraped_at,
+        }
+        for row in db.query(LotteryStats).order_by(LotteryStats.board, LotteryStats.lottery_name)
+    ]
     
-    latest_scrape = db.query(LotteryResult).order_by(
-        LotteryResult.scraped_at.desc()
-    ).first()
+    boards = {}
+    for lottery in lotteries:
+        board = boards.setdefault(lottery["board"] or "unknown", {
+            "draws": 0, "lotteries": 0, "first_draw_date": None, "last_draw_date": None, "last_scraped_at": None
+        })
+        board["draws"] += lottery["draws"]
+        board["lotteries"] += 1
+        for field, pick in (("first_draw_date", min), ("last_draw_date", max), ("last_scraped_at", max)):
+            values = [v for v in (board[field], lottery[field]) if v is not None]
+            board[field] = pick(values) if values else None
     
+    scrapes = [lottery["last_scraped_at"] for lottery in lotteries if lottery["last_scraped_at"]]
     return {
-        "total_results": total_results,
-        "total_lotteries": total_lotteries,
-        "latest_scrape": latest_scrape.scraped_at if latest_scrape else None,
-        "database_url": os.getenv("DATABASE_URL", "sqlite:///./lottery_results.db")
+        "total_results": sum(lottery["draws"] for lottery in lotteries),
+        "total_lotteries": sum(1 for lottery in registry.all(active_only=True) if lottery.id is not None),
+        "latest_scrape": max(scrapes) if scrapes else None,
+        "boards": boards,
+        "lotteries": lotteries,
     }
 
 
+@app.get("/api/stats")
+def get_stats(
+    request: Request,
+    api_key: str = Depends(get_api_key)
+):
+    """Get database statistics"""
+    def compute(db):
+        stats = _database_stats(db)
+        return CachedBody(stats, json.dumps(jsonable_encoder(stats)).encode(), weak=True)
+    
+    cached = response_cache.get_or_compute(("stats",), with_session(compute))
+    
+    # The live cache counters below change on every request, so the ETag only
+    # vouches for the database figures: weak
+    def body():
+        return json.dumps(jsonable_encoder({
+            **cached.content,
+            "page_cache": fetch_cache_stats(),
+            "page_archive": page_archive.stats(),
+            "response_cache": response_cache.stats(),
+            "stream": broadcaster.stats(),
+        })).encode()
+    
+    return conditional_response(request, cached.etag, body)
+
+
+@app.get("/metrics")
+async def get_metrics(api_key: str = Depends(get_api_key)):
+    """Prometheus metrics: API latency, scraper stages, SQL timings and scheduler jobs"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     
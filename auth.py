@@ -4,7 +4,7 @@ Set API_KEY environment variable to enable authentication
 """
 
 from fastapi import HTTPException, Security, Depends
-from fastapi.security import APIKeyHeader
+from fastapi.security import APIKeyHeader, APIKeyQuery
 import os
 
 # API Key authentication (simple and effective)
@@ -12,6 +12,7 @@ API_KEY = os.getenv("API_KEY")  # Set this in Render.com environment variables
 API_KEY_NAME = "X-API-Key"
 
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
+api_key_query = APIKeyQuery(name="api_key", auto_error=False)
 
 async def get_api_key(api_key: str = Security(api_key_header)):
     """
@@ -30,3 +31,11 @@ async def get_api_key(api_key: str = Security(api_key_header)):
         status_code=403,
         detail="Invalid or missing API Key. Add 'X-API-Key' header with your API key."
     )
+
+
+async def get_stream_api_key(api_key: str = Security(api_key_header), api_key_param: str = Security(api_key_query)):
+    """
+    Like get_api_key, but also accepts ?api_key=...
+    Browsers' EventSource cannot send custom headers.
+    """
+    return await get_api_key(api_key or api_key_param)
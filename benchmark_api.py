@@ -0,0 +1,175 @@
+"""
+API concurrency benchmark
+
+Seeds a throwaway SQLite database, serves api.app with uvicorn in a subprocess
+and drives the read endpoints from 1, 2, 4, ... concurrent clients. Reports
+requests/sec and latency per concurrency level; throughput should climb with
+clients until the worker threadpool (API_THREADS) is saturated instead of
+staying flat as it does when queries run on the event loop.
+
+On SQLite most of a request is Python CPU time, so scaling needs free cores;
+--db-latency-ms adds a per-statement delay to model a database across the
+network, where waiting on I/O dominates.
+
+Usage:
+    python benchmark_api.py
+    python benchmark_api.py --db-latency-ms 5
+    python benchmark_api.py --rows 50000 --requests 800 --levels 1,4,16,64
+"""
+
+import argparse
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+WORKDIR = tempfile.mkdtemp(prefix='lottery_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+os.environ.pop('API_KEY', None)
+
+import requests
+
+LOTTERIES = ['mahajana_sampatha', 'govisetha', 'dhana_nidhanaya', 'mega_power', 'ada_kotipathi', 'lagna_wasana']
+
+
+def seed(rows):
+    from database import init_db, bulk_save_results
+    init_db()
+    start = datetime(2020, 1, 1, 21, 30)
+    results = []
+    for i in range(rows):
+        name = LOTTERIES[i % len(LOTTERIES)]
+        results.append({
+            'lottery_name': name,
+            'draw_number': str(i // len(LOTTERIES) + 1),
+            'draw_date': start + timedelta(days=i // len(LOTTERIES)),
+            'winning_numbers': [{'type': 'number', 'value': str(random.randint(1, 80))} for _ in range(5)],
+            'prize_amount': None,
+            'additional_data': {'source_url': 'benchmark'},
+        })
+    bulk_save_results(results, board='DLB')
+    return start, rows // len(LOTTERIES)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# Server process: optionally delays every statement to model a database across the network
+SERVER_SCRIPT = """
+import sys, time, uvicorn
+from sqlalchemy import event
+import database
+from api import app
+
+latency = float(sys.argv[2]) / 1000
+if latency:
+    event.listen(database.engine, 'before_cursor_execute', lambda *args: time.sleep(latency))
+uvicorn.run(app, host='127.0.0.1', port=int(sys.argv[1]), log_level='warning')
+"""
+
+
+def serve(port, db_latency_ms):
+    """Run the API in its own process so the clients don't share its GIL"""
+    server = subprocess.Popen(
+        [sys.executable, '-c', SERVER_SCRIPT, str(port), str(db_latency_ms)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+def make_urls(base, start, days, count):
+    urls = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            urls.append(f"{base}/api/results/latest?limit=100")
+        elif kind == 1:
+            urls.append(f"{base}/api/results/{random.choice(LOTTERIES)}?limit=100")
+        elif kind == 2:
+            day = start + timedelta(days=random.randrange(days))
+            urls.append(f"{base}/api/results/date/{day:%Y-%m-%d}")
+        else:
+            urls.append(f"{base}/api/stats")
+    return urls
+
+
+def run_level(urls, clients):
+    local = threading.local()
+
+    def fetch(url):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        t0 = time.perf_counter()
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        return time.perf_counter() - t0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        timings = list(pool.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        'rps': len(urls) / elapsed,
+        'p50_ms': statistics.median(timings) * 1000,
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark API throughput against concurrent clients")
+    parser.add_argument('--rows', type=int, default=20000, help="Results to seed")
+    parser.add_argument('--requests', type=int, default=400, help="Requests per concurrency level")
+    parser.add_argument('--levels', default='1,2,4,8,16,32', help="Comma-separated client counts")
+    parser.add_argument('--db-latency-ms', type=float, default=0,
+                        help="Delay added to every SQL statement (models a networked database)")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("API CONCURRENCY BENCHMARK")
+    print("=" * 60)
+    print(f"Seeding {args.rows} results into {WORKDIR}...")
+    start, days = seed(args.rows)
+
+    port = free_port()
+    server = serve(port, args.db_latency_ms)
+    base = f"http://127.0.0.1:{port}"
+
+    try:
+        run_level(make_urls(base, start, days, 40), 4)  # warm-up
+
+        print(f"Database latency per statement: {args.db_latency_ms:g} ms")
+        print(f"{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'scaling':>10}")
+        print("-" * 48)
+        single = None
+        for clients in [int(c) for c in args.levels.split(',')]:
+            stats = run_level(make_urls(base, start, days, args.requests), clients)
+            single = single or stats['rps']
+            print(f"{clients:>8}{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                  f"{stats['rps'] / single:>9.2f}x")
+    finally:
+        server.terminate()
+        server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
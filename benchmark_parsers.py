@@ -0,0 +1,186 @@
+"""
+Offline parser benchmark over the saved HTML corpus
+
+Runs NLBScraper.parse_draw_page over nlb/<slug>/*.html and
+DLBScraper.parse_results_page over dlb/misc/dlb_debug.html, without any
+network access, for every parse engine and tree builder. Reports pages/sec,
+per-page p50/p99 and peak memory, and fails when throughput drops below the
+stored baseline.
+
+Usage:
+    python benchmark_parsers.py                      # compare against baseline
+    python benchmark_parsers.py --update-baseline    # record a new baseline
+    python benchmark_parsers.py --tolerance 0.3 --rounds 5
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+from scraper import DLBScraper, NLBScraper
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(ROOT, 'benchmark_baseline.json')
+
+# (parse engine, BeautifulSoup tree builder) pairs to compare
+BACKENDS = [('full', 'html.parser'), ('full', 'lxml'), ('fast', 'html.parser'), ('fast', 'lxml')]
+
+
+def load_corpus():
+    """Return {parser name: [(label, content, kwargs)]} from the saved pages"""
+    nlb_pages = []
+    for path in sorted(glob.glob(os.path.join(ROOT, 'nlb', '*', 'nlb_*_*.html'))):
+        match = re.match(r'nlb_(.+)_(\d+)_\w+\.html$', os.path.basename(path))
+        if not match:
+            continue
+        with open(path, 'rb') as f:
+            nlb_pages.append((path, f.read(), {'lottery_slug': match.group(1), 'draw_number': int(match.group(2))}))
+
+    dlb_pages = []
+    for path in sorted(glob.glob(os.path.join(ROOT, 'dlb', '*', '*.html'))):
+        with open(path, 'rb') as f:
+            dlb_pages.append((path, f.read(), {}))
+
+    return {'nlb_draw': nlb_pages, 'dlb_results': dlb_pages}
+
+
+def make_parser(name, backend):
+    """Return a callable(content, **kwargs) for one parser/backend pair"""
+    engine, builder = backend
+    if name == 'nlb_draw':
+        scraper = NLBScraper(parser=builder, engine=engine)
+        return lambda content, **kwargs: scraper.parse_draw_page(content, **kwargs)
+    scraper = DLBScraper(parser=builder, engine=engine)
+    return lambda content, **kwargs: scraper.parse_results_page(content)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_benchmark(parse, pages, rounds):
+    """Time every page `rounds` times, then measure peak memory in one extra pass"""
+    # Warm-up pass (regex compilation, imports, caches)
+    for _, content, kwargs in pages:
+        parse(content, **kwargs)
+
+    timings = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for _, content, kwargs in pages:
+            t0 = time.perf_counter()
+            parse(content, **kwargs)
+            timings.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    peak = 0
+    for _, content, kwargs in pages:
+        tracemalloc.start()
+        parse(content, **kwargs)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'pages': len(timings),
+        'pages_per_sec': len(timings) / elapsed,
+        'p50_ms': statistics.median(timings) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'peak_mem_kb': peak / 1024,
+    }
+
+
+def available_backends():
+    from bs4 import BeautifulSoup
+    import parse_engine
+    
+    backends = []
+    for engine, builder in BACKENDS:
+        try:
+            BeautifulSoup('<p></p>', builder)
+        except Exception:
+            print(f"⚠ Skipping {engine}+{builder}: {builder} not installed")
+            continue
+        if engine == 'fast' and parse_engine.lxml is None:
+            print(f"⚠ Skipping {engine}+{builder}: lxml not installed")
+            continue
+        backends.append((engine, builder))
+    return backends
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark lottery page parsers over the saved HTML corpus")
+    parser.add_argument('--rounds', type=int, default=3, help="Timed passes over the corpus")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed throughput drop versus baseline (0.25 = 25%%)")
+    parser.add_argument('--update-baseline', action='store_true', help="Write results as the new baseline")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline JSON file")
+    args = parser.parse_args(argv)
+
+    # Parsers log every page; keep the timing loop quiet
+    logging.disable(logging.WARNING)
+
+    corpus = load_corpus()
+    backends = available_backends()
+    results = {}
+
+    print("=" * 74)
+    print("PARSER BENCHMARK")
+    print("=" * 74)
+    print(f"{'parser/engine+builder':<32}{'pages/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'peak KB':>12}")
+    print("-" * 74)
+
+    for name, pages in corpus.items():
+        if not pages:
+            print(f"⚠ No corpus pages found for {name}")
+            continue
+        for backend in backends:
+            key = f"{name}/{backend[0]}+{backend[1]}"
+            stats = run_benchmark(make_parser(name, backend), pages, args.rounds)
+            results[key] = stats
+            print(f"{key:<32}{stats['pages_per_sec']:>10.1f}{stats['p50_ms']:>10.2f}"
+                  f"{stats['p99_ms']:>10.2f}{stats['peak_mem_kb']:>12.0f}")
+
+    print("-" * 74)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"✓ Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠ No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for key, stats in results.items():
+        if key not in baseline:
+            continue
+        floor = baseline[key]['pages_per_sec'] * (1 - args.tolerance)
+        change = stats['pages_per_sec'] / baseline[key]['pages_per_sec'] - 1
+        status = "✅" if stats['pages_per_sec'] >= floor else "❌"
+        print(f"{status} {key:<32} {change:+.1%} vs baseline ({baseline[key]['pages_per_sec']:.1f} pages/s)")
+        if stats['pages_per_sec'] < floor:
+            regressions.append(key)
+
+    if regressions:
+        print(f"\n❌ Throughput regression in: {', '.join(regressions)}")
+        return 1
+    print("\n✓ No throughput regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
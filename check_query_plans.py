@@ -0,0 +1,74 @@
+"""
+Check that every API query is served by an index
+
+Runs EXPLAIN QUERY PLAN for each endpoint's query and fails if SQLite falls
+back to a full table scan or a temporary sort instead of the expected index.
+Usage: python check_query_plans.py
+"""
+from datetime import datetime
+import sys
+
+from sqlalchemy import text
+from database import SessionLocal, engine, init_db
+from api import (latest_results_query, lottery_results_query, date_results_query, draw_query, ball_search_query,
+                 export_query)
+
+init_db()
+db = SessionLocal()
+
+day = datetime(2026, 1, 4)
+cursor = (datetime(2026, 1, 4, 21, 30), 1000)
+CHECKS = [
+    ("GET /api/results/latest", latest_results_query(db).limit(10), "ix_lottery_results_draw_date"),
+    ("GET /api/results/latest?board=NLB", latest_results_query(db, "NLB").limit(10), "ix_lottery_results_board_date"),
+    ("GET /api/results/latest?cursor=...", latest_results_query(db, after=cursor).limit(10),
+     "ix_lottery_results_draw_date"),
+    ("GET /api/results/latest?board=NLB&cursor=...", latest_results_query(db, "NLB", cursor).limit(10),
+     "ix_lottery_results_board_date"),
+    ("GET /api/results/{lottery}", lottery_results_query(db, "govisetha").limit(10), "ix_lottery_results_name_date"),
+    ("GET /api/results/{lottery}?cursor=...", lottery_results_query(db, "govisetha", cursor).limit(10),
+     "ix_lottery_results_name_date"),
+    ("GET /api/results/date/{date}", date_results_query(db, day), "ix_lottery_results_draw_date"),
+    ("POST /api/verify (draw_number)", draw_query(db, "govisetha", "4303"), "uq_lottery_results_name_draw"),
+    ("POST /api/verify (draw_date)", draw_query(db, "govisetha", draw_date=day), "ix_lottery_results_name_date"),
+    ("POST /api/verify (latest)", draw_query(db, "govisetha").limit(1), "ix_lottery_results_name_date"),
+    ("GET /api/export", export_query(db), "ix_lottery_results_draw_date"),
+    ("GET /api/export?lottery=...&from_date=...", export_query(db, "govisetha", from_date=day),
+     "ix_lottery_results_name_date"),
+    ("GET /api/export?board=NLB&cursor=...", export_query(db, board="NLB", after=cursor),
+     "ix_lottery_results_board_date"),
+]
+
+# Grouped queries: a temp b-tree for GROUP BY / ORDER BY over the matched rows is expected
+GROUPED_CHECKS = [
+    ("GET /api/search/{lottery}", ball_search_query(db, "govisetha", [(None, "7"), ("letter", "U")], 2).limit(50),
+     "ix_ball_index_lookup"),
+]
+
+print("=" * 70)
+print("QUERY PLAN CHECK")
+print("=" * 70)
+
+failed = 0
+with engine.connect() as conn:
+    for name, query, expected_index in CHECKS + GROUPED_CHECKS:
+        sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+        plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+        uses_index = any(expected_index in step for step in plan)
+        scans = [step for step in plan if step.startswith("SCAN") and "INDEX" not in step]
+        sorts = [step for step in plan if "TEMP B-TREE" in step and (name, query, expected_index) not in GROUPED_CHECKS]
+        ok = uses_index and not scans and not sorts
+        failed += not ok
+        
+        print(f"\n{'✅' if ok else '❌'} {name}")
+        print(f"   Expected index: {expected_index}")
+        for step in plan:
+            print(f"   {step}")
+
+db.close()
+
+print("\n" + "=" * 70)
+total = len(CHECKS) + len(GROUPED_CHECKS)
+print(f"{total - failed} passed, {failed} failed out of {total} queries")
+print("=" * 70)
+sys.exit(1 if failed else 0)
@@ -0,0 +1,33 @@
+"""
+Shared pytest setup
+
+Tests run against a throwaway SQLite database (never ./lottery_results.db) and
+with the page archive off. The environment is set before any test module
+imports database.py, which creates its engine from DATABASE_URL at import.
+"""
+
+import os
+import tempfile
+
+_TEST_DIR = tempfile.mkdtemp(prefix="lottery-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DIR, 'test.db')}"
+os.environ["PAGE_ARCHIVE"] = "0"
+os.environ.pop("API_KEY", None)
+
+import pytest
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created tables"""
+    from database import Base, SessionLocal, engine, init_db
+    from lottery_registry import registry
+
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    registry.invalidate()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -1,12 +1,48 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, JSON
+from sqlalchemy import create_engine, event, Column, Float, ForeignKey, Integer, String, DateTime, JSON, Index, Text, bindparam, case, delete, func, insert, inspect, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime
+from typing import Dict, List, Optional
+import logging
 import os
+import threading
+
+from ticket_verify import normalize_ball
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./lottery_results.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Connection pool shared by the API worker threads, scheduler jobs and scrape jobs.
+# api.py caps its worker threadpool at DB_POOL_SIZE so requests queue for a thread
+# rather than for a connection.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+
+
+def _create_engine(url: str):
+    pool_args = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True, **pool_args)
+    if ":memory:" in url or url.rstrip("/") == "sqlite:":
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    sqlite_engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 30}, **pool_args)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets API reads run while a scrape is writing
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return sqlite_engine
+
+
+engine = _create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -14,10 +50,19 @@ Base = declarative_base()
 class LotteryResult(Base):
     __tablename__ = "lottery_results"
     
+    __table_args__ = (
+        # One row per draw; also serves duplicate checks and single-draw lookups
+        Index("uq_lottery_results_name_draw", "lottery_name", "draw_number", unique=True),
+        # Per-lottery and per-board listings ordered by draw date
+        Index("ix_lottery_results_name_date", "lottery_name", "draw_date"),
+        Index("ix_lottery_results_board_date", "board", "draw_date"),
+    )
+    
     id = Column(Integer, primary_key=True, index=True)
     lottery_name = Column(String, index=True)  # e.g., "sasiri", "kapruka"
     draw_number = Column(String, index=True)   # e.g., "867"
     draw_date = Column(DateTime, index=True)
+    board = Column(String)                      # "DLB" or "NLB", copied from the scraper
     winning_numbers = Column(JSON)              # List of winning numbers
     prize_amount = Column(String)               # e.g., "Rs.200,000.00"
     additional_data = Column(JSON)              # Any extra data
@@ -39,40 +84,277 @@ class LotteryType(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class BallIndex(Base):
+    """Inverted index of winning balls: one row per distinct ball of every stored draw"""
+    __tablename__ = "ball_index"
+    
+    __table_args__ = (
+        # History search: draws of a lottery containing given values (optionally typed)
+        Index("ix_ball_index_lookup", "lottery_name", "value", "ball_type", "result_id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    result_id = Column(Integer, ForeignKey("lottery_results.id", ondelete="CASCADE"), nullable=False, index=True)
+    lottery_name = Column(String, nullable=False)
+    ball_type = Column(String)                   # "number", "letter", ...; NULL for plain-string balls
+    value = Column(String, nullable=False)       # normalized: "07" -> "7", letters upper-case
+
+
+def ball_index_rows(result_id: int, lottery_name: str, winning_numbers) -> List[Dict]:
+    """ball_index rows for one draw"""
+    balls = {normalize_ball(ball) for ball in winning_numbers or []}
+    return [
+        {"result_id": result_id, "lottery_name": lottery_name, "ball_type": ball_type, "value": value}
+        for ball_type, value in balls if value
+    ]
+
+
+def _insert_ball_rows(conn, rows: List[Dict]):
+    for i in range(0, len(rows), BULK_CHUNK_SIZE):
+        conn.execute(insert(BallIndex.__table__), rows[i:i + BULK_CHUNK_SIZE])
+
+
+def rebuild_ball_index(conn) -> int:
+    """Rebuild ball_index from lottery_results in batches; returns rows written"""
+    conn.execute(delete(BallIndex.__table__))
+    written = 0
+    pending = []
+    results = conn.execution_options(yield_per=BULK_CHUNK_SIZE).execute(
+        select(LotteryResult.id, LotteryResult.lottery_name, LotteryResult.winning_numbers)
+    )
+    for result_id, lottery_name, winning_numbers in results:
+        pending.extend(ball_index_rows(result_id, lottery_name, winning_numbers))
+        if len(pending) >= BULK_CHUNK_SIZE:
+            _insert_ball_rows(conn, pending)
+            written += len(pending)
+            pending = []
+    _insert_ball_rows(conn, pending)
+    return written + len(pending)
+
+
+class LotteryStats(Base):
+    """Per-lottery totals kept by the save path, so /api/stats never scans lottery_results"""
+    __tablename__ = "lottery_stats"
+    
+    lottery_name = Column(String, primary_key=True)
+    board = Column(String)
+    draws = Column(Integer, nullable=False, default=0)
+    first_draw_date = Column(DateTime)
+    last_draw_date = Column(DateTime)
+    last_scraped_at = Column(DateTime)           # when a draw of this lottery was last inserted
+
+
+class ScrapeRun(Base):
+    """One scrape run with per-source / per-stage timings, recorded by scrape_runs.py"""
+    __tablename__ = "scrape_runs"
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String, index=True)          # scrape_jobs job that ran it, if any
+    source = Column(String)                      # api, scheduler, startup, cli
+    boards = Column(String)                      # e.g. "DLB,NLB"
+    status = Column(String)                      # succeeded / failed
+    started_at = Column(DateTime, index=True)
+    finished_at = Column(DateTime)
+    wall_seconds = Column(Float)
+    cpu_seconds = Column(Float)                  # CPU time of the scraping thread
+    bytes_downloaded = Column(Integer, default=0)
+    rows_parsed = Column(Integer, default=0)
+    rows_inserted = Column(Integer, default=0)
+    rows_skipped = Column(Integer, default=0)    # duplicates of stored draws
+    error_count = Column(Integer, default=0)
+    sources = Column(JSON)                       # board -> counts and stage timings
+    errors = Column(JSON)                        # first few errors: [{board, stage, error}]
+    profile = Column(Text)                       # pstats report, when the run was profiled
+    profile_path = Column(String)                # raw cProfile dump next to it
+
+
+def _earliest(column, value):
+    return column if value is None else case(
+        (column.is_(None) | (column > value), value), else_=column
+    )
+
+
+def _latest(column, value):
+    return column if value is None else case(
+        (column.is_(None) | (column < value), value), else_=column
+    )
+
+
+def update_lottery_stats(conn, new_draws, scraped_at: datetime):
+    """
+    Fold newly inserted draws (rows of SAVED_DRAW_COLUMNS) into lottery_stats
+    
+    Each row is changed with a single INSERT ... ON CONFLICT (lottery_name) DO
+    UPDATE with relative values (draws = draws + n, ...) in the caller's
+    transaction, so concurrent saves can't lose counts or race to create a
+    lottery's row.
+    """
+    deltas, boards = {}, {}
+    for draw in new_draws:
+        lottery_name, draw_date = draw.lottery_name, draw.draw_date
+        boards.setdefault(lottery_name, draw.board)
+        count, first, last = deltas.get(lottery_name, (0, None, None))
+        if draw_date is not None:
+            first = draw_date if first is None else min(first, draw_date)
+            last = draw_date if last is None else max(last, draw_date)
+        deltas[lottery_name] = (count + 1, first, last)
+    
+    table = LotteryStats.__table__
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(engine.dialect.name)
+    for lottery_name, (count, first, last) in deltas.items():
+        row = dict(lottery_name=lottery_name, board=boards.get(lottery_name), draws=count,
+                   first_draw_date=first, last_draw_date=last, last_scraped_at=scraped_at)
+        changes = dict(
+            draws=table.c.draws + count,
+            board=func.coalesce(table.c.board, boards.get(lottery_name)),
+            first_draw_date=_earliest(table.c.first_draw_date, first),
+            last_draw_date=_latest(table.c.last_draw_date, last),
+            last_scraped_at=scraped_at,
+        )
+        if dialect is not None:
+            conn.execute(dialect.insert(table).values(**row).on_conflict_do_update(
+                index_elements=[table.c.lottery_name], set_=changes,
+            ))
+            continue
+        # No ON CONFLICT: update, then insert if the lottery had no row
+        changed = conn.execute(update(table).where(table.c.lottery_name == lottery_name).values(**changes))
+        if changed.rowcount == 0:
+            conn.execute(insert(table).values(**row))
+
+
+def rebuild_lottery_stats(conn) -> int:
+    """Recompute lottery_stats from lottery_results; returns the number of lotteries"""
+    table = LotteryStats.__table__
+    conn.execute(delete(table))
+    rows = conn.execute(select(
+        LotteryResult.lottery_name,
+        func.max(LotteryResult.board),
+        func.count(LotteryResult.id),
+        func.min(LotteryResult.draw_date),
+        func.max(LotteryResult.draw_date),
+        func.max(LotteryResult.scraped_at),
+    ).group_by(LotteryResult.lottery_name)).all()
+    if rows:
+        conn.execute(insert(table), [
+            {"lottery_name": name, "board": board, "draws": draws, "first_draw_date": first,
+             "last_draw_date": last, "last_scraped_at": scraped_at}
+            for name, board, draws, first, last, scraped_at in rows
+        ])
+    return len(rows)
+
+
+class PageFetchState(Base):
+    """Validators and body hash of the last processed copy of a scraped page"""
+    __tablename__ = "page_fetch_state"
+    
+    url = Column(String, primary_key=True)
+    etag = Column(String)
+    last_modified = Column(String)
+    content_hash = Column(String)                # SHA-256 of the response body
+    processed_at = Column(DateTime)
+    not_modified_count = Column(Integer, default=0)  # 304 responses
+    unchanged_count = Column(Integer, default=0)     # 200 responses with the same body hash
+    changed_count = Column(Integer, default=0)       # 200 responses that were parsed and saved
+
+
+class ArchivedPage(Base):
+    """Index of the raw page archive (page_archive.py): one row per distinct body seen at a URL"""
+    __tablename__ = "page_archive"
+    
+    __table_args__ = (
+        Index("uq_page_archive_url_hash", "url", "content_hash", unique=True),
+        Index("ix_page_archive_lottery_draw", "source", "lottery", "draw_number"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    source = Column(String, nullable=False)      # board: "DLB" or "NLB"
+    lottery = Column(String)                     # NLB draw page slug; NULL for results pages
+    draw_number = Column(Integer)
+    url = Column(String, nullable=False)
+    status_code = Column(Integer)
+    fetched_at = Column(DateTime)                # first time this body was fetched from this URL
+    content_hash = Column(String, nullable=False, index=True)  # SHA-256 of the raw body; names the blob
+    size = Column(Integer)                       # raw body bytes
+
+
+def migrate_db():
+    """
+    Bring an existing database up to the current lottery_results schema
+    
+    Runs on every startup but only does work a database still needs: the board
+    column is filled in when it is added, and duplicate draws are removed
+    (keeping the first row) only while the unique index is missing. Missing
+    indexes are created and an empty ball_index and lottery_stats filled.
+    """
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("lottery_results")}
+    indexes = {index["name"] for index in inspector.get_indexes("lottery_results")}
+    
+    with engine.begin() as conn:
+        if "board" not in columns:
+            conn.execute(text("ALTER TABLE lottery_results ADD COLUMN board VARCHAR"))
+            conn.execute(text("""
+                UPDATE lottery_results
+                SET board = (SELECT lottery_types.board FROM lottery_types
+                             WHERE lottery_types.name = lottery_results.lottery_name)
+                WHERE board IS NULL
+            """))
+            # Individual NLB draw pages record their source URL (checked here: JSON has no LIKE on PostgreSQL)
+            nlb_ids = [
+                {"row_id": row_id} for row_id, data in conn.execute(
+                    select(LotteryResult.id, LotteryResult.additional_data).where(LotteryResult.board.is_(None))
+                )
+                if "nlb.lk" in str((data or {}).get("source_url", ""))
+            ]
+            if nlb_ids:
+                conn.execute(
+                    update(LotteryResult.__table__).where(LotteryResult.id == bindparam("row_id")).values(board="NLB"),
+                    nlb_ids,
+                )
+        
+        if "uq_lottery_results_name_draw" not in indexes:
+            removed = conn.execute(text("""
+                DELETE FROM lottery_results
+                WHERE draw_number IS NOT NULL AND id NOT IN (
+                    SELECT MIN(id) FROM lottery_results GROUP BY lottery_name, draw_number
+                )
+            """)).rowcount
+            if removed:
+                print(f"Removed {removed} duplicate draw(s) before building the unique draw index")
+        
+        for index in LotteryResult.__table__.indexes:
+            index.create(bind=conn, checkfirst=True)
+        
+        # First start with the ball index: build it for the draws already stored
+        if conn.execute(text("SELECT 1 FROM ball_index LIMIT 1")).first() is None \
+                and conn.execute(text("SELECT 1 FROM lottery_results LIMIT 1")).first() is not None:
+            print(f"Building ball index: {rebuild_ball_index(conn)} rows")
+        
+        if conn.execute(text("SELECT 1 FROM lottery_stats LIMIT 1")).first() is None \
+                and conn.execute(text("SELECT 1 FROM lottery_results LIMIT 1")).first() is not None:
+            print(f"Building lottery stats: {rebuild_lottery_stats(conn)} lotteries")
+
+
 def init_db():
     """Initialize database and create tables"""
     Base.metadata.create_all(bind=engine)
+    migrate_db()
+    
+    # Add the lottery types defined in the registry that aren't stored yet
+    # (imported here: lottery_registry imports this module)
+    from lottery_registry import BOARD_URLS, LOTTERIES
     
-    # Add default lottery types for DLB and NLB
     db = SessionLocal()
     try:
-        default_lotteries = [
-            # DLB Lotteries
-            {"name": "sasiri", "display_name": "SASIRI", "board": "DLB", "url": "https://www.dlb.lk/result/en"},
-            {"name": "kapruka", "display_name": "KAPRUKA", "board": "DLB", "url": "https://www.dlb.lk/result/en"},
-            {"name": "shanida", "display_name": "SHANIDA", "board": "DLB", "url": "https://www.dlb.lk/result/en"},
-            {"name": "super_ball", "display_name": "SUPER BALL", "board": "DLB", "url": "https://www.dlb.lk/result/en"},
-            {"name": "ada_kotipathi", "display_name": "ADA KOTIPATHI", "board": "DLB", "url": "https://www.dlb.lk/result/en"},
-            {"name": "jaya_sampatha", "display_name": "JAYA SAMPATHA", "board": "DLB", "url": "https://www.dlb.lk/result/en"},
-            {"name": "lagna_wasana", "display_name": "LAGNA WASANA", "board": "DLB", "url": "https://www.dlb.lk/result/en"},
-            {"name": "supiri_dhana_sampatha", "display_name": "SUPIRI DHANA SAMPATHA", "board": "DLB", "url": "https://www.dlb.lk/result/en"},
-            
-            # NLB Lotteries
-            {"name": "mahajana_sampatha", "display_name": "MAHAJANA SAMPATHA", "board": "NLB", "url": "https://www.nlb.lk/English/results/"},
-            {"name": "vasana_sampatha", "display_name": "VASANA SAMPATHA", "board": "NLB", "url": "https://www.nlb.lk/English/results/"},
-            {"name": "govisetha", "display_name": "GOVISETHA", "board": "NLB", "url": "https://www.nlb.lk/English/results/"},
-            {"name": "supiri_wasana", "display_name": "SUPIRI WASANA", "board": "NLB", "url": "https://www.nlb.lk/English/results/"},
-            {"name": "dhana_nidhanaya", "display_name": "DHANA NIDHANAYA", "board": "NLB", "url": "https://www.nlb.lk/English/results/"},
-            {"name": "saturday_super_ball", "display_name": "SATURDAY SUPER BALL", "board": "NLB", "url": "https://www.nlb.lk/English/results/"},
-            {"name": "sunday_mega_jackpot", "display_name": "SUNDAY MEGA JACKPOT", "board": "NLB", "url": "https://www.nlb.lk/English/results/"},
-            {"name": "shanida_pattare", "display_name": "SHANIDA PATTARE", "board": "NLB", "url": "https://www.nlb.lk/English/results/"},
-            {"name": "kotipathi_pattare", "display_name": "KOTIPATHI PATTARE", "board": "NLB", "url": "https://www.nlb.lk/English/results/"},
-        ]
-        
-        for lottery in default_lotteries:
-            exists = db.query(LotteryType).filter(LotteryType.name == lottery["name"]).first()
-            if not exists:
-                db.add(LotteryType(**lottery))
+        existing = {name for (name,) in db.query(LotteryType.name)}
+        for lottery in LOTTERIES:
+            if lottery["name"] not in existing:
+                db.add(LotteryType(
+                    name=lottery["name"],
+                    display_name=lottery["display_name"],
+                    board=lottery["board"],
+                    url=lottery.get("url") or BOARD_URLS[lottery["board"]],
+                ))
         
         db.commit()
     except Exception as e:
@@ -89,3 +371,213 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Data version: bumped after every commit that inserted results or lottery types.
+# Response caches key off it, so cached reads are invalidated as soon as a scrape lands.
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+
+def data_version() -> int:
+    return _data_version
+
+
+def bump_data_version() -> int:
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+        return _data_version
+
+
+# Called after a commit that inserted results, with the new draws as rows of
+# SAVED_DRAW_COLUMNS (read them by attribute: draw.lottery_name, draw.draw_date, ...)
+_saved_listeners = []
+
+
+def on_results_saved(callback):
+    """Register callback(new_draws); usable as a decorator"""
+    _saved_listeners.append(callback)
+    return callback
+
+
+# Called after a commit that corrected stored results (update_results), with the
+# set of lottery names whose draws changed
+_corrected_listeners = []
+
+
+def on_results_corrected(callback):
+    """Register callback(lottery_names); usable as a decorator"""
+    _corrected_listeners.append(callback)
+    return callback
+
+
+def _notify(listeners, argument, kind: str):
+    for callback in listeners if argument else ():
+        try:
+            callback(argument)
+        except Exception as e:  # a listener must never fail the save
+            logger.error(f"Results-{kind} listener {callback.__name__} failed: {e}")
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_version_on_commit(session):
+    if session.info.pop("data_changed", False):
+        bump_data_version()
+    _notify(_saved_listeners, session.info.pop("new_draws", None), "saved")
+    _notify(_corrected_listeners, session.info.pop("corrected_lotteries", None), "corrected")
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _clear_version_flag(session):
+    session.info.pop("data_changed", None)
+    session.info.pop("new_draws", None)
+    session.info.pop("corrected_lotteries", None)
+
+
+# Rows per multi-row INSERT / keys per lookup; keeps well under SQLite's bound parameter limit
+BULK_CHUNK_SIZE = 500
+
+
+# Columns returned for each inserted draw and handed to on_results_saved listeners
+SAVED_DRAW_COLUMNS = (
+    LotteryResult.id, LotteryResult.lottery_name, LotteryResult.board, LotteryResult.draw_number,
+    LotteryResult.draw_date, LotteryResult.winning_numbers,
+)
+
+
+def insert_ignore(table):
+    """Multi-row INSERT that skips rows conflicting with a unique key"""
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def bulk_save_results(results: List[Dict], db: Optional[Session] = None,
+                      board: Optional[str] = None) -> Dict[str, int]:
+    """
+    Insert scraped results in bulk, skipping draws that are already stored
+    
+    Existing (lottery_name, draw_number) keys are looked up with one query per
+    chunk and new rows go in with one multi-row INSERT ... ON CONFLICT DO NOTHING
+    per chunk, instead of a query and an add per result. The inserted draws'
+    balls are added to ball_index and their counts to lottery_stats in the
+    same transaction.
+    
+    Args:
+        results: Result dicts as returned by the scrapers
+        db: Optional session; when omitted a session is opened and committed here
+        board: Board stored on rows that don't carry their own 'board' key
+    
+    Returns:
+        {"inserted": n, "duplicates": n}
+    """
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    
+    # Drop repeats inside the batch itself, keeping the first occurrence
+    unique = {}
+    for result in results:
+        unique.setdefault((result['lottery_name'], result['draw_number']), result)
+    keys = list(unique)
+    
+    try:
+        scraped_at = datetime.utcnow()
+        existing = set()
+        for i in range(0, len(keys), BULK_CHUNK_SIZE):
+            chunk = keys[i:i + BULK_CHUNK_SIZE]
+            existing.update(db.query(LotteryResult.lottery_name, LotteryResult.draw_number).filter(
+                tuple_(LotteryResult.lottery_name, LotteryResult.draw_number).in_(chunk)
+            ).all())
+        
+        rows = [
+            {
+                "lottery_name": result['lottery_name'],
+                "draw_number": result['draw_number'],
+                "draw_date": result['draw_date'],
+                "board": result.get('board', board),
+                "winning_numbers": result['winning_numbers'],
+                "prize_amount": result.get('prize_amount'),
+                "additional_data": result.get('additional_data', {}),
+                "scraped_at": scraped_at,
+            }
+            for key, result in unique.items() if key not in existing
+        ]
+        
+        inserted = 0
+        new_draws = []  # SAVED_DRAW_COLUMNS of inserted rows
+        returning = engine.dialect.insert_returning
+        for i in range(0, len(rows), BULK_CHUNK_SIZE):
+            chunk = rows[i:i + BULK_CHUNK_SIZE]
+            statement = insert_ignore(LotteryResult.__table__).values(chunk)
+            if returning:
+                created = db.execute(statement.returning(*SAVED_DRAW_COLUMNS)).all()
+                new_draws.extend(created)
+                inserted += len(created)
+            else:
+                # Rows ON CONFLICT skipped (stored meanwhile) keep their old ids: only ids past the
+                # pre-insert maximum are this chunk's
+                max_id = db.query(func.max(LotteryResult.id)).scalar() or 0
+                db.execute(statement)
+                chunk_keys = [(row["lottery_name"], row["draw_number"]) for row in chunk]
+                created = db.query(*SAVED_DRAW_COLUMNS).filter(
+                    LotteryResult.id > max_id,
+                    tuple_(LotteryResult.lottery_name, LotteryResult.draw_number).in_(chunk_keys),
+                ).all()
+                new_draws.extend(created)
+                inserted += len(created)
+        
+        ball_rows = [
+            row for draw in new_draws for row in ball_index_rows(draw.id, draw.lottery_name, draw.winning_numbers)
+        ]
+        _insert_ball_rows(db, ball_rows)
+        update_lottery_stats(db, new_draws, scraped_at)
+        
+        if inserted:
+            db.info["data_changed"] = True  # data version bumps when this commits
+            db.info.setdefault("new_draws", []).extend(new_draws)
+        if own_session:
+            db.commit()
+        return {"inserted": inserted, "duplicates": len(results) - inserted}
+    except Exception:
+        if own_session:
+            db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def update_results(db: Session, changes: List[Dict]) -> int:
+    """
+    Correct stored results in bulk (the caller commits)
+    
+    `changes` are {"id", "draw_date", "winning_numbers", "prize_amount"} dicts,
+    applied as one executemany UPDATE by primary key. The changed draws'
+    ball_index rows are replaced and lottery_stats is rebuilt, since corrected
+    draw dates can move a lottery's first/last draw. on_results_corrected
+    listeners get the changed lotteries after the commit.
+    """
+    if not changes:
+        return 0
+    db.execute(update(LotteryResult), changes)
+    
+    ids = [change["id"] for change in changes]
+    ball_rows, lottery_names = [], set()
+    for i in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = ids[i:i + BULK_CHUNK_SIZE]
+        db.execute(delete(BallIndex.__table__).where(BallIndex.result_id.in_(chunk)))
+        for result_id, lottery_name, winning_numbers in db.query(
+            LotteryResult.id, LotteryResult.lottery_name, LotteryResult.winning_numbers
+        ).filter(LotteryResult.id.in_(chunk)):
+            ball_rows.extend(ball_index_rows(result_id, lottery_name, winning_numbers))
+            lottery_names.add(lottery_name)
+    _insert_ball_rows(db, ball_rows)
+    rebuild_lottery_stats(db)
+    
+    db.info["data_changed"] = True
+    db.info.setdefault("corrected_lotteries", set()).update(lottery_names)   # for on_results_corrected
+    return len(changes)
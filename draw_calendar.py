@@ -0,0 +1,153 @@
+"""
+Draw calendar model and the APScheduler trigger built on it
+
+Each entry describes when a lottery (or a whole board's results page) is
+expected to publish results. The trigger polls often right after the expected
+draw time, backs off exponentially once that night's draw has been captured,
+and stays idle outside the results window.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+import os
+
+from apscheduler.triggers.base import BaseTrigger
+from sqlalchemy import func
+
+from database import SessionLocal, LotteryResult
+from lottery_registry import DRAW_TIME, EVERY_DAY, registry
+
+TIMEZONE = ZoneInfo(os.getenv("DRAW_TIMEZONE", "Asia/Colombo"))
+
+# Polling policy (minutes)
+POLL_MINUTES = int(os.getenv("SCRAPER_POLL_MINUTES", 5))            # until the draw is captured
+MAX_BACKOFF_MINUTES = int(os.getenv("SCRAPER_MAX_BACKOFF_MINUTES", 120))
+RESULT_DELAY_MINUTES = 10     # results are never up before this long after the draw
+RESULT_WINDOW_HOURS = 8       # late results still trickle in until early morning
+EAGER_POLL_HOURS = 1          # uncaptured draws back off too after this long (no draw held that day)
+
+
+def draw_calendar() -> List[dict]:
+    """
+    One entry per scheduler job. DLB publishes every lottery on one results page,
+    so it is polled per board; NLB draws are fetched per lottery from their draw
+    pages, on each lottery's cadence from the registry. NLB lotteries without a
+    draw page slug only appear on the NLB results page, which gets a board job
+    of its own, captured once any of those lotteries has that night's draw.
+    """
+    entries = [
+        {"job_id": "scrape_dlb", "board": "DLB", "slug": None, "draw_time": DRAW_TIME, "weekdays": EVERY_DAY},
+    ]
+    page_only = [lottery for lottery in registry.all("NLB", active_only=True) if not lottery.slug]
+    if page_only:
+        entries.append({
+            "job_id": "scrape_nlb", "board": "NLB", "slug": None,
+            "lottery_names": [lottery.name for lottery in page_only],
+            "draw_time": min(lottery.draw_time for lottery in page_only),
+            "weekdays": tuple(sorted({day for lottery in page_only for day in lottery.weekdays})),
+        })
+    return entries + [
+        {"job_id": f"scrape_nlb_{lottery.slug}", "board": "NLB", "slug": lottery.slug, "lottery_name": lottery.name,
+         "draw_time": lottery.draw_time, "weekdays": lottery.weekdays}
+        for lottery in registry.draw_page_lotteries() if lottery.is_active
+    ]
+
+
+def captured_at(draw_day: date, board: Optional[str] = None, lottery_name: Optional[str] = None,
+                lottery_names: Optional[Sequence[str]] = None) -> Optional[datetime]:
+    """
+    When the first result for `draw_day` was saved (UTC, aware), or None if not captured yet
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(func.min(LotteryResult.scraped_at)).filter(
+            LotteryResult.draw_date >= datetime.combine(draw_day, time.min)
+        )
+        if lottery_name:
+            query = query.filter(LotteryResult.lottery_name == lottery_name)
+        elif lottery_names:
+            query = query.filter(LotteryResult.lottery_name.in_(lottery_names))
+        elif board:
+            query = query.filter(LotteryResult.board == board)
+        first = query.scalar()
+        return first.replace(tzinfo=timezone.utc) if first else None
+    finally:
+        db.close()
+
+
+class DrawWindowTrigger(BaseTrigger):
+    """
+    Fires every `poll` minutes inside a draw's results window until the draw is
+    captured, then at doubling intervals (capped at `max_backoff`) measured from
+    the capture time, and not at all between windows. A draw still missing
+    EAGER_POLL_HOURS into the window backs off the same way.
+
+    Next fire times are a pure function of `now` and the capture time, so
+    APScheduler may call get_next_fire_time repeatedly without side effects.
+    """
+
+    def __init__(self, draw_time: time, is_captured: Callable[[date], Optional[datetime]],
+                 weekdays=EVERY_DAY, poll_minutes: int = POLL_MINUTES,
+                 max_backoff_minutes: int = MAX_BACKOFF_MINUTES, tz=TIMEZONE):
+        self.draw_time = draw_time
+        self.is_captured = is_captured
+        self.weekdays = weekdays
+        self.poll = timedelta(minutes=poll_minutes)
+        self.max_backoff = timedelta(minutes=max(max_backoff_minutes, poll_minutes))
+        self.timezone = tz
+
+    def window(self, now: datetime) -> Tuple[datetime, datetime, date]:
+        """(start, end, draw day) of the window containing `now`, or the next one"""
+        local = now.astimezone(self.timezone)
+        for offset in range(-1, 8):
+            draw_day = local.date() + timedelta(days=offset)
+            if draw_day.weekday() not in self.weekdays:
+                continue
+            drawn = datetime.combine(draw_day, self.draw_time, tzinfo=self.timezone)
+            end = drawn + timedelta(hours=RESULT_WINDOW_HOURS)
+            if local < end:
+                return drawn + timedelta(minutes=RESULT_DELAY_MINUTES), end, draw_day
+        raise ValueError("No draw day in the coming week")
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        start, end, draw_day = self.window(now)
+        if now < start:
+            return start
+
+        captured = self.is_captured(draw_day)
+        eager_until = start + timedelta(hours=EAGER_POLL_HOURS)
+        if captured is None and now < eager_until:
+            next_fire = now + self.poll
+        else:
+            next_fire = self._backoff(captured or eager_until, now)
+
+        if next_fire >= end:
+            return self.window(end)[0]
+        return next_fire.astimezone(self.timezone)
+
+    def _backoff(self, since: datetime, now: datetime) -> datetime:
+        """First point after `now` in since + poll, +2*poll, +4*poll, ... (steps capped)"""
+        step = self.poll
+        next_fire = since + step
+        while next_fire <= now:
+            step = min(step * 2, self.max_backoff)
+            next_fire += step
+        return next_fire
+
+    def __str__(self):
+        return f"draw_window[{self.draw_time:%H:%M} {self.timezone}]"
+
+
+def build_triggers() -> List[Tuple[dict, DrawWindowTrigger]]:
+    """A trigger for every calendar entry"""
+    triggers = []
+    for entry in draw_calendar():
+        if entry["slug"]:
+            is_captured = lambda day, name=entry["lottery_name"]: captured_at(day, lottery_name=name)
+        elif entry.get("lottery_names"):
+            is_captured = lambda day, names=entry["lottery_names"]: captured_at(day, lottery_names=names)
+        else:
+            is_captured = lambda day, board=entry["board"]: captured_at(day, board=board)
+        triggers.append((entry, DrawWindowTrigger(entry["draw_time"], is_captured, entry["weekdays"])))
+    return triggers
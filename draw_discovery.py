@@ -0,0 +1,168 @@
+"""
+Find NLB draw numbers by probing draw pages
+
+NLB lotteries don't all draw every day, so counting days from an anchor draw
+asks for draws that don't exist yet or misses draws. DrawFinder asks the draw
+pages instead, through NLBScraper.scrape_individual_draw:
+
+- latest(): starting from the highest draw stored (or the registry anchor when
+  none is), probe +1, +2, +4, ... until a draw has no result, then bisect
+  between the last draw found and the first missing one. Finding the newest of
+  n new draws takes about 2 log2(n) fetches.
+- draws_between(from_day, to_day): bisect draw numbers by draw date. Stored
+  draws bracket the search without a fetch, so planning a backfill of any
+  year takes O(log n) fetches.
+
+It assumes every draw number up to the latest has a page and that draw dates
+increase with draw numbers. A fetch that fails reads as a missing draw, which
+can stop latest() short; the next search resumes from what was stored.
+Results of the probed pages are kept in `found`, and save() stores them so a
+backfill doesn't fetch those draws again.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+import logging
+
+from database import SessionLocal, LotteryResult, bulk_save_results
+from lottery_registry import registry
+from scraper import NLBScraper
+
+logger = logging.getLogger(__name__)
+
+UNDATED_STEPS = 5   # pages without a date stepped past before a bisection probe gives up on a day
+
+
+def draw_day(draw_date: Optional[datetime]) -> Optional[date]:
+    """Day a draw was held; None when its page had no date (parse_draw_page gives draw_date None)"""
+    return draw_date.date() if draw_date is not None else None
+
+
+class DrawFinder:
+    """Draw-number searches for one NLB lottery, sharing their probes"""
+
+    def __init__(self, lottery_slug: str, scraper: Optional[NLBScraper] = None):
+        self.lottery = registry.by_slug(lottery_slug)
+        if self.lottery is None:
+            raise ValueError(f"Unknown lottery slug: {lottery_slug}")
+        self.scraper = scraper or NLBScraper(pool_size=1)
+        self.found: Dict[int, dict] = {}   # probed draws that have a result
+        self.missing = set()                # probed draws that don't
+        self.probes = 0
+        self._latest = None
+        self.stored = self._stored_days()
+
+    def _stored_days(self) -> Dict[int, Optional[date]]:
+        """{draw number: draw day} of the stored draws"""
+        db = SessionLocal()
+        try:
+            return {
+                int(number): draw_day(draw_date)
+                for number, draw_date in db.query(LotteryResult.draw_number, LotteryResult.draw_date).filter(
+                    LotteryResult.lottery_name == self.lottery.name
+                )
+                if number and str(number).isdigit()
+            }
+        finally:
+            db.close()
+
+    def _exists(self, number: int) -> bool:
+        if number < 1 or number in self.missing:
+            return False
+        if number in self.stored or number in self.found:
+            return True
+        self.probes += 1
+        result = self.scraper.scrape_individual_draw(self.lottery.slug, number)
+        if result:
+            self.found[number] = result
+            return True
+        self.missing.add(number)
+        return False
+
+    def _day(self, number: int) -> Optional[date]:
+        if not self._exists(number):
+            return None
+        if number in self.stored:
+            return self.stored[number]
+        return draw_day(self.found[number].get('draw_date'))
+
+    def latest(self) -> Optional[int]:
+        """Newest draw that has a result (None if the lottery has none)"""
+        if self._latest is not None:
+            return self._latest
+        start = max(self.stored, default=None) or (self.lottery.anchor[1] if self.lottery.anchor else 1)
+
+        # Gallop from the start until a probe disagrees with it, then bisect the gap
+        direction = 1 if self._exists(start) else -1
+        near, step = start, 1
+        while True:
+            far = start + direction * step
+            if far < 1 or self._exists(far) != (direction == 1):
+                break
+            near, step = far, step * 2
+        good, bad = (near, far) if direction == 1 else (max(far, 0), near)
+        while bad - good > 1:
+            middle = (good + bad) // 2
+            if self._exists(middle):
+                good = middle
+            else:
+                bad = middle
+
+        self._latest = good or None
+        logger.info(f"NLB {self.lottery.slug}: latest draw #{self._latest} ({self.probes} probes)")
+        return self._latest
+
+    def _dated_at_or_below(self, number: int, floor: int) -> Tuple[int, Optional[date]]:
+        """Closest draw in (floor, number] with a known day, stepping past a few undated pages; (number, None) if none"""
+        for candidate in range(number, max(floor, number - UNDATED_STEPS), -1):
+            if not self._exists(candidate):
+                break
+            day = self._day(candidate)
+            if day is not None:
+                return candidate, day
+        return number, None
+
+    def first_on_or_after(self, day: date) -> int:
+        """
+        Lowest draw number held on or after `day` (latest() + 1 when there is none yet)
+
+        Raises ValueError when no draw with a known date was seen: the search
+        had nothing to compare `day` with.
+        """
+        latest = self.latest()
+        if latest is None:
+            return 1
+        # Invariant: draws <= low are before `day`, draws >= high are on or after it
+        low, high = 0, latest + 1
+        dated_seen = False
+        for number, stored_day in self.stored.items():
+            if stored_day is None:
+                continue
+            dated_seen = True
+            if stored_day < day:
+                low = max(low, number)
+            else:
+                high = min(high, number)
+        while high - low > 1:
+            middle = (low + high) // 2
+            dated, middle_day = self._dated_at_or_below(middle, low)
+            dated_seen = dated_seen or middle_day is not None
+            if middle_day is not None and middle_day >= day:
+                high = dated
+            else:
+                low = middle   # missing and undated draws are taken to be before `day`
+        if not dated_seen:
+            raise ValueError(f"No dated {self.lottery.slug} draw found to place {day} against")
+        return high
+
+    def draws_between(self, from_day: date, to_day: Optional[date] = None) -> range:
+        """Draw numbers held from `from_day` to `to_day` (default: the latest draw), inclusive"""
+        first = self.first_on_or_after(from_day)
+        last = self.first_on_or_after(to_day + timedelta(days=1)) - 1 if to_day else self.latest() or 0
+        return range(first, last + 1)
+
+    def save(self, db=None) -> Dict[str, int]:
+        """Store the probed results (bulk_save_results skips the stored ones)"""
+        if not self.found:
+            return {"inserted": 0, "duplicates": 0}
+        return bulk_save_results(list(self.found.values()), db, board='NLB')
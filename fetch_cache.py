@@ -0,0 +1,138 @@
+"""
+Conditional fetching for the results pages
+
+Remembers the ETag, Last-Modified and body hash of the last processed copy
+of each URL (page_fetch_state table), sends If-None-Match/If-Modified-Since,
+and tells the scraper when the page is unchanged so the parse and database
+stages can be skipped.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+import hashlib
+import logging
+import threading
+
+from database import SessionLocal, PageFetchState
+
+logger = logging.getLogger(__name__)
+
+# Process-wide counters since startup
+FETCH_STATS = {'requests': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(outcome: str):
+    with _stats_lock:
+        FETCH_STATS['requests'] += 1
+        FETCH_STATS[outcome] += 1
+
+
+class ConditionalFetcher:
+    """Per-scraper helper that turns page fetches into conditional requests"""
+    
+    def __init__(self):
+        self._pending: Dict[str, Dict] = {}
+    
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for the last processed copy of `url`"""
+        db = SessionLocal()
+        try:
+            state = db.get(PageFetchState, url)
+            headers = {}
+            if state and state.etag:
+                headers['If-None-Match'] = state.etag
+            if state and state.last_modified:
+                headers['If-Modified-Since'] = state.last_modified
+            return headers
+        finally:
+            db.close()
+    
+    def is_unchanged(self, url: str, response) -> bool:
+        """
+        Check a response against the stored state
+        
+        Returns True for a 304 or a body identical to the last processed one.
+        A changed page is held as pending until `remember()` is called once its
+        results have been saved, so a failed save is retried on the next run.
+        """
+        db = SessionLocal()
+        try:
+            state = db.get(PageFetchState, url)
+            if state is None:
+                state = PageFetchState(url=url, not_modified_count=0, unchanged_count=0, changed_count=0)
+                db.add(state)
+            
+            if response.status_code == 304:
+                state.not_modified_count += 1
+                db.commit()
+                _count('not_modified')
+                logger.info(f"{url}: 304 Not Modified, skipping parse")
+                return True
+            
+            content_hash = hashlib.sha256(response.content).hexdigest()
+            if content_hash == state.content_hash:
+                state.unchanged_count += 1
+                # Refresh validators so the next request can be a 304
+                state.etag = response.headers.get('ETag') or state.etag
+                state.last_modified = response.headers.get('Last-Modified') or state.last_modified
+                db.commit()
+                _count('unchanged')
+                logger.info(f"{url}: body unchanged, skipping parse")
+                return True
+            
+            db.commit()
+            _count('changed')
+            self._pending[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': content_hash,
+            }
+            return False
+        finally:
+            db.close()
+    
+    def forget(self, url: Optional[str] = None):
+        """Drop pending state (all pages, or just `url`), e.g. after a parse error"""
+        if url:
+            self._pending.pop(url, None)
+        else:
+            self._pending.clear()
+    
+    def remember(self, url: Optional[str] = None):
+        """Store validators for pending pages (all of them, or just `url`) after a successful save"""
+        urls = [url] if url else list(self._pending)
+        db = SessionLocal()
+        try:
+            for page_url in urls:
+                pending = self._pending.pop(page_url, None)
+                if pending is None:
+                    continue
+                state = db.get(PageFetchState, page_url)
+                state.etag = pending['etag']
+                state.last_modified = pending['last_modified']
+                state.content_hash = pending['content_hash']
+                state.processed_at = datetime.utcnow()
+                state.changed_count += 1
+            db.commit()
+        finally:
+            db.close()
+
+
+def fetch_cache_stats() -> Dict:
+    """Counters since startup plus the persisted per-URL totals"""
+    db = SessionLocal()
+    try:
+        pages = {
+            state.url: {
+                'not_modified': state.not_modified_count,
+                'unchanged': state.unchanged_count,
+                'changed': state.changed_count,
+                'processed_at': state.processed_at,
+            }
+            for state in db.query(PageFetchState).all()
+        }
+    finally:
+        db.close()
+    with _stats_lock:
+        return {'since_startup': dict(FETCH_STATS), 'pages': pages}
@@ -0,0 +1,227 @@
+"""
+Lottery registry: the single source of lottery metadata
+
+Static definitions below hold what the lottery_types table doesn't: NLB draw
+page slugs, draw cadence, the anchor draw used to estimate draw numbers from
+dates, and the names each lottery appears under on the results pages. The
+registry merges them with the lottery_types rows (id, display name, board,
+active flag) once, and serves scrapers, the backfill, the scheduler, init_db
+and the API from memory. Commits that touch lottery_types invalidate it.
+"""
+
+from datetime import date, datetime, time
+from typing import Dict, List, Optional
+import logging
+import re
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import SessionLocal, LotteryType
+
+logger = logging.getLogger(__name__)
+
+DLB_RESULTS_URL = "https://www.dlb.lk/result/en"
+NLB_RESULTS_URL = "https://www.nlb.lk/English/results/"
+
+EVERY_DAY = tuple(range(7))   # date.weekday() values
+DRAW_TIME = time(21, 30)
+
+# name: canonical lottery_name stored with results. slug: NLB draw page slug
+# (www.nlb.lk/results/<slug>/<draw>). anchor: a known (date, draw number)
+# where draw_discovery starts probing when none is stored. aliases: extra
+# spellings on results pages.
+LOTTERIES = [
+    # DLB lotteries (one shared results page)
+    {"name": "sasiri", "display_name": "SASIRI", "board": "DLB"},
+    {"name": "kapruka", "display_name": "KAPRUKA", "board": "DLB"},
+    {"name": "shanida", "display_name": "SHANIDA", "board": "DLB"},
+    {"name": "super_ball", "display_name": "SUPER BALL", "board": "DLB"},
+    {"name": "ada_kotipathi", "display_name": "ADA KOTIPATHI", "board": "DLB"},
+    {"name": "jaya_sampatha", "display_name": "JAYA SAMPATHA", "board": "DLB"},
+    {"name": "lagna_wasana", "display_name": "LAGNA WASANA", "board": "DLB"},
+    {"name": "supiri_dhana_sampatha", "display_name": "SUPIRI DHANA SAMPATHA", "board": "DLB"},
+
+    # NLB lotteries; those with a slug are fetched per draw
+    {"name": "mahajana_sampatha", "display_name": "MAHAJANA SAMPATHA", "board": "NLB",
+     "slug": "mahajana-sampatha", "anchor": (date(2026, 1, 1), 6061)},
+    {"name": "vasana_sampatha", "display_name": "VASANA SAMPATHA", "board": "NLB"},
+    {"name": "govisetha", "display_name": "GOVISETHA", "board": "NLB",
+     "slug": "govisetha", "anchor": (date(2026, 1, 1), 4303)},
+    {"name": "supiri_wasana", "display_name": "SUPIRI WASANA", "board": "NLB"},
+    {"name": "dhana_nidhanaya", "display_name": "DHANA NIDHANAYA", "board": "NLB",
+     "slug": "dhana-nidhanaya", "anchor": (date(2026, 1, 1), 2091)},
+    {"name": "saturday_super_ball", "display_name": "SATURDAY SUPER BALL", "board": "NLB"},
+    {"name": "sunday_mega_jackpot", "display_name": "SUNDAY MEGA JACKPOT", "board": "NLB"},
+    {"name": "shanida_pattare", "display_name": "SHANIDA PATTARE", "board": "NLB"},
+    {"name": "kotipathi_pattare", "display_name": "KOTIPATHI PATTARE", "board": "NLB"},
+    {"name": "suba_dawasak", "display_name": "SUBA DAWASAK", "board": "NLB",
+     "slug": "suba-dawasak", "anchor": (date(2026, 1, 1), 177)},
+    {"name": "nlb_jaya", "display_name": "NLB JAYA", "board": "NLB",
+     "slug": "nlb-jaya", "anchor": (date(2026, 1, 1), 329)},
+    {"name": "ada_sampatha", "display_name": "ADA SAMPATHA", "board": "NLB",
+     "slug": "ada-sampatha", "anchor": (date(2026, 1, 1), 636)},
+    {"name": "handahana", "display_name": "HANDAHANA", "board": "NLB",
+     "slug": "handahana", "anchor": (date(2026, 1, 1), 1370)},
+    {"name": "mega_power", "display_name": "MEGA POWER", "board": "NLB",
+     "slug": "mega-power", "anchor": (date(2026, 1, 1), 2409)},
+]
+
+BOARD_URLS = {"DLB": DLB_RESULTS_URL, "NLB": NLB_RESULTS_URL}
+
+
+def _alias_key(text: str) -> str:
+    """'Super  Ball', 'SUPER_BALL', 'super-ball' and 'SUPERBALL' all compare equal"""
+    return re.sub(r'[\s_\-]+', '', text).upper()
+
+
+class Lottery:
+    """Metadata for one lottery"""
+
+    __slots__ = ("id", "name", "display_name", "board", "url", "is_active", "slug",
+                 "draw_time", "weekdays", "anchor", "aliases")
+
+    def __init__(self, name: str, display_name: str, board: str, url: Optional[str] = None,
+                 is_active: int = 1, id: Optional[int] = None, slug: Optional[str] = None,
+                 draw_time: time = DRAW_TIME, weekdays=EVERY_DAY, anchor=None, aliases=()):
+        self.id = id                      # lottery_types.id; None until init_db has seeded it
+        self.name = name
+        self.display_name = display_name
+        self.board = board
+        self.url = url or BOARD_URLS.get(board)
+        self.is_active = is_active
+        self.slug = slug
+        self.draw_time = draw_time
+        self.weekdays = weekdays
+        self.anchor = anchor
+        self.aliases = tuple(aliases)
+
+    def spellings(self):
+        """Every way the lottery may be referred to: display name, name, slug and aliases"""
+        return (self.display_name, self.name, *([self.slug] if self.slug else []), *self.aliases)
+
+    def draw_for_date(self, day) -> int:
+        """Estimated draw number held on `day` (one draw per day from the anchor)"""
+        if not self.anchor:
+            raise ValueError(f"No anchor draw for {self.name}")
+        anchor_day, anchor_draw = self.anchor
+        if isinstance(day, datetime):
+            day = day.date()
+        return anchor_draw + (day - anchor_day).days
+
+
+class LotteryRegistry:
+    """Lotteries by name, slug and alias, loaded once and reloaded after lottery_types changes"""
+
+    def __init__(self, definitions: List[dict]):
+        self.definitions = definitions
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._by_name: Dict[str, Lottery] = {}
+        self._by_slug: Dict[str, Lottery] = {}
+        self._by_alias: Dict[str, Lottery] = {}
+        self._patterns: Dict[Optional[str], re.Pattern] = {}
+
+    def _load(self):
+        lotteries = {d["name"]: Lottery(**d) for d in self.definitions}
+        try:
+            db = SessionLocal()
+            try:
+                rows = db.query(LotteryType).all()
+            finally:
+                db.close()
+        except SQLAlchemyError as e:  # table not created yet: static definitions only
+            logger.warning(f"Lottery registry loaded without lottery_types: {e}")
+            rows = []
+
+        for row in rows:
+            lottery = lotteries.get(row.name)
+            if lottery is None:
+                lottery = lotteries[row.name] = Lottery(row.name, row.display_name or row.name.upper(), row.board)
+            lottery.id = row.id
+            lottery.display_name = row.display_name or lottery.display_name
+            lottery.board = row.board or lottery.board
+            lottery.url = row.url or lottery.url
+            lottery.is_active = row.is_active
+
+        self._by_name = lotteries
+        self._by_slug = {l.slug: l for l in lotteries.values() if l.slug}
+        self._by_alias = {_alias_key(alias): l for l in lotteries.values() for alias in l.spellings()}
+        self._patterns = {}
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+    def all(self, board: Optional[str] = None, active_only: bool = False) -> List[Lottery]:
+        self._ensure_loaded()
+        return [
+            l for l in self._by_name.values()
+            if (board is None or l.board == board) and (l.is_active or not active_only)
+        ]
+
+    def get(self, name: str) -> Optional[Lottery]:
+        self._ensure_loaded()
+        return self._by_name.get(name)
+
+    def by_slug(self, slug: str) -> Optional[Lottery]:
+        self._ensure_loaded()
+        return self._by_slug.get(slug)
+
+    def draw_page_lotteries(self) -> List[Lottery]:
+        """NLB lotteries fetched one draw page at a time"""
+        self._ensure_loaded()
+        return list(self._by_slug.values())
+
+    def resolve(self, text: str) -> Optional[Lottery]:
+        """The lottery a name, slug or results-page heading refers to"""
+        self._ensure_loaded()
+        return self._by_alias.get(_alias_key(text))
+
+    def canonical_name(self, text: str) -> str:
+        """Stored lottery_name for `text`, or a snake_case guess for lotteries not in the registry"""
+        lottery = self.resolve(text)
+        return lottery.name if lottery else re.sub(r'[\s\-]+', '_', text.strip()).lower()
+
+    def name_pattern(self, board: Optional[str] = None) -> re.Pattern:
+        """Case-insensitive regex matching any display name / alias of a board's lotteries"""
+        self._ensure_loaded()
+        pattern = self._patterns.get(board)
+        if pattern is None:
+            aliases = {
+                alias for l in self._by_name.values() if board is None or l.board == board
+                for alias in (l.display_name, *l.aliases)
+            }
+            # Longest first, so 'SATURDAY SUPER BALL' wins over 'SUPER BALL'
+            parts = [r'\s*'.join(map(re.escape, alias.split())) for alias in sorted(aliases, key=len, reverse=True)]
+            pattern = self._patterns[board] = re.compile('(' + '|'.join(parts) + ')', re.I)
+        return pattern
+
+
+registry = LotteryRegistry(LOTTERIES)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _note_lottery_type_changes(session, flush_context):
+    if any(isinstance(obj, LotteryType) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["lottery_types_changed"] = True
+        session.info["data_changed"] = True  # cached /api/lotteries responses go stale too
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _reload_after_commit(session):
+    if session.info.pop("lottery_types_changed", False):
+        registry.invalidate()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("lottery_types_changed", None)
@@ -0,0 +1,253 @@
+"""
+Prometheus metrics served by GET /metrics
+
+Plain counters and histograms rendered in the Prometheus text exposition
+format, so no client library is needed. What feeds them:
+
+- HTTP: MetricsMiddleware (api.py) times every request by route template
+- Scraper: fetch / parse / save stages per board (scrape_runs.scrape_stage)
+- Database: every SQL statement, via the engine events below
+- Scheduler: job lag and outcomes, via the APScheduler listener in scheduler.py
+
+Metrics live in process memory. main.py runs the API and the scheduler in one
+process, so /metrics covers both; a command-line backfill is not included.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Sequence, Tuple
+import threading
+import time
+
+from sqlalchemy import event
+
+from database import engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+STAGE_BUCKETS = (.01, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120)
+LAG_BUCKETS = (.1, .5, 1, 5, 15, 30, 60, 120, 300, 600)
+
+_metrics: List["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    text = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + text + "}" if text else ""
+
+
+class Metric:
+    """A named metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        _metrics.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(zip(self.labelnames, key))} {_number(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)   # bucket upper bounds are inclusive
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', _number(float(bound)))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """Every metric in the Prometheus text format"""
+    return "".join(metric.render() for metric in _metrics)
+
+
+# HTTP
+
+HTTP_REQUESTS = Counter("lottery_http_requests_total", "API requests by route template and status",
+                        ("method", "route", "status"))
+HTTP_LATENCY = Histogram("lottery_http_request_duration_seconds",
+                         "Time from request to response headers (streamed bodies continue after)",
+                         ("method", "route"), REQUEST_BUCKETS)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        recorded = False
+
+        def record(status):
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            # Routing stores the matched route in the scope; templates keep the label set small
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=scope["method"], route=route)
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            record(500)
+            raise
+
+
+# Database
+
+DB_QUERY_SECONDS = Histogram("lottery_db_query_duration_seconds", "SQL statement execution time by statement type",
+                             ("operation",), QUERY_BUCKETS)
+DB_QUERY_ERRORS = Counter("lottery_db_query_errors_total", "SQL statements that raised, by statement type",
+                          ("operation",))
+
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA", "CREATE", "ALTER", "DROP"}
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement and statement.strip() else ""
+    return word if word in OPERATIONS else "OTHER"
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    DB_QUERY_SECONDS.observe(time.perf_counter() - started, operation=_operation(statement))
+
+
+@event.listens_for(engine, "handle_error")
+def _query_failed(context):
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+    DB_QUERY_ERRORS.inc(operation=_operation(context.statement))
+
+
+# Scraper
+
+SCRAPE_STAGE_SECONDS = Histogram("lottery_scrape_stage_duration_seconds",
+                                 "Scraper stage time per board (fetch, parse, save; fetch_draw, parse_draw for NLB draw pages)",
+                                 ("board", "stage"), STAGE_BUCKETS)
+SCRAPE_STAGE_ERRORS = Counter("lottery_scrape_stage_errors_total", "Scraper stages that raised",
+                              ("board", "stage"))
+SCRAPE_RESULTS = Counter("lottery_scrape_results_total",
+                         "Results parsed, inserted and skipped as duplicates; draw pages without a result",
+                         ("board", "outcome"))
+SCRAPE_UNCHANGED = Counter("lottery_scrape_pages_unchanged_total",
+                           "Results pages skipped because they had not changed since the last fetch",
+                           ("board",))
+SCRAPE_BYTES = Counter("lottery_scrape_downloaded_bytes_total", "Response body bytes downloaded", ("board",))
+ARCHIVE_PAGES = Counter("lottery_page_archive_pages_total",
+                        "Fetched pages handed to the archive: stored, duplicate (body already archived), dropped (queue full), error",
+                        ("outcome",))
+ARCHIVE_BYTES = Counter("lottery_page_archive_stored_bytes_total", "Compressed bytes written to the page archive")
+
+
+# Scheduler
+
+SCHEDULER_JOB_LAG = Histogram("lottery_scheduler_job_lag_seconds", "Delay between a job's scheduled time and its start",
+                              ("job",), LAG_BUCKETS)
+SCHEDULER_JOB_SECONDS = Histogram("lottery_scheduler_job_duration_seconds", "Scheduled job run time",
+                                  ("job",), STAGE_BUCKETS)
+SCHEDULER_JOB_RUNS = Counter("lottery_scheduler_job_runs_total", "Scheduled job runs by outcome (success, error, missed)",
+                             ("job", "outcome"))
+SCHEDULER_LAST_RUN = Gauge("lottery_scheduler_job_last_run_timestamp_seconds", "Unix time a job last finished",
+                           ("job",))
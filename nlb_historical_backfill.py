@@ -3,84 +3,33 @@ NLB Historical Backfill Script
 Scrape NLB lottery results from January 1st to today using individual draw URLs
 """
 
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+import argparse
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
 from scraper import NLBScraper
-from database import SessionLocal, LotteryResult
-
-# NLB lottery configurations with their Jan 1, 2026 draw numbers
-NLB_LOTTERIES = {
-    'suba-dawasak': {
-        'jan1_draw': 177,
-        'display_name': 'SUBA DAWASAK',
-        'draws_per_day': 1  # Approximate draws per day
-    },
-    'nlb-jaya': {
-        'jan1_draw': 329,
-        'display_name': 'NLB JAYA',
-        'draws_per_day': 1
-    },
-    'ada-sampatha': {
-        'jan1_draw': 636,
-        'display_name': 'ADA SAMPATHA',
-        'draws_per_day': 1
-    },
-    'handahana': {
-        'jan1_draw': 1370,
-        'display_name': 'HANDAHANA',
-        'draws_per_day': 1
-    },
-    'dhana-nidhanaya': {
-        'jan1_draw': 2091,
-        'display_name': 'DHANA NIDHANAYA',
-        'draws_per_day': 1
-    },
-    'mega-power': {
-        'jan1_draw': 2409,
-        'display_name': 'MEGA POWER',
-        'draws_per_day': 1
-    },
-    'govisetha': {
-        'jan1_draw': 4303,
-        'display_name': 'GOVISETHA',
-        'draws_per_day': 1
-    },
-    'mahajana-sampatha': {
-        'jan1_draw': 6061,
-        'display_name': 'MAHAJANA SAMPATHA',
-        'draws_per_day': 1
-    },
-}
-
-
-def calculate_draws_to_scrape():
-    """Calculate how many draws to scrape based on days since Jan 1"""
-    jan1 = datetime(2026, 1, 1)
-    today = datetime.now()
-    days_since_jan1 = (today - jan1).days
-    
-    # Add 1 to include today (Jan 4 = 4 days = draws 0,1,2,3)
-    return days_since_jan1 + 1
+from database import SessionLocal, LotteryResult, bulk_save_results
+from draw_discovery import DrawFinder
+from lottery_registry import registry
 
 
-def scrape_historical_nlb(debug=False, delay_seconds=4):
+def scrape_historical_nlb(plan: Dict[str, List[int]], debug=False, delay_seconds=4):
     """
-    Scrape NLB lottery results from January 1st to today
+    Scrape the draws in `plan` one at a time
     
     Args:
+        plan: {lottery_slug: [draw numbers]} as built by `build_plan`
         debug: Enable debug mode
         delay_seconds: Delay between requests to avoid rate limiting
     """
     print("=" * 70)
-    print("NLB HISTORICAL BACKFILL - January 1st to Today")
+    print("NLB HISTORICAL BACKFILL - one draw at a time")
     print("=" * 70)
     print(f"Start time: {datetime.now()}")
     
-    # Calculate draws to scrape
-    draws_to_scrape = calculate_draws_to_scrape()
-    print(f"\nDays since Jan 1: {draws_to_scrape}")
-    print(f"Will scrape {draws_to_scrape} draw(s) for each lottery\n")
-    
     scraper = NLBScraper(debug=debug)
     db = SessionLocal()
     
@@ -89,24 +38,25 @@ def scrape_historical_nlb(debug=False, delay_seconds=4):
     total_failed = 0
     
     try:
-        for lottery_slug, lottery_info in NLB_LOTTERIES.items():
+        for lottery_slug, draws in plan.items():
+            lottery = registry.by_slug(lottery_slug)
             print(f"\n{'='*70}")
-            print(f"Lottery: {lottery_info['display_name']} ({lottery_slug})")
-            print(f"Starting from draw #{lottery_info['jan1_draw']}")
+            print(f"Lottery: {lottery.display_name} ({lottery_slug})")
+            print(f"Draws #{draws[0]} to #{draws[-1]}" if draws else "No draws in range")
             print(f"{'='*70}")
             
-            start_draw = lottery_info['jan1_draw']
+            lottery_name = lottery.name
             
-            for offset in range(draws_to_scrape):
-                current_draw = start_draw + offset
-                
-                # Check if already in database
-                existing = db.query(LotteryResult).filter(
-                    LotteryResult.lottery_name == lottery_slug.replace('-', '_'),
-                    LotteryResult.draw_number == str(current_draw)
-                ).first()
-                
-                if existing:
+            # Check which draws are already in the database with a single query
+            existing = {
+                row.draw_number for row in db.query(LotteryResult.draw_number).filter(
+                    LotteryResult.lottery_name == lottery_name
+                )
+            }
+            scraped = []
+            
+            for index, current_draw in enumerate(draws):
+                if str(current_draw) in existing:
                     print(f"  Draw #{current_draw}: ⏭️  Already in database, skipping")
                     continue
                 
@@ -114,25 +64,8 @@ def scrape_historical_nlb(debug=False, delay_seconds=4):
                 result = scraper.scrape_individual_draw(lottery_slug, current_draw)
                 
                 if result:
-                    # Save to database
-                    try:
-                        lottery_result = LotteryResult(
-                            lottery_name=result['lottery_name'],
-                            draw_number=result['draw_number'],
-                            draw_date=result['draw_date'],
-                            winning_numbers=result['winning_numbers'],
-                            prize_amount=result.get('prize_amount'),
-                            additional_data=result.get('additional_data', {})
-                        )
-                        db.add(lottery_result)
-                        db.commit()
-                        
-                        print(f"  Draw #{current_draw}: ✅ Scraped and saved - Numbers: {result['winning_numbers']}")
-                        total_saved += 1
-                    except Exception as e:
-                        print(f"  Draw #{current_draw}: ❌ Failed to save - {e}")
-                        db.rollback()
-                        total_failed += 1
+                    scraped.append(result)
+                    print(f"  Draw #{current_draw}: ✅ Scraped - Numbers: {result['winning_numbers']}")
                 else:
                     print(f"  Draw #{current_draw}: ❌ Scraping failed")
                     total_failed += 1
@@ -140,12 +73,23 @@ def scrape_historical_nlb(debug=False, delay_seconds=4):
                 total_scraped += 1
                 
                 # Delay to avoid rate limiting
-                if offset < draws_to_scrape - 1:  # Don't delay after last draw
+                if index < len(draws) - 1:  # Don't delay after last draw
                     time.sleep(delay_seconds)
             
-            print(f"\nCompleted {lottery_info['display_name']}")
-            print(f"  Total attempts: {draws_to_scrape}")
-            print(f"  Successful: {sum(1 for i in range(draws_to_scrape) if db.query(LotteryResult).filter(LotteryResult.lottery_name == lottery_slug.replace('-', '_'), LotteryResult.draw_number == str(start_draw + i)).first())}")
+            # Save the whole lottery in one bulk insert
+            try:
+                counts = bulk_save_results(scraped, db, board='NLB')
+                db.commit()
+                total_saved += counts['inserted']
+            except Exception as e:
+                print(f"  ❌ Failed to save {len(scraped)} draw(s) - {e}")
+                db.rollback()
+                total_failed += len(scraped)
+                counts = {'inserted': 0}
+            
+            print(f"\nCompleted {lottery.display_name}")
+            print(f"  Total attempts: {len(draws)}")
+            print(f"  Successful: {len(existing & {str(n) for n in draws}) + counts['inserted']}")
     
     finally:
         db.close()
@@ -160,23 +104,236 @@ def scrape_historical_nlb(debug=False, delay_seconds=4):
     print("=" * 70)
 
 
+class TokenBucket:
+    """
+    Async token bucket rate limiter
+
+    Tokens refill continuously at `rate` per second up to `capacity`, so short
+    bursts go out immediately while the long-run request rate stays bounded.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncBackfill:
+    """
+    Concurrent NLB backfill engine
+
+    Draw pages are fetched in worker threads through the regular
+    `NLBScraper.scrape_individual_draw`, so parsing and the saved rows are
+    identical to the sequential backfill. In-flight requests are capped per
+    host and paced by a shared token bucket instead of a fixed sleep, and
+    results are saved in bulk batches of `batch_size`.
+    """
+
+    def __init__(self, concurrency: int = 8, per_host: int = 4, rate: float = 2.0,
+                 burst: Optional[float] = None, batch_size: int = 100, debug: bool = False):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.per_host = per_host
+        self.bucket = TokenBucket(rate, burst)
+        self.scraper = NLBScraper(debug=debug, pool_size=concurrency)
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {'scraped': 0, 'saved': 0, 'failed': 0, 'skipped': 0}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def _fetch_draw(self, lottery_slug: str, draw_number: int) -> Optional[Dict]:
+        url = f"{self.scraper.base_url}/results/{lottery_slug}/{draw_number}"
+        async with self._host_limit(url):
+            await self.bucket.acquire()
+            return await asyncio.to_thread(self.scraper.scrape_individual_draw, lottery_slug, draw_number)
+
+    def _flush(self, db, pending: List[Dict]):
+        """Bulk-insert buffered results and update counters"""
+        if not pending:
+            return
+        try:
+            counts = bulk_save_results(pending, db, board='NLB')
+            db.commit()
+            self.stats['saved'] += counts['inserted']
+            self.stats['skipped'] += counts['duplicates']
+        except Exception as e:
+            print(f"  ❌ Failed to save {len(pending)} draw(s) - {e}")
+            db.rollback()
+            self.stats['failed'] += len(pending)
+        pending.clear()
+
+    async def run(self, plan: Dict[str, List[int]]):
+        """Fetch and save every draw in `plan` ({lottery_slug: [draw numbers]})"""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
+
+        db = SessionLocal()
+        try:
+            jobs = []
+            for lottery_slug, draws in plan.items():
+                existing = {
+                    row.draw_number for row in db.query(LotteryResult.draw_number).filter(
+                        LotteryResult.lottery_name == registry.by_slug(lottery_slug).name
+                    )
+                }
+                for draw_number in draws:
+                    if str(draw_number) in existing:
+                        self.stats['skipped'] += 1
+                        continue
+                    jobs.append((lottery_slug, draw_number))
+
+            print(f"Fetching {len(jobs)} draw(s), {self.stats['skipped']} already in database")
+
+            async def fetch(lottery_slug, draw_number):
+                return lottery_slug, draw_number, await self._fetch_draw(lottery_slug, draw_number)
+
+            pending = []
+            for task in asyncio.as_completed([fetch(*job) for job in jobs]):
+                lottery_slug, draw_number, result = await task
+                self.stats['scraped'] += 1
+                if not result:
+                    print(f"  {lottery_slug} #{draw_number}: ❌ Scraping failed")
+                    self.stats['failed'] += 1
+                    continue
+                print(f"  {lottery_slug} #{draw_number}: ✅ Scraped - Numbers: {result['winning_numbers']}")
+                pending.append(result)
+                if len(pending) >= self.batch_size:
+                    self._flush(db, pending)
+            self._flush(db, pending)
+        finally:
+            db.close()
+
+        return self.stats
+
+
+def build_plan(lotteries: List[str], start_draw: Optional[int] = None, end_draw: Optional[int] = None,
+               from_date: Optional[datetime] = None, to_date: Optional[datetime] = None,
+               debug: bool = False) -> Dict[str, List[int]]:
+    """
+    Work out which draw numbers to fetch for each lottery
+
+    Explicit draw numbers win over dates. Dates are mapped to draw numbers, and
+    the end defaults to the newest published draw, by probing draw pages
+    (draw_discovery.DrawFinder). Without either, the range is Jan 1 of this
+    year to the latest draw. When no probed page has a date, the dates are
+    mapped from the registry anchor instead, with a warning. The draws probed
+    along the way are saved here, so the backfill skips them.
+    """
+    scraper = NLBScraper(debug=debug)
+    from_day = (from_date or datetime(date.today().year, 1, 1)).date()
+    plan = {}
+    for lottery_slug in lotteries:
+        finder = DrawFinder(lottery_slug, scraper)
+        try:
+            first = start_draw if start_draw is not None else finder.first_on_or_after(from_day)
+            if end_draw is not None:
+                last = end_draw
+            elif to_date is not None:
+                last = finder.first_on_or_after(to_date.date() + timedelta(days=1)) - 1
+            else:
+                last = finder.latest() or 0
+        except ValueError as e:
+            # No probed page had a date: fall back to counting days from the registry anchor
+            lottery = finder.lottery
+            if not lottery.anchor:
+                raise
+            print(f"  ⚠️  {lottery_slug}: {e}; estimating draw numbers from the registry anchor (one draw a day)")
+            first = start_draw if start_draw is not None else lottery.draw_for_date(from_day)
+            last = end_draw if end_draw is not None else lottery.draw_for_date(to_date or datetime.now())
+        plan[lottery_slug] = list(range(first, last + 1))
+        saved = finder.save()['inserted']
+        print(f"  {lottery_slug}: draws #{first} to #{last} ({len(plan[lottery_slug])} draws), "
+              f"{finder.probes} probe(s), {saved} saved while planning")
+    return plan
+
+
+def scrape_historical_nlb_async(plan: Dict[str, List[int]], concurrency=8, per_host=4, rate=2.0,
+                                burst=None, batch_size=100, debug=False):
+    """Run the concurrent backfill for a plan built by `build_plan`"""
+    print("=" * 70)
+    print("NLB HISTORICAL BACKFILL - concurrent mode")
+    print("=" * 70)
+    print(f"Start time: {datetime.now()}")
+    print(f"Concurrency: {concurrency} (max {per_host} per host), rate: {rate} req/s\n")
+
+    engine = AsyncBackfill(concurrency=concurrency, per_host=per_host, rate=rate, burst=burst,
+                           batch_size=batch_size, debug=debug)
+    stats = asyncio.run(engine.run(plan))
+
+    print("\n" + "=" * 70)
+    print("BACKFILL SUMMARY")
+    print("=" * 70)
+    print(f"Total draws attempted: {stats['scraped']}")
+    print(f"Already in database: {stats['skipped']}")
+    print(f"Successfully saved: {stats['saved']}")
+    print(f"Failed: {stats['failed']}")
+    print(f"End time: {datetime.now()}")
+    print("=" * 70)
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill NLB lottery results from individual draw pages")
+    parser.add_argument('--lotteries', default=','.join(l.slug for l in registry.draw_page_lotteries()),
+                        help="Comma-separated lottery slugs (default: all)")
+    parser.add_argument('--start-draw', type=int, help="First draw number to fetch")
+    parser.add_argument('--end-draw', type=int, help="Last draw number to fetch")
+    parser.add_argument('--from-date', type=lambda s: datetime.strptime(s, '%Y-%m-%d'),
+                        help="First draw date (YYYY-MM-DD, default Jan 1 this year)")
+    parser.add_argument('--to-date', type=lambda s: datetime.strptime(s, '%Y-%m-%d'),
+                        help="Last draw date (YYYY-MM-DD, default: the latest draw)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Worker threads for draw fetches")
+    parser.add_argument('--per-host', type=int, default=4, help="Max in-flight requests per host")
+    parser.add_argument('--rate', type=float, default=2.0, help="Requests per second (token bucket)")
+    parser.add_argument('--burst', type=float, help="Token bucket capacity (default: rate)")
+    parser.add_argument('--batch-size', type=int, default=100, help="Results per bulk insert")
+    parser.add_argument('--sequential', action='store_true',
+                        help="Use the original one-draw-at-a-time backfill")
+    parser.add_argument('--delay', type=int, default=4, help="Delay between requests in sequential mode")
+    parser.add_argument('--debug', action='store_true', help="Verbose parsing (fetched pages are in the page archive)")
+    args = parser.parse_args(argv)
+
+    args.lotteries = [slug.strip() for slug in args.lotteries.split(',') if slug.strip()]
+    unknown = [slug for slug in args.lotteries if registry.by_slug(slug) is None]
+    if unknown:
+        parser.error(f"Unknown lottery slug(s): {', '.join(unknown)}")
+    return args
+
+
 if __name__ == "__main__":
-    import sys
-    
-    debug_mode = '--debug' in sys.argv
+    args = parse_args()
     
     print("🎯 Sri Lankan NLB Historical Lottery Scraper")
-    print("📅 Target: January 1, 2026 to Today")
     print()
     
-    if debug_mode:
-        print("🔍 DEBUG MODE ENABLED - HTML files will be saved")
+    if args.debug:
+        print("🔍 DEBUG MODE ENABLED - fetched pages can be read back with page_archive.py")
         print()
     
-    # Ask for confirmation
-    response = input("This will scrape all NLB lottery draws from Jan 1 to today. Continue? (y/n): ")
-    if response.lower() != 'y':
-        print("Cancelled.")
-        exit(0)
-    
-    scrape_historical_nlb(debug=debug_mode, delay_seconds=4)
+    print("Planning draw ranges...")
+    plan = build_plan(args.lotteries, args.start_draw, args.end_draw, args.from_date, args.to_date,
+                      debug=args.debug)
+    if args.sequential:
+        scrape_historical_nlb(plan, debug=args.debug, delay_seconds=args.delay)
+    else:
+        scrape_historical_nlb_async(plan, concurrency=args.concurrency, per_host=args.per_host,
+                                    rate=args.rate, burst=args.burst, batch_size=args.batch_size,
+                                    debug=args.debug)
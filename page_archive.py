@@ -0,0 +1,232 @@
+"""
+Content-addressed archive of fetched pages
+
+Every response body the scrapers fetch is handed to archive(), which only
+hashes it and queues it; a background thread compresses the body (zstd when
+the zstandard package is installed, gzip otherwise) into
+PAGE_ARCHIVE_DIR/<hash[:2]>/<sha256>.html.{zst,gz} and indexes it in the
+page_archive table by (source, lottery, draw_number, fetched_at, hash).
+
+A body is stored once however often it is fetched: the blob is skipped when
+it already exists, and the index keeps one row per distinct body per URL. A
+full queue drops the page rather than slow a scrape down. Pending pages are
+written out at interpreter exit.
+
+Usage:
+    python page_archive.py list --source NLB --lottery govisetha
+    python page_archive.py show <hash or prefix> > page.html
+"""
+
+from datetime import datetime
+from typing import Iterator, Optional
+import argparse
+import atexit
+import gzip
+import hashlib
+import logging
+import os
+import queue
+import sys
+import threading
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import ArchivedPage, SessionLocal, engine, insert_ignore
+from metrics import ARCHIVE_BYTES, ARCHIVE_PAGES
+
+try:
+    import zstandard
+except ImportError:  # gzip only
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ENABLED = os.getenv("PAGE_ARCHIVE", "1").lower() not in ("0", "false", "no")
+ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR", "archive/pages")
+ARCHIVE_CODEC = os.getenv("PAGE_ARCHIVE_CODEC", "zstd" if zstandard else "gzip")
+ARCHIVE_QUEUE_SIZE = int(os.getenv("PAGE_ARCHIVE_QUEUE_SIZE", 256))
+INDEX_BATCH_SIZE = 100
+EXIT_FLUSH_SECONDS = 10
+
+EXTENSIONS = {"zstd": ".html.zst", "gzip": ".html.gz"}
+
+
+def _compress(content: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(content)
+    return gzip.compress(content, compresslevel=6, mtime=0)
+
+
+def _decompress(data: bytes, path: str) -> bytes:
+    if path.endswith(EXTENSIONS["zstd"]):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=64 * 1024 * 1024)
+    return gzip.decompress(data)
+
+
+class PageArchive:
+    """Queue of fetched pages and the thread that writes them out"""
+
+    def __init__(self, directory: str = ARCHIVE_DIR, codec: str = ARCHIVE_CODEC,
+                 enabled: bool = ARCHIVE_ENABLED, queue_size: int = ARCHIVE_QUEUE_SIZE):
+        if codec == "zstd" and zstandard is None:
+            logger.warning("PAGE_ARCHIVE_CODEC=zstd but zstandard is not installed, using gzip")
+            codec = "gzip"
+        self.directory = directory
+        self.codec = codec
+        self.enabled = enabled
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _blob_path(self, content_hash: str, codec: Optional[str] = None) -> str:
+        return os.path.join(self.directory, content_hash[:2], content_hash + EXTENSIONS[codec or self.codec])
+
+    def find_blob(self, content_hash: str) -> Optional[str]:
+        """Path of the stored body, whichever codec wrote it"""
+        for codec in EXTENSIONS:
+            path = self._blob_path(content_hash, codec)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def archive(self, content: bytes, url: str, source: str, lottery: Optional[str] = None,
+                draw_number: Optional[int] = None, status_code: Optional[int] = None) -> Optional[str]:
+        """Queue a fetched body for archiving; returns its SHA-256 (None if not archived)"""
+        if not self.enabled or not content:
+            return None
+        content_hash = hashlib.sha256(content).hexdigest()
+        self._ensure_started()
+        try:
+            self._queue.put_nowait({
+                "source": source, "lottery": lottery, "draw_number": draw_number, "url": url,
+                "status_code": status_code, "fetched_at": datetime.now(),
+                "content_hash": content_hash, "size": len(content), "content": content,
+            })
+        except queue.Full:
+            ARCHIVE_PAGES.inc(outcome="dropped")
+            return None
+        return content_hash
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="page-archive", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < INDEX_BATCH_SIZE:   # index whatever else is already waiting in one insert
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:  # the writer must survive a full disk or a locked database
+                ARCHIVE_PAGES.inc(len(batch), outcome="error")
+                logger.error(f"Page archive write failed for {len(batch)} pages: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, pages):
+        for page in pages:
+            content = page.pop("content")
+            if self.find_blob(page["content_hash"]):
+                ARCHIVE_PAGES.inc(outcome="duplicate")
+                continue
+            path = self._blob_path(page["content_hash"])
+            data = _compress(content, self.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)   # readers never see a partial blob
+            ARCHIVE_PAGES.inc(outcome="stored")
+            ARCHIVE_BYTES.inc(len(data))
+        with engine.begin() as conn:
+            conn.execute(insert_ignore(ArchivedPage.__table__), pages)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued page is written; False on timeout"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._queue.join(), done.set()), daemon=True).start()
+        return done.wait(timeout)
+
+    def read(self, content_hash: str) -> bytes:
+        """Raw body of an archived page"""
+        path = self.find_blob(content_hash)
+        if path is None:
+            raise FileNotFoundError(f"No archived page {content_hash}")
+        with open(path, "rb") as f:
+            return _decompress(f.read(), path)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "codec": self.codec, "directory": self.directory,
+                "queued": self._queue.qsize()}
+
+
+page_archive = PageArchive()
+
+
+@atexit.register
+def _flush_at_exit():
+    if not page_archive.flush(EXIT_FLUSH_SECONDS):
+        logger.warning(f"Page archive: {page_archive._queue.qsize()} pages not written before exit")
+
+
+def archived_pages(db, source: Optional[str] = None, lottery: Optional[str] = None,
+                   status_code: Optional[int] = 200) -> Iterator[ArchivedPage]:
+    """Index rows, oldest first, optionally filtered by board, draw page slug and HTTP status"""
+    query = db.query(ArchivedPage)
+    if source:
+        query = query.filter(ArchivedPage.source == source.upper())
+    if lottery:
+        query = query.filter(ArchivedPage.lottery == lottery)
+    if status_code is not None:
+        query = query.filter(ArchivedPage.status_code == status_code)
+    return query.order_by(ArchivedPage.fetched_at, ArchivedPage.id).yield_per(1000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the archive of fetched pages")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("list", help="List archived pages")
+    listing.add_argument("--source", help="DLB or NLB")
+    listing.add_argument("--lottery", help="NLB draw page slug, e.g. govisetha")
+    show = commands.add_parser("show", help="Write an archived page's raw HTML to stdout")
+    show.add_argument("hash", help="SHA-256 of the page, or a unique prefix of it")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "list":
+            for page in archived_pages(db, args.source, args.lottery, status_code=None):
+                draw = f"#{page.draw_number}" if page.draw_number is not None else ""
+                print(f"{page.content_hash[:16]}  {page.fetched_at:%Y-%m-%d %H:%M:%S}  {page.source} "
+                      f"{page.lottery or 'results'}{draw}  {page.status_code}  {page.size} bytes  {page.url}")
+            return 0
+
+        matches = {h for (h,) in db.query(ArchivedPage.content_hash).filter(
+            ArchivedPage.content_hash.startswith(args.hash.lower())
+        ).limit(2)}
+        if len(matches) != 1:
+            print(f"{'No' if not matches else 'More than one'} archived page matches {args.hash}", file=sys.stderr)
+            return 1
+        sys.stdout.buffer.write(page_archive.read(matches.pop()))
+        return 0
+    except SQLAlchemyError as e:
+        print(f"Could not read the page archive index: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Parse engines for lottery result pages
+
+'full' builds a BeautifulSoup tree of the whole page. 'fast' parses the page
+with lxml, keeps only the outermost blocks the scrapers actually read and
+builds a small BeautifulSoup tree from those, so the existing extraction code
+runs unchanged on a fraction of the document. The full soup is used as a
+fallback whenever lxml is unavailable or the fast path cannot find the blocks.
+"""
+
+from typing import Callable, Optional
+import logging
+import os
+import re
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+try:
+    import lxml.html
+except ImportError:  # fast path disabled, everything uses the full soup
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('fast', 'full')
+DEFAULT_ENGINE = os.getenv('PARSE_ENGINE', 'fast')
+
+# libxml2 stops at the first </html>; the DLB page carries markup after it
+_DOCUMENT_END = re.compile(r'</(?:html|body)\s*>', re.I)
+
+
+def _decode(content) -> str:
+    if isinstance(content, str):
+        return content
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return UnicodeDammit(content).unicode_markup
+
+
+def extract_fragments(content, tag: str, match: Callable) -> Optional[str]:
+    """
+    Return the HTML of every outermost `tag` element for which `match(element)` is true
+
+    Nested matches are kept inside their ancestor's fragment, so searching the
+    resulting soup finds the same elements in the same order as the full page.
+    Returns None if lxml is unavailable or cannot parse the page.
+    """
+    if lxml is None:
+        return None
+    try:
+        doc = lxml.html.fromstring(_DOCUMENT_END.sub('', _decode(content)))
+    except (ValueError, lxml.etree.ParserError) as e:
+        logger.debug(f"lxml could not parse page, using full soup: {e}")
+        return None
+
+    fragments = []
+    selected = set()
+    for element in doc.iter(tag):
+        if not element.get('class') or not match(element):
+            continue
+        if any(ancestor in selected for ancestor in element.iterancestors(tag)):
+            continue
+        selected.add(element)
+        fragments.append(lxml.html.tostring(element, encoding='unicode', with_tail=False))
+    return ''.join(fragments)
+
+
+def build_soup(content, builder: str = 'html.parser', engine: str = DEFAULT_ENGINE,
+               tag: Optional[str] = None, match: Optional[Callable] = None,
+               marker: Optional[bytes] = None) -> BeautifulSoup:
+    """
+    Build the soup a parser should search
+
+    Args:
+        content: Raw page bytes
+        builder: BeautifulSoup tree builder for the resulting soup
+        engine: 'fast' or 'full'
+        tag, match: Blocks to keep on the fast path (see extract_fragments)
+        marker: Bytes that must be absent from the page for an empty fast
+            result to be trusted; if present the full soup is built instead
+    """
+    if engine == 'fast' and tag and match:
+        fragments = extract_fragments(content, tag, match)
+        if fragments:
+            return BeautifulSoup(fragments, builder)
+        if isinstance(content, str) and marker is not None:
+            marker = marker.decode('utf-8')
+        if fragments == '' and marker is not None and marker not in content:
+            # Page genuinely has none of the blocks (challenge page, draw not held yet)
+            return BeautifulSoup('', builder)
+    return BeautifulSoup(content, builder)
@@ -0,0 +1,45 @@
+"""
+Rebuild derived tables from lottery_results
+
+The save path keeps these up to date on every insert; rebuild them after
+editing lottery_results by hand or restoring an old database.
+
+Usage:
+    python rebuild_tables.py              # everything
+    python rebuild_tables.py --ball-index
+    python rebuild_tables.py --stats      # after lottery_stats drifted from lottery_results
+"""
+
+import argparse
+import sys
+import time
+
+from database import engine, init_db, rebuild_ball_index, rebuild_lottery_stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild tables derived from lottery_results")
+    parser.add_argument('--ball-index', action='store_true', help="Rebuild the ball_index search table")
+    parser.add_argument('--stats', action='store_true', help="Rebuild the lottery_stats totals behind /api/stats")
+    args = parser.parse_args(argv)
+    rebuild_all = not (args.ball_index or args.stats)
+
+    init_db()
+
+    if args.ball_index or rebuild_all:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            rows = rebuild_ball_index(conn)
+        print(f"✓ ball_index: {rows} rows in {time.perf_counter() - started:.2f}s")
+    
+    if args.stats or rebuild_all:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            rows = rebuild_lottery_stats(conn)
+        print(f"✓ lottery_stats: {rows} lotteries in {time.perf_counter() - started:.2f}s")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
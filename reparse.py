@@ -0,0 +1,219 @@
+"""
+Re-parse stored pages and correct lottery_results
+
+Parses saved pages with the current parsers, across all cores, and diffs the
+results against lottery_results. Use it after a parser fix
+(_parse_result_section, NLB ball-type classification, ...) instead of
+re-scraping the sites. Pages come from:
+
+- corpus: nlb/<slug>/nlb_<slug>_<draw>_*.html draw pages and the
+  dlb/misc, nlb/misc results pages
+- archive: the page archive (page_archive.py), every 200 response
+
+When several pages give the same draw, draw pages win over results pages and
+newer pages over older ones. With --apply, changed rows are corrected with one
+bulk UPDATE (ball_index and lottery_stats follow) and draws missing from the
+database are inserted; without it the diff is only reported. No network access.
+
+Usage:
+    python reparse.py                                # report what would change
+    python reparse.py --apply
+    python reparse.py --source archive --lottery govisetha --workers 4 --verbose
+"""
+
+from collections import Counter
+from datetime import time as time_of_day
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import argparse
+import glob
+import logging
+import os
+import re
+import sys
+import time
+
+from sqlalchemy import tuple_
+
+from database import BULK_CHUNK_SIZE, LotteryResult, SessionLocal, bulk_save_results, init_db, update_results
+from page_archive import archived_pages, page_archive
+from parse_engine import DEFAULT_ENGINE
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DRAW_PAGE = re.compile(r'nlb_(.+)_(\d+)_\w+\.html$')
+
+# Fields a re-parse may correct; the rest (board, additional_data, scraped_at) are left alone
+COMPARED_FIELDS = ('draw_date', 'winning_numbers', 'prize_amount')
+
+# (kind, board, slug, draw number, location, reference, order)
+#   kind: 'draw' or 'results'; location: 'file' (reference = path) or 'archive' (reference = SHA-256)
+PageTask = Tuple[str, str, str, int, str, str, float]
+
+
+def corpus_tasks(root: str = ROOT, lottery: Optional[str] = None) -> List[PageTask]:
+    tasks = []
+    for path in glob.glob(os.path.join(root, 'nlb', '*', 'nlb_*_*.html')):
+        match = DRAW_PAGE.match(os.path.basename(path))
+        if match and (lottery is None or match.group(1) == lottery):
+            tasks.append(('draw', 'NLB', match.group(1), int(match.group(2)), 'file', path, os.path.getmtime(path)))
+    if lottery is None:
+        for board in ('DLB', 'NLB'):
+            for path in glob.glob(os.path.join(root, board.lower(), 'misc', '*.html')):
+                tasks.append(('results', board, None, None, 'file', path, os.path.getmtime(path)))
+    return tasks
+
+
+def archive_tasks(db, lottery: Optional[str] = None) -> List[PageTask]:
+    return [
+        ('draw' if page.lottery else 'results', page.source, page.lottery, page.draw_number,
+         'archive', page.content_hash, page.fetched_at.timestamp())
+        for page in archived_pages(db, lottery=lottery)
+    ]
+
+
+# Worker side: one scraper pair per process, built by the pool initializer
+
+_scrapers = {}
+
+
+def _init_worker(engine: str):
+    from scraper import DLBScraper, NLBScraper
+    logging.disable(logging.WARNING)   # parsers log every page
+    _scrapers['DLB'] = DLBScraper(engine=engine)
+    _scrapers['NLB'] = NLBScraper(engine=engine, pool_size=1)
+
+
+def _parse_page(task: PageTask):
+    """(results, error) for one page"""
+    kind, board, slug, draw_number, location, reference, _ = task
+    try:
+        if location == 'file':
+            with open(reference, 'rb') as f:
+                content = f.read()
+        else:
+            content = page_archive.read(reference)
+        if kind == 'draw':
+            result = _scrapers['NLB'].parse_draw_page(content, slug, draw_number)
+            results = [result] if result else []
+        else:
+            results = _scrapers[board].parse_results_page(content)
+        for result in results:
+            result.setdefault('board', board)
+        return results, None
+    except Exception as e:
+        return [], f"{reference}: {type(e).__name__}: {e}"
+
+
+def parse_pages(tasks: List[PageTask], workers: int, engine: str = DEFAULT_ENGINE):
+    """Parse every page in a process pool; returns ({(lottery_name, draw_number): result}, errors)"""
+    # Results pages first, then draw pages, oldest first: later pages override earlier ones
+    tasks = sorted(tasks, key=lambda task: (task[0] == 'draw', task[6]))
+    parsed, errors = {}, []
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine,)) as pool:
+        for results, error in pool.map(_parse_page, tasks, chunksize=chunksize):
+            if error:
+                errors.append(error)
+            for result in results:
+                parsed[(result['lottery_name'], str(result['draw_number']))] = result
+    return parsed, errors
+
+
+def _compared_fields(result: dict):
+    # A page without a readable date says nothing about the stored one: draw pages give
+    # draw_date None, the results-page parsers still fall back to the parse time
+    draw_date = result.get('draw_date')
+    if draw_date is None or draw_date.time() != time_of_day.min:
+        return [field for field in COMPARED_FIELDS if field != 'draw_date']
+    return COMPARED_FIELDS
+
+
+def diff_results(db, parsed: Dict[tuple, dict]):
+    """Split parsed results into (changes for update_results, missing results, per-change details)"""
+    keys = list(parsed)
+    stored = {}
+    for i in range(0, len(keys), BULK_CHUNK_SIZE):
+        chunk = keys[i:i + BULK_CHUNK_SIZE]
+        for row in db.query(
+            LotteryResult.id, LotteryResult.lottery_name, LotteryResult.draw_number, *(
+                getattr(LotteryResult, field) for field in COMPARED_FIELDS
+            )
+        ).filter(tuple_(LotteryResult.lottery_name, LotteryResult.draw_number).in_(chunk)):
+            stored[(row.lottery_name, row.draw_number)] = row
+
+    changes, missing, details = [], [], []
+    for key, result in parsed.items():
+        row = stored.get(key)
+        if row is None:
+            missing.append(result)
+            continue
+        fields = _compared_fields(result)
+        changed = {
+            field: (getattr(row, field), result.get(field))
+            for field in fields if getattr(row, field) != result.get(field)
+        }
+        if changed:
+            changes.append({"id": row.id, **{field: result.get(field) for field in fields}})
+            details.append((key, changed))
+    return changes, missing, details
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-parse saved pages and correct lottery_results")
+    parser.add_argument('--source', choices=('all', 'corpus', 'archive'), default='all',
+                        help="Pages to read: the nlb/ and dlb/ files, the page archive, or both")
+    parser.add_argument('--lottery', help="Only this NLB draw page slug, e.g. govisetha")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Parser processes")
+    parser.add_argument('--engine', choices=('fast', 'full'), default=DEFAULT_ENGINE, help="Parse engine")
+    parser.add_argument('--apply', action='store_true', help="Write corrections and missing draws")
+    parser.add_argument('--verbose', action='store_true', help="Print every changed draw")
+    args = parser.parse_args(argv)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        tasks = []
+        if args.source in ('all', 'corpus'):
+            tasks += corpus_tasks(lottery=args.lottery)
+        if args.source in ('all', 'archive'):
+            tasks += archive_tasks(db, args.lottery)
+        if not tasks:
+            print("No pages to re-parse")
+            return 0
+
+        started = time.perf_counter()
+        parsed, errors = parse_pages(tasks, args.workers, args.engine)
+        elapsed = time.perf_counter() - started
+        print(f"Parsed {len(tasks)} pages into {len(parsed)} draws in {elapsed:.2f}s "
+              f"({len(tasks) / elapsed:.0f} pages/s, {args.workers} workers)")
+        for error in errors:
+            print(f"  ✗ {error}")
+
+        changes, missing, details = diff_results(db, parsed)
+        print(f"Unchanged: {len(parsed) - len(changes) - len(missing)}, changed: {len(changes)}, "
+              f"missing from the database: {len(missing)}")
+        for lottery_name, count in sorted(Counter(key[0] for key, _ in details).items()):
+            print(f"  {lottery_name}: {count} changed")
+        for (lottery_name, draw_number), changed in details if args.verbose else details[:10]:
+            for field, (old, new) in changed.items():
+                print(f"  {lottery_name} #{draw_number} {field}: {old!r} -> {new!r}")
+        if len(details) > 10 and not args.verbose:
+            print(f"  ... {len(details) - 10} more (--verbose shows all)")
+
+        if not args.apply:
+            if changes or missing:
+                print("Dry run: re-run with --apply to write these")
+            return 0
+
+        started = time.perf_counter()
+        updated = update_results(db, changes)
+        inserted = bulk_save_results(missing, db)["inserted"] if missing else 0
+        db.commit()
+        print(f"✓ Updated {updated} and inserted {inserted} draws in {time.perf_counter() - started:.2f}s")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+In-process LRU/TTL cache for API responses
+
+Entries are keyed by endpoint and parameters and tagged with the database data
+version they were computed at. A bump of the data version (any commit that
+inserts results) makes every entry stale at once; the TTL covers writes from
+other processes (e.g. a backfill run from the command line), which don't bump
+this process's version.
+
+If recomputing an entry fails because the database is locked or unreachable,
+the stale entry is served and refreshed in the background.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+from database import SessionLocal, data_version
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 512))
+CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 300))
+
+# Errors that mean "database busy", not "bad request": serve stale instead
+UNAVAILABLE_ERRORS = (OperationalError, PoolTimeoutError)
+
+REVALIDATE_ATTEMPTS = 5
+REVALIDATE_DELAY_SECONDS = 1.0
+
+
+class CachedBody:
+    """A response payload with its JSON encoding, extra headers and ETag, computed once per cache entry"""
+
+    __slots__ = ("content", "body", "headers", "etag")
+
+    def __init__(self, content: Any, body: bytes, headers: Optional[dict] = None, weak: bool = False):
+        self.content = content
+        self.body = body
+        self.headers = headers or {}
+        digest = hashlib.sha1(body)
+        for name, value in sorted(self.headers.items()):
+            digest.update(f"\n{name}: {value}".encode())
+        digest = digest.hexdigest()[:20]
+        self.etag = f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+class ResponseCache:
+    """LRU cache of computed responses, invalidated by data version and TTL"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()    # key -> (data version, stored at, value)
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self.counters = {"hits": 0, "misses": 0, "stale_served": 0, "evictions": 0, "revalidated": 0}
+
+    def _fresh(self, entry) -> bool:
+        version, stored_at, _ = entry
+        return version == data_version() and time.monotonic() - stored_at < self.ttl
+
+    def _store(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for `key`, or compute and cache it
+
+        `compute` runs outside the cache lock, so concurrent misses on the same
+        key may each compute once; the last result wins.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._fresh(entry):
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[2]
+            self.counters["misses"] += 1
+
+        # Read the version before querying: a write landing mid-query then
+        # leaves this entry already stale instead of hiding the new rows
+        version = data_version()
+        try:
+            value = compute()
+        except UNAVAILABLE_ERRORS as e:
+            if entry is None:
+                raise
+            logger.warning(f"Database unavailable for {key!r}, serving stale response: {e}")
+            with self._lock:
+                self.counters["stale_served"] += 1
+            self._revalidate(key, compute)
+            return entry[2]
+
+        self._store(key, version, value)
+        return value
+
+    def _revalidate(self, key, compute):
+        """Recompute `key` in the background until the database answers again"""
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def refresh():
+            try:
+                for attempt in range(REVALIDATE_ATTEMPTS):
+                    time.sleep(REVALIDATE_DELAY_SECONDS * 2 ** attempt)
+                    version = data_version()
+                    try:
+                        value = compute()
+                    except UNAVAILABLE_ERRORS:
+                        continue
+                    self._store(key, version, value)
+                    with self._lock:
+                        self.counters["revalidated"] += 1
+                    return
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=refresh, name="cache-revalidate", daemon=True).start()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else None,
+                "data_version": data_version(),
+            }
+
+
+def with_session(query: Callable):
+    """
+    Wrap query(db) so a background revalidation gets its own session
+
+    The request's session is closed once the response is sent, so callables
+    handed to get_or_compute open their own.
+    """
+    def compute():
+        db = SessionLocal()
+        try:
+            return query(db)
+        finally:
+            db.close()
+    return compute
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,143 @@
+"""
+Push delivery of newly saved draws (Server-Sent Events)
+
+One in-process Broadcaster is fed by database.on_results_saved: every commit
+that inserts results becomes one event, kept in a short numbered history.
+Subscribers are coroutines on the server's event loop; a publish wakes them
+with a single call per loop rather than one per subscriber, and an idle
+subscriber is just a suspended coroutine, so thousands cost almost nothing.
+Event numbers double as SSE ids, so a reconnecting client that sends
+Last-Event-ID gets any events still in the history.
+
+Draws written by another process (e.g. a command-line backfill) are not seen.
+"""
+
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import threading
+
+from database import on_results_saved
+from lottery_registry import registry
+
+STREAM_HISTORY = int(os.getenv("STREAM_HISTORY", 256))               # events kept for Last-Event-ID replay
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", 15))
+STREAM_MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", 10000))
+
+
+class Broadcaster:
+    """Numbered event history plus one wake-up event per asyncio loop"""
+
+    def __init__(self, history: int = STREAM_HISTORY):
+        self._events = deque(maxlen=history)   # (seq, draws)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._wakeups: Dict[asyncio.AbstractEventLoop, asyncio.Event] = {}
+        self.subscribers = 0
+        self.published = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._seq
+
+    def publish(self, draws: List[dict]):
+        """Record an event and wake every loop with subscribers; callable from any thread"""
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, draws))
+            self.published += 1
+            loops = list(self._wakeups)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._wake, loop)
+            except RuntimeError:  # loop closed
+                self._wakeups.pop(loop, None)
+
+    def _wake(self, loop):
+        # Runs on `loop`: release everyone waiting and arm a fresh event for the next publish
+        event = self._wakeups.get(loop)
+        if event is not None:
+            self._wakeups[loop] = asyncio.Event()
+            event.set()
+
+    def since(self, last_seq: int) -> List[Tuple[int, List[dict]]]:
+        with self._lock:
+            return [(seq, draws) for seq, draws in self._events if seq > last_seq]
+
+    async def subscribe(self, last_seq: Optional[int] = None,
+                        keepalive: float = STREAM_KEEPALIVE_SECONDS) -> AsyncIterator[Optional[Tuple[int, List[dict]]]]:
+        """
+        Yield (seq, draws) for every event after `last_seq` (default: from now on),
+        and None after `keepalive` seconds without one
+        """
+        loop = asyncio.get_running_loop()
+        last_seq = self._seq if last_seq is None else last_seq
+        self.subscribers += 1
+        try:
+            while True:
+                for seq, draws in self.since(last_seq):
+                    last_seq = seq
+                    yield seq, draws
+                # No await between the check above and taking the wake-up event,
+                # so a publish in between still wakes this subscriber
+                wakeup = self._wakeups.get(loop)
+                if wakeup is None:
+                    wakeup = self._wakeups[loop] = asyncio.Event()
+                if self._seq > last_seq:
+                    continue
+                try:
+                    async with asyncio.timeout(keepalive):  # a timer handle, not a task per wait
+                        await wakeup.wait()
+                except TimeoutError:
+                    yield None
+        finally:
+            self.subscribers -= 1
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "events_published": self.published,
+            "last_event_id": self._seq,
+        }
+
+
+broadcaster = Broadcaster()
+
+
+def draw_filter(lottery_name: Optional[str] = None, board: Optional[str] = None) -> Callable[[dict], bool]:
+    lottery_name = registry.canonical_name(lottery_name) if lottery_name else None
+    board = board.upper() if board else None
+    return lambda draw: (lottery_name is None or draw["lottery_name"] == lottery_name) and \
+        (board is None or draw["board"] == board)
+
+
+async def sse_events(matches: Callable[[dict], bool], last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+    """SSE wire format for one subscriber: a `draws` event per matching commit, comments as keepalives"""
+    # An id from before a server restart may be ahead of this process's numbering
+    start = broadcaster.last_id if last_event_id is None else min(last_event_id, broadcaster.last_id)
+    yield f"retry: 5000\nid: {start}\n\n"
+    async for item in broadcaster.subscribe(start):
+        if item is None:
+            yield ": keepalive\n\n"
+            continue
+        seq, draws = item
+        draws = [draw for draw in draws if matches(draw)]
+        if draws:
+            yield f"id: {seq}\nevent: draws\ndata: {json.dumps({'draws': draws})}\n\n"
+
+
+@on_results_saved
+def _publish_new_draws(new_draws):
+    broadcaster.publish([
+        {
+            "id": draw.id,
+            "lottery_name": draw.lottery_name,
+            "board": draw.board,
+            "draw_number": draw.draw_number,
+            "draw_date": draw.draw_date.isoformat() if draw.draw_date else None,
+            "winning_numbers": draw.winning_numbers,
+        }
+        for draw in new_draws
+    ])
@@ -1,37 +1,134 @@
+from apscheduler.events import (
+    EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+)
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
+from datetime import datetime, timezone
+import logging
 import os
-from scraper import run_scraper
+import time
+from database import SessionLocal, LotteryResult, bulk_save_results
+from draw_calendar import build_triggers, POLL_MINUTES, MAX_BACKOFF_MINUTES
+from draw_discovery import DrawFinder
+from lottery_registry import registry
+from metrics import (
+    SCHEDULER_JOB_LAG, SCHEDULER_JOB_RUNS, SCHEDULER_JOB_SECONDS, SCHEDULER_LAST_RUN
+)
+from scrape_runs import record_saved, recording, scrape_stage
+from scraper import NLBScraper
+import scrape_jobs
 
-def scheduled_scrape():
-    """Function to run on schedule"""
+logger = logging.getLogger(__name__)
+
+# One scraper for every NLB draw job: its pooled session and solved challenge
+# cookie carry over from poll to poll (the jobs run in parallel threads)
+nlb_scraper = NLBScraper()
+
+# A poll that misses its slot by more than this is dropped; the next one follows shortly
+MISFIRE_GRACE_SECONDS = int(os.getenv("SCRAPER_MISFIRE_GRACE_SECONDS", 300))
+
+
+def scheduled_scrape(board):
+    """Scrape one board's results page"""
     print(f"\n{'='*50}")
-    print(f"Scheduled scrape triggered at {datetime.now()}")
+    print(f"Scheduled {board} scrape triggered at {datetime.now()}")
     print(f"{'='*50}")
-    run_scraper()
+    # Joins an in-flight manual scrape instead of fetching the page twice
+    scrape_jobs.submit(boards=(board,), source='scheduler', wait=True)
+
+
+def latest_stored_draw(lottery_name):
+    """Highest draw number stored for a lottery, or None"""
+    db = SessionLocal()
+    try:
+        # Over every stored number: draw dates of older rows may be the time they were scraped
+        numbers = [
+            int(n) for (n,) in db.query(LotteryResult.draw_number).filter(LotteryResult.lottery_name == lottery_name)
+            if n and str(n).isdigit()
+        ]
+        return max(numbers, default=None)
+    finally:
+        db.close()
+
+
+def scrape_next_draw(lottery_slug):
+    """Fetch the NLB draw after the latest stored one (a lottery with none stored: find its newest draw)"""
+    lottery = registry.by_slug(lottery_slug)
+    latest = latest_stored_draw(lottery.name)
+
+    with recording('scheduler', ('NLB',)):
+        if latest is None:
+            finder = DrawFinder(lottery_slug, nlb_scraper)
+            draw_number = finder.latest()
+            results = list(finder.found.values())   # the draws probed on the way are kept too
+        else:
+            draw_number = latest + 1
+            result = nlb_scraper.scrape_individual_draw(lottery_slug, draw_number)
+            results = [result] if result else []
+        if not results:
+            logger.info(f"NLB {lottery_slug} #{draw_number}: not published yet")
+            return 0
+
+        with scrape_stage('NLB', 'save'):
+            counts = bulk_save_results(results, board='NLB')
+        record_saved('NLB', counts)
+    logger.info(f"NLB {lottery_slug} #{draw_number}: saved {counts['inserted']} new")
+    return counts['inserted']
+
+
+JOB_EVENTS = EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES
+
+_job_started = {}   # job_id -> perf_counter() at submission (max_instances=1: one run per job)
+
+
+def record_job_event(event):
+    """APScheduler listener feeding the scheduler metrics"""
+    job = event.job_id
+    if event.code == EVENT_JOB_SUBMITTED:
+        _job_started[job] = time.perf_counter()
+        lag = datetime.now(timezone.utc) - event.scheduled_run_times[-1]
+        SCHEDULER_JOB_LAG.observe(max(lag.total_seconds(), 0.0), job=job)
+    elif event.code == EVENT_JOB_MISSED:
+        SCHEDULER_JOB_RUNS.inc(job=job, outcome='missed')
+    elif event.code == EVENT_JOB_MAX_INSTANCES:
+        SCHEDULER_JOB_RUNS.inc(job=job, outcome='skipped')   # previous run still going
+    elif event.code in (EVENT_JOB_EXECUTED, EVENT_JOB_ERROR):
+        started = _job_started.pop(job, None)
+        if started is not None:
+            SCHEDULER_JOB_SECONDS.observe(time.perf_counter() - started, job=job)
+        SCHEDULER_JOB_RUNS.inc(job=job, outcome='error' if event.code == EVENT_JOB_ERROR else 'success')
+        SCHEDULER_LAST_RUN.set(time.time(), job=job)
 
 
 def start_scheduler():
-    """Start the background scheduler"""
-    # Changed default from 30 to 60 minutes for hourly execution
-    interval_minutes = int(os.getenv("SCRAPER_INTERVAL_MINUTES", 60))
-    
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(
-        func=scheduled_scrape,
-        trigger=IntervalTrigger(minutes=interval_minutes),
-        id='lottery_scraper',
-        name='Scrape lottery results',
-        replace_existing=True
-    )
-    
+    """Start the background scheduler with one draw-calendar job per board / lottery"""
+    scheduler = BackgroundScheduler(job_defaults={
+        'coalesce': True,         # collapse missed polls into one run
+        'max_instances': 1,       # a slow scrape never overlaps the next poll
+        'misfire_grace_time': MISFIRE_GRACE_SECONDS,
+    })
+
+    for entry, trigger in build_triggers():
+        if entry["slug"]:
+            func, args, name = scrape_next_draw, [entry["slug"]], f"Scrape NLB {entry['slug']}"
+        else:
+            func, args, name = scheduled_scrape, [entry["board"]], f"Scrape {entry['board']} results page"
+        scheduler.add_job(
+            func=func,
+            args=args,
+            trigger=trigger,
+            id=entry["job_id"],
+            name=name,
+            replace_existing=True
+        )
+
+    scheduler.add_listener(record_job_event, JOB_EVENTS)
     scheduler.start()
-    print(f"Scheduler started - will scrape every {interval_minutes} minutes")
-    print(f"Optimized for DLB results window: 10 PM - 6 AM (8 hours)")
-    
+    print(f"Scheduler started - {len(scheduler.get_jobs())} draw-calendar jobs")
+    print(f"Polling every {POLL_MINUTES} min after each draw until captured, "
+          f"then backing off up to {MAX_BACKOFF_MINUTES} min; idle outside results windows")
+
     # Run scraper immediately on startup
     print("Running initial scrape...")
-    run_scraper()
-    
+    scrape_jobs.submit(source='startup', wait=True)
+
     return scheduler
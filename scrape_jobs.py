@@ -0,0 +1,137 @@
+"""
+Background scrape jobs
+
+POST /api/scrape and the scheduler both go through submit(). A request whose
+boards are already covered by a queued or running job is attached to that job
+instead of starting a second scrape, and scrapes never run concurrently with
+each other. Recent jobs are kept in memory for GET /api/scrape/{job_id}; every
+run is also recorded in the scrape_runs ledger (scrape_runs.py).
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+import logging
+import threading
+import uuid
+
+from scraper import run_scraper
+
+logger = logging.getLogger(__name__)
+
+ALL_BOARDS = ('DLB', 'NLB')
+MAX_JOBS_KEPT = 50
+
+_jobs = OrderedDict()            # job_id -> ScrapeJob, oldest first
+_jobs_lock = threading.Lock()    # guards _jobs and job dedup
+_run_lock = threading.Lock()     # one scrape at a time
+
+
+class ScrapeJob:
+    """One scrape run and its progress"""
+
+    def __init__(self, boards: Tuple[str, ...], source: str, profile: bool = False):
+        self.job_id = uuid.uuid4().hex
+        self.boards = boards
+        self.source = source
+        self.profile = profile   # attach a cProfile report to the scrape run
+        self.status = 'queued'
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.report = {}         # board -> {found, saved, unchanged, seconds}, filled by run_scraper
+        self.saved = None
+        self.error = None
+        self.done = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def to_dict(self) -> dict:
+        duration = None
+        if self.started_at:
+            duration = round(((self.finished_at or datetime.now()) - self.started_at).total_seconds(), 3)
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "source": self.source,
+            "boards": list(self.boards),
+            "profile": self.profile,
+            "progress": {"boards_done": len(self.report), "boards_total": len(self.boards)},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": duration,
+            "results": dict(self.report),
+            "saved": self.saved,
+            "error": self.error,
+        }
+
+    def run(self):
+        with _run_lock:
+            self.status = 'running'
+            self.started_at = datetime.now()
+            logger.info(f"Scrape job {self.job_id} started ({self.source}, boards: {', '.join(self.boards)})")
+            try:
+                self.saved = run_scraper(boards=self.boards, report=self.report, source=self.source,
+                                         job_id=self.job_id, profile=self.profile or None)
+                self.status = 'succeeded'
+            except Exception as e:
+                logger.error(f"Scrape job {self.job_id} failed: {e}")
+                self.error = str(e)
+                self.status = 'failed'
+            finally:
+                self.finished_at = datetime.now()
+                self.done.set()
+
+
+def submit(boards: Iterable[str] = ALL_BOARDS, source: str = 'api', wait: bool = False,
+           profile: bool = False) -> Tuple[ScrapeJob, bool]:
+    """
+    Queue a scrape of `boards`, or attach to an in-flight job that covers them
+
+    A profiled request gets a job of its own, so the profile covers a whole run,
+    but attaches to a profiled job still queued: at most one waits at a time.
+
+    Returns (job, created). With wait=True the call blocks until the job is done;
+    a new job then runs in the calling thread instead of a background thread.
+    """
+    boards = tuple(b.upper() for b in boards)
+    with _jobs_lock:
+        if profile:
+            # Never joins an unprofiled or already running job; repeated requests share one queued job
+            job = next((j for j in reversed(_jobs.values())
+                        if j.profile and j.status == 'queued' and set(boards) <= set(j.boards)), None)
+        else:
+            job = next((j for j in reversed(_jobs.values()) if j.active and set(boards) <= set(j.boards)), None)
+        created = job is None
+        if created:
+            job = ScrapeJob(boards, source, profile)
+            _jobs[job.job_id] = job
+            _prune()
+            if not wait:
+                threading.Thread(target=job.run, name=f"scrape-{job.job_id[:8]}", daemon=True).start()
+        else:
+            logger.info(f"Scrape request from {source} attached to job {job.job_id}")
+
+    if wait:
+        if created:
+            job.run()
+        else:
+            job.done.wait()
+    return job, created
+
+
+def _prune():
+    """Drop the oldest finished jobs beyond MAX_JOBS_KEPT (caller holds _jobs_lock)"""
+    while len(_jobs) > MAX_JOBS_KEPT:
+        oldest_id, oldest = next(iter(_jobs.items()))
+        if oldest.active:
+            break
+        del _jobs[oldest_id]
+
+
+def get_job(job_id: str) -> Optional[ScrapeJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,258 @@
+"""
+Scrape run ledger
+
+Every results-page scrape (run_scraper) and every scheduled NLB draw-page poll
+is recorded in the scrape_runs table: wall and CPU time per source (board) and
+stage, response bytes downloaded, rows parsed / inserted / skipped, and errors.
+The scraper reports through scrape_stage() and record_rows(), which also feed
+the Prometheus metrics; outside a recorded run (e.g. the backfill) they only
+feed the metrics.
+
+A run started with profile=True (or every run with SCRAPE_PROFILE=1) is run
+under cProfile: the top of the pstats report is stored with the run and the
+raw dump is written to SCRAPE_PROFILE_DIR for `python -m pstats` / snakeviz.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import SessionLocal, ScrapeRun
+from metrics import SCRAPE_BYTES, SCRAPE_RESULTS, SCRAPE_STAGE_ERRORS, SCRAPE_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PROFILE_RUNS = os.getenv("SCRAPE_PROFILE", "0").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("SCRAPE_PROFILE_DIR", "logs/profiles")
+PROFILE_LINES = 40          # functions kept in the stored pstats report
+RETENTION_DAYS = int(os.getenv("SCRAPE_RUNS_RETENTION_DAYS", 30))
+MAX_ERRORS_KEPT = 20
+
+# Row outcomes (as in lottery_scrape_results_total) -> scrape_runs total column
+ROW_COLUMNS = {"parsed": "rows_parsed", "inserted": "rows_inserted", "duplicate": "rows_skipped"}
+
+_current: ContextVar[Optional["RunRecorder"]] = ContextVar("scrape_run", default=None)
+
+
+class RunRecorder:
+    """Figures of the run in progress in this thread"""
+
+    def __init__(self, source: str, boards, job_id: Optional[str] = None):
+        self.source = source
+        self.boards = ",".join(boards)
+        self.job_id = job_id
+        self.status = "succeeded"
+        self.started_at = datetime.now()
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self.sources: Dict[str, dict] = {}
+        self.errors = []
+        self.error_count = 0
+        self.totals = {column: 0 for column in ROW_COLUMNS.values()}
+        self.bytes_downloaded = 0
+        self.id = None
+
+    def _source(self, board: str) -> dict:
+        return self.sources.setdefault(board, {"bytes": 0, "errors": 0, "stages": {}})
+
+    def add_error(self, board: Optional[str], stage: Optional[str], error: BaseException):
+        self.error_count += 1
+        if board:
+            self._source(board)["errors"] += 1
+        if len(self.errors) < MAX_ERRORS_KEPT:
+            self.errors.append({"board": board, "stage": stage, "error": f"{type(error).__name__}: {error}"})
+
+    def add_stage(self, board: str, stage: str, wall: float, cpu: float, downloaded: int = 0,
+                  error: Optional[BaseException] = None):
+        source = self._source(board)
+        timing = source["stages"].setdefault(stage, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "errors": 0})
+        timing["calls"] += 1
+        timing["wall_seconds"] += wall
+        timing["cpu_seconds"] += cpu
+        source["bytes"] += downloaded
+        self.bytes_downloaded += downloaded
+        if error is not None:
+            timing["errors"] += 1
+            self.add_error(board, stage, error)
+
+    def add_rows(self, board: str, outcome: str, count: int):
+        source = self._source(board)
+        source[outcome] = source.get(outcome, 0) + count
+        if outcome in ROW_COLUMNS:
+            self.totals[ROW_COLUMNS[outcome]] += count
+
+    def to_row(self) -> ScrapeRun:
+        for source in self.sources.values():
+            for timing in source["stages"].values():
+                timing["wall_seconds"] = round(timing["wall_seconds"], 4)
+                timing["cpu_seconds"] = round(timing["cpu_seconds"], 4)
+        return ScrapeRun(
+            job_id=self.job_id,
+            source=self.source,
+            boards=self.boards,
+            status=self.status,
+            started_at=self.started_at,
+            finished_at=datetime.now(),
+            wall_seconds=round(time.perf_counter() - self._wall, 4),
+            cpu_seconds=round(time.thread_time() - self._cpu, 4),
+            bytes_downloaded=self.bytes_downloaded,
+            error_count=self.error_count,
+            sources=self.sources,
+            errors=self.errors,
+            **self.totals,
+        )
+
+
+class _Stage:
+    __slots__ = ("bytes",)
+
+    def __init__(self):
+        self.bytes = 0   # set by fetch stages: response body size
+
+
+@contextmanager
+def scrape_stage(board: str, stage: str):
+    """
+    Time one scraper stage (wall and thread CPU time) for the metrics and the current run
+
+    Yields an object whose `bytes` a fetch stage sets to the size it downloaded.
+    A stage that raises is counted as an error and the exception propagates.
+    """
+    timer = _Stage()
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    error = None
+    try:
+        yield timer
+    except Exception as e:
+        error = e
+        SCRAPE_STAGE_ERRORS.inc(board=board, stage=stage)
+        raise
+    finally:
+        wall = time.perf_counter() - started
+        SCRAPE_STAGE_SECONDS.observe(wall, board=board, stage=stage)
+        if timer.bytes:
+            SCRAPE_BYTES.inc(timer.bytes, board=board)
+        run = _current.get()
+        if run is not None:
+            run.add_stage(board, stage, wall, time.thread_time() - cpu_started, timer.bytes, error)
+
+
+def record_rows(board: str, outcome: str, count: int = 1):
+    """Count results by outcome: parsed, inserted, duplicate, draw_not_found"""
+    SCRAPE_RESULTS.inc(count, board=board, outcome=outcome)
+    run = _current.get()
+    if run is not None:
+        run.add_rows(board, outcome, count)
+
+
+def record_saved(board: str, counts: dict):
+    """Count a bulk_save_results outcome"""
+    record_rows(board, "inserted", counts["inserted"])
+    record_rows(board, "duplicate", counts["duplicates"])
+
+
+def _profile_report(profiler: cProfile.Profile, started_at: datetime):
+    """(pstats text report, path of the raw dump or None)"""
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    path = os.path.join(PROFILE_DIR, f"scrape_{started_at:%Y%m%d_%H%M%S_%f}.prof")
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(path)
+    except OSError as e:
+        logger.warning(f"Could not write profile dump {path}: {e}")
+        path = None
+    return report.getvalue(), path
+
+
+def _store(row: ScrapeRun) -> Optional[int]:
+    """Insert a run and drop runs past the retention period; a ledger failure never fails the scrape"""
+    db = SessionLocal()
+    try:
+        db.add(row)
+        db.execute(delete(ScrapeRun).where(ScrapeRun.started_at < datetime.now() - timedelta(days=RETENTION_DAYS)))
+        db.commit()
+        return row.id
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Could not record scrape run: {e}")
+        return None
+    finally:
+        db.close()
+
+
+@contextmanager
+def recording(source: str, boards, job_id: Optional[str] = None, profile: Optional[bool] = None):
+    """
+    Record the scrape run inside the block in scrape_runs
+
+    Nested blocks add to the outer run. The run is stored as failed if the block
+    raises (the exception propagates) or if stages failed and nothing was
+    parsed, and as partial if stages failed but some results were parsed.
+    profile=None follows SCRAPE_PROFILE.
+    """
+    if _current.get() is not None:
+        yield _current.get()
+        return
+
+    run = RunRecorder(source, boards, job_id)
+    token = _current.set(run)
+    profiler = cProfile.Profile() if (PROFILE_RUNS if profile is None else profile) else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield run
+    except Exception as e:
+        run.status = "failed"
+        run.add_error(None, None, e)
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        _current.reset(token)
+        # Scrapers log a failed fetch or parse and carry on, so the block returns normally
+        if run.status == "succeeded" and run.error_count:
+            run.status = "partial" if run.totals["rows_parsed"] else "failed"
+        row = run.to_row()
+        if profiler:
+            row.profile, row.profile_path = _profile_report(profiler, run.started_at)
+        summary = (f"{row.wall_seconds:.2f}s wall, {row.cpu_seconds:.2f}s CPU, {row.bytes_downloaded} bytes, "
+                   f"{row.rows_parsed} parsed, {row.rows_inserted} inserted, {row.error_count} errors")
+        run.id = _store(row)
+        logger.info(f"Scrape run {run.id}: {summary}")
+
+
+def run_to_dict(row: ScrapeRun, include_profile: bool = False) -> dict:
+    data = {
+        "id": row.id,
+        "job_id": row.job_id,
+        "source": row.source,
+        "boards": row.boards.split(",") if row.boards else [],
+        "status": row.status,
+        "started_at": row.started_at,
+        "finished_at": row.finished_at,
+        "wall_seconds": row.wall_seconds,
+        "cpu_seconds": row.cpu_seconds,
+        "bytes_downloaded": row.bytes_downloaded,
+        "rows_parsed": row.rows_parsed,
+        "rows_inserted": row.rows_inserted,
+        "rows_skipped": row.rows_skipped,
+        "error_count": row.error_count,
+        "sources": row.sources or {},
+        "errors": row.errors or [],
+        "profiled": row.profile is not None,
+    }
+    if include_profile:
+        data["profile"] = row.profile
+        data["profile_path"] = row.profile_path
+    return data
@@ -1,12 +1,21 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import re
 import json
 import logging
 import os
-from database import SessionLocal, LotteryResult, LotteryType
+import threading
+import time
+from database import SessionLocal, LotteryResult, LotteryType, bulk_save_results
+from lottery_registry import registry
+from parse_engine import DEFAULT_ENGINE, build_soup
+from fetch_cache import ConditionalFetcher
+from page_archive import page_archive
+from metrics import SCRAPE_UNCHANGED
+from scrape_runs import record_rows, record_saved, recording, scrape_stage
 
 # Setup logging
 log_dir = 'logs'
@@ -23,62 +32,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Containers that may hold a DLB result (Strategy 1 of DLBScraper.parse_results_page)
+DLB_SECTION_CLASS = re.compile(r'result|lottery|card|draw', re.I)
+DLB_NUMBERS_CLASS = re.compile(r'result_detail_result', re.I)
+
+
+def _is_dlb_result_block(element) -> bool:
+    """lxml element test: a result container that holds a winning numbers list"""
+    return bool(DLB_SECTION_CLASS.search(element.get('class', ''))) and any(
+        DLB_NUMBERS_CLASS.search(ul.get('class', '')) for ul in element.iter('ul')
+    )
+
+
+def _is_nlb_result_block(element) -> bool:
+    """lxml element test: the blocks NLBScraper.parse_draw_page reads (div.lresult, div.superprize)"""
+    return not {'lresult', 'superprize'}.isdisjoint(element.get('class', '').split())
+
 
 class DLBScraper:
     """Scraper for Development Lotteries Board (DLB) website"""
     
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, parser='html.parser', engine=DEFAULT_ENGINE, conditional=False):
         self.base_url = "https://www.dlb.lk"
         self.results_url = f"{self.base_url}/result/en"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
         self.debug = debug
+        self.parser = parser  # BeautifulSoup tree builder
+        self.engine = engine  # 'fast' or 'full', see parse_engine
+        # Conditional requests: skip parsing when the results page hasn't changed
+        self.fetcher = ConditionalFetcher() if conditional else None
+        self.page_unchanged = False
     
     def scrape_latest_results(self) -> List[Dict]:
         """Scrape latest lottery results from DLB website"""
+        self.page_unchanged = False
         try:
             logger.info(f"Fetching DLB results from: {self.results_url}")
-            response = requests.get(self.results_url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            if self.debug:
-                os.makedirs('dlb/misc', exist_ok=True)
-                self._save_debug_html(soup, 'dlb/misc/dlb_debug.html')
-            
-            results = []
-            
-            # Strategy 1: Try to find result cards/containers using flexible regex (NOT hardcoded selectors)
-            result_sections = soup.find_all('div', class_=re.compile(r'result|lottery|card|draw', re.I))
-            
-            if result_sections and self.debug:
-                print(f"Found {len(result_sections)} potential result sections")
-            
-            # Strategy 2: Look for table rows
-            if not result_sections:
-                result_sections = soup.find_all('tr', class_=re.compile(r'result|row', re.I))
-            
-            # Strategy 3: Look for list items
-            if not result_sections:
-                result_sections = soup.find_all('li', class_=re.compile(r'result|lottery', re.I))
-            
-            # Parse each section
-            for section in result_sections:
-                result_data = self._parse_result_section(section)
-                if result_data:
-                    results.append(result_data)
-            
-            # Fallback: Parse from text patterns
-            if not results:
-                print("No structured results found. Trying text pattern matching...")
-                results = self._parse_from_text(soup)
-            
-            # Additional: Try to find results in script tags (JSON data)
-            if not results:
-                results = self._parse_from_scripts(soup)
-            
+            headers = dict(self.headers)
+            if self.fetcher:
+                headers.update(self.fetcher.request_headers(self.results_url))
+            with scrape_stage('DLB', 'fetch') as stage:
+                response = requests.get(self.results_url, headers=headers, timeout=15)
+                stage.bytes = len(response.content)
+                self._archive(response)
+                response.raise_for_status()
+            
+            if self.fetcher and self.fetcher.is_unchanged(self.results_url, response):
+                self.page_unchanged = True
+                SCRAPE_UNCHANGED.inc(board='DLB')
+                return []
+            
+            with scrape_stage('DLB', 'parse'):
+                results = self.parse_results_page(response.content)
+            record_rows('DLB', 'parsed', len(results))
             logger.info(f"DLB: Found {len(results)} lottery results")
             return results
             
@@ -87,11 +95,62 @@ class DLBScraper:
             return []
         except Exception as e:
             logger.error(f"Error parsing DLB results: {e}")
+            if self.fetcher:
+                self.fetcher.forget(self.results_url)
             if self.debug:
                 import traceback
                 traceback.print_exc()
             return []
     
+    def parse_results_page(self, content: bytes) -> List[Dict]:
+        """Parse the DLB results page HTML into result dicts (no network)"""
+        if self.engine == 'fast' and not self.debug:
+            # Only containers with a numbers list can yield a result, so only those are built;
+            # anything unusual goes through the full soup below
+            soup = build_soup(content, self.parser, 'fast', 'div', _is_dlb_result_block)
+            results = []
+            for section in soup.find_all('div', class_=DLB_SECTION_CLASS):
+                result_data = self._parse_result_section(section)
+                if result_data:
+                    results.append(result_data)
+            if results:
+                return results
+        
+        soup = BeautifulSoup(content, self.parser)
+        
+        results = []
+            
+        # Strategy 1: Try to find result cards/containers using flexible regex (NOT hardcoded selectors)
+        result_sections = soup.find_all('div', class_=DLB_SECTION_CLASS)
+        
+        if result_sections and self.debug:
+            print(f"Found {len(result_sections)} potential result sections")
+        
+        # Strategy 2: Look for table rows
+        if not result_sections:
+            result_sections = soup.find_all('tr', class_=re.compile(r'result|row', re.I))
+        
+        # Strategy 3: Look for list items
+        if not result_sections:
+            result_sections = soup.find_all('li', class_=re.compile(r'result|lottery', re.I))
+        
+        # Parse each section
+        for section in result_sections:
+            result_data = self._parse_result_section(section)
+            if result_data:
+                results.append(result_data)
+        
+        # Fallback: Parse from text patterns
+        if not results:
+            print("No structured results found. Trying text pattern matching...")
+            results = self._parse_from_text(soup)
+        
+        # Additional: Try to find results in script tags (JSON data)
+        if not results:
+            results = self._parse_from_scripts(soup)
+        
+        return results
+    
     def _parse_result_section(self, section) -> Optional[Dict]:
         """Parse individual DLB result section using actual HTML structure"""
         try:
@@ -164,7 +223,7 @@ class DLBScraper:
             if lottery_name and winning_nums:
                 logger.info(f"DLB: Parsed {lottery_name} - Draw #{draw_num}, Numbers: {winning_nums}")
                 return {
-                    'lottery_name': lottery_name.lower().replace(' ', '_'),
+                    'lottery_name': registry.canonical_name(lottery_name),
                     'draw_number': draw_num,
                     'draw_date': draw_date,
                     'winning_numbers': winning_nums,
@@ -187,8 +246,8 @@ class DLBScraper:
         if self.debug:
             print("\n=== DLB TEXT PARSING ===")
         
-        # Pattern for all DLB lottery types
-        pattern = r'(SASIRI|KAPRUKA|SHANIDA|SUPER BALL|SUPER\s*BALL|ADA KOTIPATHI|ADA\s*KOTIPATHI|JAYA SAMPATHA|JAYA\s*SAMPATHA|LAGNA WASANA|LAGNA\s*WASANA|SUPIRI DHANA SAMPATHA|SUPIRI\s*DHANA\s*SAMPATHA)\s*-?\s*(\d+)?\s*\|?\s*([\d\-A-Z\s]+)?'
+        # Any DLB lottery name from the registry, then the draw number and date
+        pattern = registry.name_pattern('DLB').pattern + r'\s*-?\s*(\d+)?\s*\|?\s*([\d\-A-Z\s]+)?'
         matches = re.findall(pattern, text, re.IGNORECASE)
         
         if self.debug:
@@ -207,7 +266,7 @@ class DLBScraper:
                 winning_nums = []
             
             results.append({
-                'lottery_name': lottery_clean.lower().replace(' ', '_'),
+                'lottery_name': registry.canonical_name(lottery_clean),
                 'draw_number': draw_number if draw_number else None,
                 'draw_date': self._parse_date(date_str) if date_str else datetime.now(),
                 'winning_numbers': winning_nums,
@@ -253,60 +312,99 @@ class DLBScraper:
             pass
         return results
     
-    def _save_debug_html(self, soup, filename):
-        """Save HTML for debugging"""
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(soup.prettify())
-            print(f"Debug HTML saved to {filename}")
-        except:
-            pass
+    def _archive(self, response):
+        """Hand the raw results page to the page archive (replaces the old prettified debug dumps)"""
+        content_hash = page_archive.archive(response.content, self.results_url, 'DLB',
+                                            status_code=response.status_code)
+        if self.debug and content_hash:
+            print(f"DLB page archived: python page_archive.py show {content_hash[:16]} > dlb.html")
     
     def save_results(self, results: List[Dict]) -> int:
         """Save results to database"""
-        db = SessionLocal()
-        saved_count = 0
-        duplicate_count = 0
-        
+        if not results:
+            if self.fetcher:
+                self.fetcher.remember()
+            return 0
         try:
-            for result in results:
-                existing = db.query(LotteryResult).filter(
-                    LotteryResult.lottery_name == result['lottery_name'],
-                    LotteryResult.draw_number == result['draw_number']
-                ).first()
-                
-                if not existing:
-                    lottery_result = LotteryResult(
-                        lottery_name=result['lottery_name'],
-                        draw_number=result['draw_number'],
-                        draw_date=result['draw_date'],
-                        winning_numbers=result['winning_numbers'],
-                        prize_amount=result.get('prize_amount'),
-                        additional_data=result.get('additional_data', {})
-                    )
-                    db.add(lottery_result)
-                    saved_count += 1
-                    logger.info(f"DLB: Saved {result['lottery_name']} draw #{result['draw_number']}")
-                else:
-                    duplicate_count += 1
-                    logger.debug(f"DLB: Duplicate skipped - {result['lottery_name']} draw #{result['draw_number']}")
-            
-            db.commit()
-            if duplicate_count > 0:
-                logger.info(f"DLB: Skipped {duplicate_count} duplicates")
-            return saved_count
+            with scrape_stage('DLB', 'save'):
+                counts = bulk_save_results(results, board='DLB')
+            record_saved('DLB', counts)
+            if self.fetcher:
+                self.fetcher.remember()
+            logger.info(f"DLB: Saved {counts['inserted']} new results")
+            if counts['duplicates'] > 0:
+                logger.info(f"DLB: Skipped {counts['duplicates']} duplicates")
+            return counts['inserted']
         except Exception as e:
             logger.error(f"Error saving DLB results: {e}")
-            db.rollback()
             return 0
-        finally:
-            db.close()
+
+
+class ChallengeCookieCache:
+    """
+    Cache for the cookie solved from NLB's setCookie(...)/location.reload challenge
+
+    The cookie is kept with the expiry the challenge script asks for and can be
+    persisted to a JSON file so it survives restarts.
+    """
+    
+    # Treat cookies this close to expiry as stale
+    EXPIRY_MARGIN_SECONDS = 60
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cookie = None  # {"name", "value", "expires_at"}
+        self._load()
+    
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._cookie = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read cookie cache {self.path}: {e}")
+    
+    def _persist(self):
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._cookie, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write cookie cache {self.path}: {e}")
+    
+    def get(self) -> Optional[Tuple[str, str]]:
+        """Return (name, value) if a fresh cookie is cached"""
+        with self._lock:
+            cookie = self._cookie
+            if cookie and cookie['expires_at'] - self.EXPIRY_MARGIN_SECONDS > time.time():
+                return cookie['name'], cookie['value']
+            return None
+    
+    def store(self, name: str, value: str, days: float = 1):
+        """Cache a freshly solved cookie"""
+        with self._lock:
+            self._cookie = {'name': name, 'value': value, 'expires_at': time.time() + days * 86400}
+            self._persist()
+    
+    def invalidate(self):
+        with self._lock:
+            self._cookie = None
+            self._persist()
 
 
 class NLBScraper:
     """Scraper for National Lotteries Board (NLB) website"""
     
-    def __init__(self, debug=False):
+    # Seconds to wait after solving a cookie challenge before retrying
+    CHALLENGE_WAIT_SECONDS = 3
+    
+    def __init__(self, debug=False, pool_size=10, cookie_cache_path=None, parser='html.parser',
+                 engine=DEFAULT_ENGINE, conditional=False):
         self.base_url = "https://www.nlb.lk"
         self.results_url = f"{self.base_url}/English/results/"
         self.headers = {
@@ -321,6 +419,61 @@ class NLBScraper:
             'Sec-Fetch-Site': 'none',
         }
         self.debug = debug
+        self.parser = parser  # BeautifulSoup tree builder
+        self.engine = engine  # 'fast' or 'full', see parse_engine
+        
+        # One long-lived, pooled session so draws reuse TCP/TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(self.headers)
+        
+        self.cookie_cache = ChallengeCookieCache(cookie_cache_path or os.getenv('NLB_COOKIE_CACHE'))
+        self._challenge_lock = threading.Lock()
+        
+        # Conditional requests: skip parsing when the results page hasn't changed
+        self.fetcher = ConditionalFetcher() if conditional else None
+        self.page_unchanged = False
+    
+    def _apply_cached_cookie(self) -> Optional[Tuple[str, str]]:
+        cookie = self.cookie_cache.get()
+        if cookie:
+            self.session.cookies.set(cookie[0], cookie[1], domain='.nlb.lk', path='/')
+        return cookie
+    
+    def _fetch_page(self, url: str, headers: Optional[Dict] = None) -> requests.Response:
+        """
+        GET an NLB page, solving the cookie challenge only when needed
+        
+        The cached challenge cookie is sent up front, so the solve-and-wait
+        round trip only happens when the cookie is missing or stale.
+        """
+        sent_cookie = self._apply_cached_cookie()
+        response = self.session.get(url, headers=headers, timeout=15)
+        
+        if 'setCookie' in response.text and 'location.reload' in response.text:
+            with self._challenge_lock:
+                # Another thread may have solved the challenge while we waited
+                current_cookie = self._apply_cached_cookie()
+                if current_cookie and current_cookie != sent_cookie:
+                    return self.session.get(url, headers=headers, timeout=15)
+                
+                logger.debug(f"Cookie protection detected for {url}")
+                cookie_match = re.search(r"setCookie\('([^']+)','([^']+)',\s*([\d.]+)?", response.text)
+                if cookie_match:
+                    cookie_name = cookie_match.group(1)
+                    cookie_value = cookie_match.group(2)
+                    cookie_days = float(cookie_match.group(3) or 1)
+                    self.cookie_cache.store(cookie_name, cookie_value, cookie_days)
+                    self.session.cookies.set(cookie_name, cookie_value, domain='.nlb.lk', path='/')
+                else:
+                    self.cookie_cache.invalidate()
+                
+                time.sleep(self.CHALLENGE_WAIT_SECONDS)
+                response = self.session.get(url, headers=headers, timeout=15)
+        
+        return response
     
     def scrape_individual_draw(self, lottery_slug: str, draw_number: int) -> Optional[Dict]:
         """
@@ -338,128 +491,14 @@ class NLBScraper:
         try:
             logger.info(f"Fetching {lottery_slug} draw #{draw_number}...")
             
-            # Use session to handle cookies
-            session = requests.Session()
-            
-            # First request - may get cookie-setting page
-            response = session.get(url, headers=self.headers, timeout=15)
-            
-            # Check for cookie protection
-            if 'setCookie' in response.text and 'location.reload' in response.text:
-                logger.debug(f"Cookie protection detected for {lottery_slug} #{draw_number}")
-                
-                # Extract cookie value from JavaScript
-                import time
-                cookie_match = re.search(r"setCookie\('([^']+)','([^']+)',", response.text)
-                if cookie_match:
-                    cookie_name = cookie_match.group(1)
-                    cookie_value = cookie_match.group(2)
-                    
-                    # Set the cookie manually
-                    session.cookies.set(cookie_name, cookie_value, domain='.nlb.lk', path='/')
-                
-                # Wait and make second request
-                time.sleep(3)
-                response = session.get(url, headers=self.headers, timeout=15)
-            
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            if self.debug:
-                os.makedirs(f'nlb/{lottery_slug}', exist_ok=True)
-                debug_file = f"nlb/{lottery_slug}/nlb_{lottery_slug}_{draw_number}_scrape.html"
-                self._save_debug_html(soup, debug_file)
-            
-            # Parse the result page
-            # Structure: <div class="lresult"> contains the lottery result
-            lresult = soup.find('div', class_='lresult')
-            if not lresult:
-                logger.warning(f"No result div found for {lottery_slug} #{draw_number}")
-                return None
-            
-            # Extract draw number from <p><b>Draw No.:</b> 177</p>
-            draw_elem = lresult.find('p', string=re.compile(r'Draw No\.:', re.I))
-            if not draw_elem:
-                draw_elem = lresult.find('h1')
-            
-            extracted_draw = str(draw_number)  # Default to provided number
-            if draw_elem:
-                draw_text = draw_elem.get_text()
-                draw_match = re.search(r'\d+', draw_text)
-                if draw_match:
-                    extracted_draw = draw_match.group(0)
-            
-            # Extract date from <p><b>Date:</b> Thursday January 01, 2026</p>
-            date_elem = lresult.find('p', string=re.compile(r'Date:', re.I))
-            draw_date = datetime.now()
-            if date_elem:
-                date_text = date_elem.get_text()
-                # Remove "Date:" prefix and parse
-                date_str = re.sub(r'Date:', '', date_text, flags=re.I).strip()
-                draw_date = self._parse_date(date_str)
-            
-            # Extract winning numbers with ball type categorization
-            # Supports: Letter, Zodiac, Super Number, Regular Number, Promotional
-            winning_numbers = []
-            ball_lists = lresult.find_all('ol', class_='B')
-            for ball_list in ball_lists:
-                balls = ball_list.find_all('li', class_=re.compile(r'Number-|Zodiac|Color|Letter', re.I))
-                for ball in balls:
-                    # Skip "More" buttons
-                    if 'More' in ball.get('class', []):
-                        continue
-                    
-                    ball_text = ball.get_text(strip=True)
-                    if not ball_text:
-                        continue
-                    
-                    ball_classes = ball.get('class', [])
-                    ball_title = ball.get('title', '')
-                    
-                    # Determine ball type based on CSS classes and title
-                    ball_type = 'number'  # default
-                    
-                    if 'Letter' in ball_classes or ball_title == 'Letter':
-                        ball_type = 'letter'
-                    elif 'Zodiac' in ball_classes or ball_title == 'Zodiac':
-                        ball_type = 'zodiac'
-                    elif ball_title == 'Super Number' or ('Circle' in ball_classes and 'Red' in ball_classes):
-                        ball_type = 'super'
-                    elif 'Number-1' in ' '.join(ball_classes) and 'Square' in ball_classes:
-                        # Promotional draw numbers (Square Blue)
-                        ball_type = 'promotional'
-                    elif re.match(r'^\d{1,2}$', ball_text):
-                        # Regular number
-                        ball_type = 'number'
-                    
-                    # Store as structured data: {"type": "letter", "value": "U"}
-                    winning_numbers.append({
-                        "type": ball_type,
-                        "value": ball_text
-                    })
-            
-            # Extract prize amount if available (from prize structure section)
-            prize_amount = None
-            prize_text = soup.find('div', class_='superprize')
-            if prize_text:
-                prize_match = re.search(r'Rs\.\s*([\d,]+\.?\d*)', prize_text.get_text())
-                if prize_match:
-                    prize_amount = prize_match.group(1).replace(',', '')
-            
-            result = {
-                'lottery_name': lottery_slug.replace('-', '_'),
-                'draw_number': extracted_draw,
-                'draw_date': draw_date,
-                'winning_numbers': winning_numbers,
-                'prize_amount': prize_amount,
-                'additional_data': {
-                    'source_url': url,
-                    'scrape_method': 'individual_draw'
-                }
-            }
-            
-            logger.info(f"NLB: Extracted {lottery_slug} draw #{extracted_draw} - {len(winning_numbers)} numbers")
-            
+            with scrape_stage('NLB', 'fetch_draw') as stage:
+                response = self._fetch_page(url)
+                stage.bytes = len(response.content)
+                self._archive(response, url, lottery_slug, draw_number)
+                response.raise_for_status()
+            with scrape_stage('NLB', 'parse_draw'):
+                result = self.parse_draw_page(response.content, lottery_slug, draw_number, url)
+            record_rows('NLB', 'parsed' if result else 'draw_not_found')
             return result
             
         except Exception as e:
@@ -469,52 +508,173 @@ class NLBScraper:
                 traceback.print_exc()
             return None
     
+    def parse_draw_page(self, content: bytes, lottery_slug: str, draw_number: int,
+                        url: Optional[str] = None) -> Optional[Dict]:
+        """
+        Parse an individual NLB draw page into a result dict (no network)
+        
+        Returns None when the page has no result block, e.g. a cookie challenge
+        page or a draw that has not been held yet.
+        """
+        url = url or f"{self.base_url}/results/{lottery_slug}/{draw_number}"
+        
+        soup = build_soup(content, self.parser, self.engine, 'div', _is_nlb_result_block, marker=b'lresult')
+        
+        # Parse the result page
+        # Structure: <div class="lresult"> contains the lottery result
+        lresult = soup.find('div', class_='lresult')
+        if not lresult:
+            logger.warning(f"No result div found for {lottery_slug} #{draw_number}")
+            return None
+        
+        # Extract draw number from <p><b>Draw No.:</b> 177</p>
+        # (matched on the text: string= never matches a <p> that has a <b> child)
+        draw_elem = lresult.find(lambda tag: tag.name == 'p' and re.search(r'Draw No\.:', tag.get_text(), re.I))
+        if not draw_elem:
+            draw_elem = lresult.find('h1')
+        
+        extracted_draw = str(draw_number)  # Default to provided number
+        if draw_elem:
+            draw_text = draw_elem.get_text()
+            draw_match = re.search(r'\d+', draw_text)
+            if draw_match:
+                extracted_draw = draw_match.group(0)
+        
+        # Extract date from <p><b>Date:</b> Thursday January 01, 2026</p>
+        # (None when the page has no date we can read, never the parse time)
+        date_elem = lresult.find(lambda tag: tag.name == 'p' and re.search(r'Date:', tag.get_text(), re.I))
+        draw_date = None
+        if date_elem:
+            date_text = date_elem.get_text()
+            # Remove "Date:" prefix and parse
+            date_str = re.sub(r'Date:', '', date_text, flags=re.I).strip()
+            draw_date = self._parse_date(date_str, fallback=None)
+        
+        # Extract winning numbers with ball type categorization
+        # Supports: Letter, Zodiac, Super Number, Regular Number, Promotional
+        winning_numbers = []
+        ball_lists = lresult.find_all('ol', class_='B')
+        for ball_list in ball_lists:
+            balls = ball_list.find_all('li', class_=re.compile(r'Number-|Zodiac|Color|Letter', re.I))
+            for ball in balls:
+                # Skip "More" buttons
+                if 'More' in ball.get('class', []):
+                    continue
+                
+                ball_text = ball.get_text(strip=True)
+                if not ball_text:
+                    continue
+                
+                ball_classes = ball.get('class', [])
+                ball_title = ball.get('title', '')
+                
+                # Determine ball type based on CSS classes and title
+                ball_type = 'number'  # default
+                
+                if 'Letter' in ball_classes or ball_title == 'Letter':
+                    ball_type = 'letter'
+                elif 'Zodiac' in ball_classes or ball_title == 'Zodiac':
+                    ball_type = 'zodiac'
+                elif ball_title == 'Super Number' or ('Circle' in ball_classes and 'Red' in ball_classes):
+                    ball_type = 'super'
+                elif 'Number-1' in ' '.join(ball_classes) and 'Square' in ball_classes:
+                    # Promotional draw numbers (Square Blue)
+                    ball_type = 'promotional'
+                elif re.match(r'^\d{1,2}$', ball_text):
+                    # Regular number
+                    ball_type = 'number'
+                
+                # Store as structured data: {"type": "letter", "value": "U"}
+                winning_numbers.append({
+                    "type": ball_type,
+                    "value": ball_text
+                })
+        
+        # Extract prize amount if available (from prize structure section)
+        prize_amount = None
+        prize_text = soup.find('div', class_='superprize')
+        if prize_text:
+            prize_match = re.search(r'Rs\.\s*([\d,]+\.?\d*)', prize_text.get_text())
+            if prize_match:
+                prize_amount = prize_match.group(1).replace(',', '')
+        
+        result = {
+            'lottery_name': registry.canonical_name(lottery_slug),
+            'draw_number': extracted_draw,
+            'draw_date': draw_date,
+            'winning_numbers': winning_numbers,
+            'prize_amount': prize_amount,
+            'additional_data': {
+                'source_url': url,
+                'scrape_method': 'individual_draw'
+            }
+        }
+        
+        logger.info(f"NLB: Extracted {lottery_slug} draw #{extracted_draw} - {len(winning_numbers)} numbers")
+        
+        return result
+    
     def scrape_latest_results(self) -> List[Dict]:
         """Scrape NLB results using flexible patterns (NOT hardcoded selectors)"""
+        self.page_unchanged = False
         try:
             logger.info(f"Fetching NLB results from: {self.results_url}")
-            response = requests.get(self.results_url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            if self.debug:
-                os.makedirs('nlb/misc', exist_ok=True)
-                self._save_debug_html(soup, 'nlb/misc/nlb_debug.html')
-            
-            results = []
-            
-            # Strategy 1: Look for tables using regex patterns
-            tables = soup.find_all('table', class_=re.compile(r'result|lottery|draw', re.I))
-            if not tables:
-                tables = soup.find_all('table')
-            
-            for table in tables:
-                parsed = self._parse_table_results(table)
-                results.extend(parsed)
-            
-            # Strategy 2: Look for divs/cards using regex
-            if not results:
-                sections = soup.find_all('div', class_=re.compile(r'result|lottery|card', re.I))
-                for section in sections:
-                    data = self._parse_result_section(section)
-                    if data:
-                        results.append(data)
-            
-            # Strategy 3: Text pattern matching for all NLB lotteries
-            if not results:
-                print("No structured NLB results found. Trying text patterns...")
-                results = self._parse_from_text(soup)
-            
+            headers = self.fetcher.request_headers(self.results_url) if self.fetcher else None
+            with scrape_stage('NLB', 'fetch') as stage:
+                response = self._fetch_page(self.results_url, headers)
+                stage.bytes = len(response.content)
+                self._archive(response, self.results_url)
+                response.raise_for_status()
+            
+            if self.fetcher and self.fetcher.is_unchanged(self.results_url, response):
+                self.page_unchanged = True
+                SCRAPE_UNCHANGED.inc(board='NLB')
+                return []
+            
+            with scrape_stage('NLB', 'parse'):
+                results = self.parse_results_page(response.content)
+            record_rows('NLB', 'parsed', len(results))
             logger.info(f"NLB: Found {len(results)} lottery results")
             return results
         except Exception as e:
             logger.error(f"Error scraping NLB: {e}")
+            if self.fetcher:
+                self.fetcher.forget(self.results_url)
             if self.debug:
                 import traceback
                 traceback.print_exc()
             return []
     
+    def parse_results_page(self, content: bytes) -> List[Dict]:
+        """Parse the NLB results page HTML into result dicts (no network)"""
+        soup = BeautifulSoup(content, self.parser)
+        
+        results = []
+        
+        # Strategy 1: Look for tables using regex patterns
+        tables = soup.find_all('table', class_=re.compile(r'result|lottery|draw', re.I))
+        if not tables:
+            tables = soup.find_all('table')
+        
+        for table in tables:
+            parsed = self._parse_table_results(table)
+            results.extend(parsed)
+        
+        # Strategy 2: Look for divs/cards using regex
+        if not results:
+            sections = soup.find_all('div', class_=re.compile(r'result|lottery|card', re.I))
+            for section in sections:
+                data = self._parse_result_section(section)
+                if data:
+                    results.append(data)
+        
+        # Strategy 3: Text pattern matching for all NLB lotteries
+        if not results:
+            print("No structured NLB results found. Trying text patterns...")
+            results = self._parse_from_text(soup)
+        
+        return results
+    
     def _parse_table_results(self, table) -> List[Dict]:
         """Parse table using pattern matching for all NLB lotteries"""
         results = []
@@ -527,11 +687,8 @@ class NLBScraper:
                 
                 row_text = ' '.join([cell.get_text(strip=True) for cell in cells])
                 
-                # Pattern for all NLB lottery types
-                lottery_match = re.search(
-                    r'(MAHAJANA SAMPATHA|VASANA SAMPATHA|GOVISETHA|SUPIRI WASANA|DHANA NIDHANAYA|SATURDAY SUPER BALL|SUNDAY MEGA JACKPOT|SHANIDA PATTARE|KOTIPATHI PATTARE)',
-                    row_text, re.I
-                )
+                # Any NLB lottery name from the registry
+                lottery_match = registry.name_pattern('NLB').search(row_text)
                 
                 if lottery_match:
                     lottery_name = lottery_match.group(1)
@@ -543,7 +700,7 @@ class NLBScraper:
                     winning_numbers = [n for n in numbers if int(n) < 100][:10]
                     
                     results.append({
-                        'lottery_name': lottery_name.lower().replace(' ', '_'),
+                        'lottery_name': registry.canonical_name(lottery_name),
                         'draw_number': draw_number,
                         'draw_date': draw_date,
                         'winning_numbers': winning_numbers,
@@ -558,19 +715,9 @@ class NLBScraper:
         try:
             text = section.get_text(separator=' ', strip=True)
             
-            lottery_names = [
-                'MAHAJANA SAMPATHA', 'VASANA SAMPATHA', 'GOVISETHA', 
-                'SUPIRI WASANA', 'DHANA NIDHANAYA', 'SATURDAY SUPER BALL',
-                'SUNDAY MEGA JACKPOT', 'SHANIDA PATTARE', 'KOTIPATHI PATTARE'
-            ]
-            
-            lottery_found = None
-            for name in lottery_names:
-                if name.upper() in text.upper():
-                    lottery_found = name
-                    break
+            lottery_match = registry.name_pattern('NLB').search(text)
             
-            if lottery_found:
+            if lottery_match:
                 draw_match = re.search(r'Draw\s*[#:]?\s*(\d+)|#(\d+)', text, re.I)
                 draw_number = draw_match.group(1) or draw_match.group(2) if draw_match else None
                 date_match = re.search(r'\d{4}[-/]\d{2}[-/]\d{2}|\d{2}[-/]\d{2}[-/]\d{4}', text)
@@ -579,7 +726,7 @@ class NLBScraper:
                 winning_numbers = [n for n in numbers if int(n) < 100][:10]
                 
                 return {
-                    'lottery_name': lottery_found.lower().replace(' ', '_'),
+                    'lottery_name': registry.canonical_name(lottery_match.group(1)),
                     'draw_number': draw_number,
                     'draw_date': draw_date,
                     'winning_numbers': winning_numbers,
@@ -597,9 +744,8 @@ class NLBScraper:
         if self.debug:
             print("\n=== NLB TEXT PARSING ===")
         
-        # Pattern for all NLB lotteries
-        pattern = r'(MAHAJANA SAMPATHA|MAHAJANA\s*SAMPATHA|VASANA SAMPATHA|VASANA\s*SAMPATHA|GOVISETHA|SUPIRI WASANA|SUPIRI\s*WASANA|DHANA NIDHANAYA|DHANA\s*NIDHANAYA|SATURDAY SUPER BALL|SUNDAY MEGA JACKPOT|SHANIDA PATTARE|KOTIPATHI PATTARE)'
-        matches = re.findall(pattern, text, re.IGNORECASE)
+        # Any NLB lottery name from the registry
+        matches = registry.name_pattern('NLB').findall(text)
         
         if self.debug:
             print(f"Found {len(matches)} NLB lottery mentions")
@@ -616,7 +762,7 @@ class NLBScraper:
                 winning_nums = [n for n in number_matches if int(n) < 100][:10]
                 
                 results.append({
-                    'lottery_name': lottery_clean.lower().replace(' ', '_'),
+                    'lottery_name': registry.canonical_name(lottery_clean),
                     'draw_number': draw_number,
                     'draw_date': self._parse_date(date_match.group(0)) if date_match else datetime.now(),
                     'winning_numbers': winning_nums,
@@ -625,107 +771,116 @@ class NLBScraper:
         
         return results
     
-    def _parse_date(self, date_str: str) -> datetime:
-        """Parse date string"""
+    def _parse_date(self, date_str: str, fallback=datetime.now) -> Optional[datetime]:
+        """Parse date string (fallback() when it can't be parsed, None if fallback is None)"""
         try:
             date_str = date_str.strip().upper()
             date_str = re.sub(r'(MONDAY|TUESDAY|WEDNESDAY|THURSDAY|FRIDAY|SATURDAY|SUNDAY)', '', date_str).strip()
-            formats = ['%Y-%b-%d', '%Y-%m-%d', '%d-%b-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%Y', '%m/%d/%Y']
+            formats = ['%Y-%b-%d', '%Y-%m-%d', '%d-%b-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%Y', '%m/%d/%Y',
+                       '%B %d, %Y', '%b %d, %Y']   # draw pages: "January 01, 2026"
             for fmt in formats:
                 try:
                     return datetime.strptime(date_str, fmt)
                 except:
                     continue
-            return datetime.now()
-        except:
-            return datetime.now()
-    
-    def _save_debug_html(self, soup, filename):
-        """Save HTML for debugging"""
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(soup.prettify())
-            print(f"Debug HTML saved to {filename}")
         except:
             pass
+        return fallback() if fallback else None
+    
+    def _archive(self, response, url: str, lottery_slug: Optional[str] = None, draw_number: Optional[int] = None):
+        """Hand a raw NLB page to the page archive (replaces the old prettified debug dumps)"""
+        content_hash = page_archive.archive(response.content, url, 'NLB', lottery_slug, draw_number,
+                                            status_code=response.status_code)
+        if self.debug and content_hash:
+            print(f"NLB page archived: python page_archive.py show {content_hash[:16]} > nlb.html")
     
     def save_results(self, results: List[Dict]) -> int:
         """Save results to database"""
-        db = SessionLocal()
-        saved_count = 0
-        duplicate_count = 0
-        
+        if not results:
+            if self.fetcher:
+                self.fetcher.remember()
+            return 0
         try:
-            for result in results:
-                existing = db.query(LotteryResult).filter(
-                    LotteryResult.lottery_name == result['lottery_name'],
-                    LotteryResult.draw_number == result['draw_number']
-                ).first()
-                
-                if not existing:
-                    lottery_result = LotteryResult(
-                        lottery_name=result['lottery_name'],
-                        draw_number=result['draw_number'],
-                        draw_date=result['draw_date'],
-                        winning_numbers=result['winning_numbers'],
-                        prize_amount=result.get('prize_amount'),
-                        additional_data=result.get('additional_data', {})
-                    )
-                    db.add(lottery_result)
-                    saved_count += 1
-                    logger.info(f"NLB: Saved {result['lottery_name']} draw #{result['draw_number']}")
-                else:
-                    duplicate_count += 1
-                    logger.debug(f"NLB: Duplicate skipped - {result['lottery_name']} draw #{result['draw_number']}")
-            
-            db.commit()
-            if duplicate_count > 0:
-                logger.info(f"NLB: Skipped {duplicate_count} duplicates")
-            return saved_count
+            with scrape_stage('NLB', 'save'):
+                counts = bulk_save_results(results, board='NLB')
+            record_saved('NLB', counts)
+            if self.fetcher:
+                self.fetcher.remember()
+            logger.info(f"NLB: Saved {counts['inserted']} new results")
+            if counts['duplicates'] > 0:
+                logger.info(f"NLB: Skipped {counts['duplicates']} duplicates")
+            return counts['inserted']
         except Exception as e:
             logger.error(f"Error saving NLB results: {e}")
-            db.rollback()
             return 0
-        finally:
-            db.close()
 
 
-def run_scraper(debug=False):
-    """Run both scrapers"""
-    logger.info("="*60)
-    logger.info("Starting lottery scraper")
-    logger.info("="*60)
-    
-    logger.info("--- DLB (Development Lotteries Board) ---")
-    dlb = DLBScraper(debug=debug)
-    dlb_results = dlb.scrape_latest_results()
-    dlb_saved = dlb.save_results(dlb_results)
-    logger.info(f"DLB: Found {len(dlb_results)} results, saved {dlb_saved} new")
-    
-    if debug and dlb_results:
-        for r in dlb_results[:3]:
-            logger.debug(f"  - {r['lottery_name']}: #{r['draw_number']}, Numbers: {r['winning_numbers']}")
-    
-    logger.info("--- NLB (National Lotteries Board) ---")
-    nlb = NLBScraper(debug=debug)
-    nlb_results = nlb.scrape_latest_results()
-    nlb_saved = nlb.save_results(nlb_results)
-    logger.info(f"NLB: Found {len(nlb_results)} results, saved {nlb_saved} new")
-    
-    if debug and nlb_results:
-        for r in nlb_results[:3]:
-            logger.debug(f"  - {r['lottery_name']}: #{r['draw_number']}, Numbers: {r['winning_numbers']}")
-    
-    logger.info("="*60)
-    logger.info(f"Scraper completed. Total saved: {dlb_saved + nlb_saved}")
-    logger.info("="*60)
-    return dlb_saved + nlb_saved
+def run_scraper(debug=False, boards=('DLB', 'NLB'), report=None, source='cli', job_id=None, profile=None):
+    """
+    Run the results-page scrapers for the given boards (both by default)
+    
+    If `report` is a dict, each board's {found, saved, unchanged, seconds} is
+    added to it as soon as that board finishes (scrape job progress).
+    
+    The run is recorded in the scrape_runs ledger under `source` / `job_id`;
+    profile=True attaches a cProfile report (default: SCRAPE_PROFILE).
+    """
+    with recording(source, boards, job_id, profile):
+        logger.info("="*60)
+        logger.info("Starting lottery scraper")
+        logger.info("="*60)
+    
+        dlb_saved = nlb_saved = 0
+    
+        if 'DLB' in boards:
+            logger.info("--- DLB (Development Lotteries Board) ---")
+            started = time.perf_counter()
+            dlb = DLBScraper(debug=debug, conditional=not debug)
+            dlb_results = dlb.scrape_latest_results()
+            dlb_saved = dlb.save_results(dlb_results)
+            if dlb.page_unchanged:
+                logger.info("DLB: Results page unchanged since last run, parse and save skipped")
+            else:
+                logger.info(f"DLB: Found {len(dlb_results)} results, saved {dlb_saved} new")
+            if report is not None:
+                report['DLB'] = {'found': len(dlb_results), 'saved': dlb_saved, 'unchanged': dlb.page_unchanged,
+                                 'seconds': round(time.perf_counter() - started, 3)}
+        
+            if debug and dlb_results:
+                for r in dlb_results[:3]:
+                    logger.debug(f"  - {r['lottery_name']}: #{r['draw_number']}, Numbers: {r['winning_numbers']}")
+    
+        if 'NLB' in boards:
+            logger.info("--- NLB (National Lotteries Board) ---")
+            started = time.perf_counter()
+            nlb = NLBScraper(debug=debug, conditional=not debug)
+            nlb_results = nlb.scrape_latest_results()
+            nlb_saved = nlb.save_results(nlb_results)
+            if nlb.page_unchanged:
+                logger.info("NLB: Results page unchanged since last run, parse and save skipped")
+            else:
+                logger.info(f"NLB: Found {len(nlb_results)} results, saved {nlb_saved} new")
+            if report is not None:
+                report['NLB'] = {'found': len(nlb_results), 'saved': nlb_saved, 'unchanged': nlb.page_unchanged,
+                                 'seconds': round(time.perf_counter() - started, 3)}
+        
+            if debug and nlb_results:
+                for r in nlb_results[:3]:
+                    logger.debug(f"  - {r['lottery_name']}: #{r['draw_number']}, Numbers: {r['winning_numbers']}")
+    
+        logger.info("="*60)
+        logger.info(f"Scraper completed. Total saved: {dlb_saved + nlb_saved}")
+        logger.info("="*60)
+        return dlb_saved + nlb_saved
 
 
 if __name__ == "__main__":
     import sys
     debug_mode = '--debug' in sys.argv
+    profile_mode = '--profile' in sys.argv
     print("Sri Lankan Lottery Scraper\n" + "=" * 60)
     if debug_mode:
-        print("🔍 DEBUG MODE - HTML will be saved for inspection")
-    run_scraper(debug=debug_mode)
+        print("🔍 DEBUG MODE - fetched pages can be read back with page_archive.py")
+    if profile_mode:
+        print("⏱️ PROFILE MODE - cProfile report stored with the scrape run")
+    run_scraper(debug=debug_mode, profile=profile_mode or None)
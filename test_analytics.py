@@ -0,0 +1,149 @@
+"""
+Analytics aggregates on a temporary SQLite database
+Summaries kept up to date from the save path (add_draws via _apply_new_draws,
+including draws buffered in _pending during a load) must match a fresh _load
+from ball_index, and corrections must not leave stale aggregates behind
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import analytics
+from database import LotteryResult, SessionLocal, bulk_save_results, update_results
+
+WINDOWS = [(None, None), (date(2026, 2, 1), date(2026, 3, 15)), (date(2026, 4, 1), None), (None, date(2026, 1, 10))]
+
+
+def _result(draw, day, balls, lottery='govisetha'):
+    return {
+        'lottery_name': lottery,
+        'draw_number': str(draw),
+        'draw_date': datetime(2026, 1, 1) + timedelta(days=day - 1),
+        'board': 'NLB',
+        'winning_numbers': list(balls),
+        'prize_amount': None,
+        'additional_data': {},
+    }
+
+
+def _random_draws(first, count, seed):
+    """Draw `first` onwards, one a day: a letter and four of 80 numbers (well past the initial matrix size)"""
+    rng = random.Random(seed)
+    return [
+        _result(draw, draw - 4000, [rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')] + [str(n) for n in rng.sample(range(1, 81), 4)])
+        for draw in range(first, first + count)
+    ]
+
+
+def _normalized(summary):
+    """Summary with tied entries in value order (ties are otherwise in column order, which depends on load order)"""
+    def by_value(entries):
+        return sorted(entries, key=lambda entry: (-entry['count'], analytics._sort_key(entry['value'])))
+    return {
+        **summary,
+        'hot_numbers': by_value(summary['hot_numbers']),
+        'cold_numbers': by_value(summary['cold_numbers']),
+        'top_pairs': sorted(summary['top_pairs'], key=lambda entry: (-entry['count'], entry['pair'])),
+    }
+
+
+def _assert_matches_full_load(db, lottery='govisetha'):
+    cached = analytics._aggregates[lottery]
+    full = analytics._load(db, lottery)
+    assert cached.draw_ids == full.draw_ids
+    for from_date, to_date in WINDOWS:
+        # top covers every number and pair, so both sides list the same entries
+        incremental = analytics.lottery_summary(db, lottery, from_date, to_date, top=5000)
+        assert _normalized(incremental) == _normalized(full.summary(from_date, to_date, top=5000))
+
+
+@pytest.fixture(autouse=True)
+def fresh_aggregates():
+    analytics._aggregates.clear()
+    analytics._pending.clear()
+    analytics._corrections.clear()
+    yield
+    analytics._aggregates.clear()
+
+
+def test_corrections_drop_loaded_aggregates(db):
+    bulk_save_results([_result(4303, 1, ('R', '22', '33')), _result(4304, 2, ('S', '22', '40'))], db)
+    db.commit()
+    assert analytics.lottery_summary(db, 'govisetha')['hot_numbers'][0] == {
+        'value': '22', 'count': 2, 'frequency': 1.0, 'last_seen': '2026-01-02',
+    }
+
+    stored = db.query(LotteryResult).filter(LotteryResult.draw_number == '4304').one()
+    update_results(db, [{'id': stored.id, 'draw_date': datetime(2026, 1, 5),
+                         'winning_numbers': ['S', '11', '40'], 'prize_amount': None}])
+    assert 'govisetha' in analytics._aggregates   # nothing changes before the commit
+    db.commit()
+    assert 'govisetha' not in analytics._aggregates
+
+    summary = analytics.lottery_summary(db, 'govisetha')
+    counts = {entry['value']: (entry['count'], entry['last_seen']) for entry in summary['hot_numbers']}
+    assert counts == {'11': (1, '2026-01-05'), '22': (1, '2026-01-01'), '33': (1, '2026-01-01'),
+                      '40': (1, '2026-01-05')}
+
+
+def test_load_overlapping_a_correction_is_not_cached(db, monkeypatch):
+    bulk_save_results([_result(4303, 1, ('R', '22', '33'))], db)
+    db.commit()
+
+    real_load = analytics._load
+
+    def load_then_correct(session, lottery_name):
+        aggregates = real_load(session, lottery_name)
+        analytics._drop_corrected({lottery_name})   # a correction commits while the load runs
+        return aggregates
+
+    monkeypatch.setattr(analytics, '_load', load_then_correct)
+    analytics.lottery_summary(db, 'govisetha')
+    assert 'govisetha' not in analytics._aggregates
+
+
+def test_incremental_updates_match_a_full_load(db):
+    bulk_save_results(_random_draws(4001, 30, seed=1), db)
+    db.commit()
+    assert analytics.lottery_summary(db, 'govisetha')['draws'] == 30   # loaded and cached
+
+    for first in (4031, 4101, 4102):   # one large save that grows the matrix, then single draws
+        bulk_save_results(_random_draws(first, 70 if first == 4031 else 1, seed=first), db)
+        db.commit()
+    assert analytics._aggregates['govisetha'].size == 102
+    _assert_matches_full_load(db)
+
+
+@pytest.mark.parametrize('query_sees_them', [False, True], ids=['after-query', 'before-query'])
+def test_draws_saved_during_a_load(db, monkeypatch, query_sees_them):
+    """Draws committed while _load runs reach the cached aggregates once, whether or not its query saw them"""
+    bulk_save_results(_random_draws(4001, 40, seed=2), db)
+    db.commit()
+
+    real_load = analytics._load
+
+    def save_concurrently():
+        other = SessionLocal()
+        try:
+            bulk_save_results(_random_draws(4041, 25, seed=3), other)
+            other.commit()
+        finally:
+            other.close()
+        assert len(analytics._pending['govisetha'][0]) == 25
+
+    def load(session, lottery_name):
+        if query_sees_them:
+            save_concurrently()
+            return real_load(session, lottery_name)
+        aggregates = real_load(session, lottery_name)
+        save_concurrently()
+        return aggregates
+
+    monkeypatch.setattr(analytics, '_load', load)
+    assert analytics.lottery_summary(db, 'govisetha')['draws'] == 65
+    monkeypatch.setattr(analytics, '_load', real_load)
+
+    assert 'govisetha' not in analytics._pending
+    _assert_matches_full_load(db)
@@ -0,0 +1,155 @@
+"""
+API endpoints against a temporary SQLite database
+The app runs under uvicorn on a local port: keyset pagination cursors, ETag
+revalidation, NDJSON batch verification and export resume, including draws
+without a date (draw_date NULL)
+"""
+
+import json
+import socket
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+import requests
+import uvicorn
+
+from api import app, decode_cursor, encode_cursor
+from database import LotteryResult, bulk_save_results
+
+
+def _result(draw, day, balls=('R', '22', '33'), lottery='govisetha', hour=0):
+    return {
+        'lottery_name': lottery,
+        'draw_number': str(draw),
+        'draw_date': datetime(2026, 1, day, hour) if day else None,
+        'board': 'NLB',
+        'winning_numbers': [{'type': 'letter' if ball.isalpha() else 'number', 'value': ball} for ball in balls],
+        'prize_amount': None,
+        'additional_data': {},
+    }
+
+
+@pytest.fixture(scope='module')
+def api_url():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if server.started:
+            break
+        time.sleep(0.05)
+    yield f'http://127.0.0.1:{port}'
+    server.should_exit = True
+    thread.join(5)
+
+
+@pytest.fixture
+def draws(db):
+    """24 dated govisetha draws (two a day on some days, to exercise the id tie-break) and two undated ones"""
+    results = [_result(4300 + n, 1 + n // 2, hour=0) for n in range(24)]
+    results += [_result(5001, None), _result(5002, None, balls=('S', '11'))]
+    bulk_save_results(results, db)
+    db.commit()
+    return db.query(LotteryResult).all()
+
+
+def _newest_first(rows):
+    dated = [row for row in rows if row.draw_date is not None]
+    return [row.id for row in sorted(dated, key=lambda row: (row.draw_date, row.id), reverse=True)]
+
+
+def test_cursor_round_trip():
+    for draw_date in (datetime(2026, 1, 4, 21, 30), None):
+        cursor = encode_cursor(SimpleNamespace(draw_date=draw_date, id=1000))
+        assert decode_cursor(cursor) == (draw_date, 1000)
+
+
+@pytest.mark.parametrize('path', ['/api/results/latest', '/api/results/govisetha'])
+def test_pages_follow_cursors(api_url, draws, path):
+    ids, cursor, pages = [], None, 0
+    while True:
+        response = requests.get(api_url + path, params={'limit': 10, 'cursor': cursor})
+        assert response.status_code == 200
+        ids += [row['id'] for row in response.json()]
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert ids == _newest_first(draws)   # every dated draw once, in keyset order; undated ones are not listed
+    assert pages == 3
+
+
+@pytest.mark.parametrize('cursor', ['not base64!', 'bm8tc2VwYXJhdG9y', 'MjAyNi0wMS0wMXxub3QtYW4taWQ'])
+def test_bad_cursor(api_url, draws, cursor):
+    response = requests.get(api_url + '/api/results/latest', params={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invalid cursor'
+
+
+def test_etag_revalidation(api_url, draws, db):
+    url = api_url + '/api/results/latest'
+    first = requests.get(url)
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+
+    for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+        response = requests.get(url, headers={'If-None-Match': header})
+        assert response.status_code == 304 and response.content == b''
+        assert response.headers['ETag'] == etag
+    assert requests.get(url, headers={'If-None-Match': '"other"'}).status_code == 200
+
+    bulk_save_results([_result(4400, 28)], db)
+    db.commit()
+    changed = requests.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert changed.json()[0]['draw_number'] == '4400'
+
+
+def test_batch_verify_ndjson(api_url, draws):
+    tickets = [
+        {'ticket_id': 'a', 'lottery_name': 'govisetha', 'draw_number': '4300', 'ticket_numbers': ['22', 'letter:R']},
+        {'ticket_id': 'b', 'lottery_name': 'govisetha', 'draw_date': '2026/01/01', 'ticket_numbers': ['22']},
+        {'ticket_id': 'c', 'lottery_name': 'govisetha', 'draw_number': '9999', 'ticket_numbers': ['22']},
+        {'ticket_id': 'd', 'lottery_name': 'Govisetha', 'draw_number': '5002', 'ticket_numbers': ['11', '40']},
+        {'ticket_id': 'e', 'lottery_name': 'govisetha', 'draw_date': '2026-01-01', 'ticket_numbers': ['40']},
+    ]
+    response = requests.post(api_url + '/api/verify/batch', json={'tickets': tickets})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == len(tickets) + 1
+
+    a, b, c, d, e, summary = lines
+    assert [line['index'] for line in lines[:-1]] == [0, 1, 2, 3, 4]
+    assert (a['ticket_id'], a['is_winner'], a['draw_date']) == ('a', True, '2026-01-01T00:00:00')
+    assert b == {'index': 1, 'ticket_id': 'b', 'error': 'Invalid date format. Use YYYY-MM-DD'}
+    assert c == {'index': 2, 'ticket_id': 'c', 'error': 'No matching lottery draw found'}
+    assert (d['matched_numbers'], d['draw_date']) == (['11'], None)   # an undated draw still verifies
+    assert (e['is_winner'], e['match_count']) == (False, 0)
+    assert summary == {'summary': {'tickets': 5, 'winners': 2, 'draws': 2}}   # e's date resolves to a's draw
+
+
+def _export(api_url, **params):
+    response = requests.get(api_url + '/api/export', params={'format': 'ndjson', **params})
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_resumes_from_any_row(api_url, draws):
+    records = _export(api_url)
+    undated = sorted(row.id for row in draws if row.draw_date is None)
+    dated = _newest_first(draws)[::-1]
+    assert [record['id'] for record in records] == undated + dated   # undated first, then oldest first
+    assert records[0]['draw_date'] is None
+
+    for k in (0, 1, 2, 13, len(records) - 1):   # resume after undated and dated rows alike
+        resumed = _export(api_url, cursor=records[k]['cursor'])
+        assert [record['id'] for record in resumed] == [record['id'] for record in records[k + 1:]]
+
+    assert requests.get(api_url + '/api/export', params={'cursor': 'not base64!'}).status_code == 400
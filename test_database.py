@@ -0,0 +1,150 @@
+"""
+Bulk result saving and schema migration on a temporary SQLite database
+Covers bulk_save_results' chunked INSERT ... ON CONFLICT DO NOTHING (with and
+without RETURNING), duplicate counting, the derived ball_index / lottery_stats
+rows, and migrate_db on a legacy lottery_results table
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import false, inspect, text
+
+import database
+from database import BallIndex, LotteryResult, LotteryStats, bulk_save_results, engine, init_db
+
+
+def _result(draw, lottery='govisetha', day=1, balls=('R', '22', '33')):
+    return {
+        'lottery_name': lottery,
+        'draw_number': str(draw),
+        'draw_date': datetime(2026, 1, day),
+        'board': 'NLB',
+        'winning_numbers': list(balls),
+        'prize_amount': None,
+        'additional_data': {'source_url': f'https://www.nlb.lk/results/{lottery}/{draw}'},
+    }
+
+
+@pytest.fixture(params=[True, False], ids=['returning', 'max-id'])
+def insert_path(request, monkeypatch):
+    """Run a test through both the RETURNING branch and the pre-insert MAX(id) fallback"""
+    monkeypatch.setattr(engine.dialect, 'insert_returning', request.param)
+    return request.param
+
+
+def _stats(db, lottery='govisetha'):
+    return db.query(LotteryStats).filter(LotteryStats.lottery_name == lottery).one()
+
+
+def test_insert_then_reinsert(db, insert_path):
+    results = [_result(4303, day=1), _result(4304, day=2), _result(4305, day=3)]
+    assert bulk_save_results(results, db) == {'inserted': 3, 'duplicates': 0}
+    db.commit()
+    assert bulk_save_results(results, db) == {'inserted': 0, 'duplicates': 3}
+    db.commit()
+
+    assert db.query(LotteryResult).count() == 3
+    assert db.query(BallIndex).count() == 9
+    stats = _stats(db)
+    assert (stats.draws, stats.first_draw_date, stats.last_draw_date) == (3, datetime(2026, 1, 1), datetime(2026, 1, 3))
+
+
+def test_stats_upsert_folds_later_saves(db):
+    """lottery_stats rows are created by the first save and widened by the later ones"""
+    bulk_save_results([_result(4304, day=2), _result(100, lottery='sasiri', day=5)], db)
+    db.commit()
+    bulk_save_results([_result(4303, day=1), _result(4305, day=3)], db)
+    db.commit()
+
+    stats = _stats(db)
+    assert (stats.draws, stats.first_draw_date, stats.last_draw_date) == (3, datetime(2026, 1, 1), datetime(2026, 1, 3))
+    assert stats.board == 'NLB'
+    assert _stats(db, 'sasiri').draws == 1
+
+
+def test_duplicates_within_a_batch(db, insert_path):
+    first = _result(4303, balls=('1', '2'))
+    repeat = _result(4303, balls=('8', '9'))
+    assert bulk_save_results([first, repeat, _result(4304)], db) == {'inserted': 2, 'duplicates': 1}
+    db.commit()
+    stored = db.query(LotteryResult).filter(LotteryResult.draw_number == '4303').one()
+    assert stored.winning_numbers == ['1', '2']   # the first occurrence wins
+
+
+def test_mixed_batch_across_chunks(db, insert_path, monkeypatch):
+    monkeypatch.setattr(database, 'BULK_CHUNK_SIZE', 2)
+    bulk_save_results([_result(n, day=n - 4300) for n in (4301, 4303, 4305)], db)
+    db.commit()
+
+    batch = [_result(n, day=n - 4300) for n in range(4301, 4308)]   # 3 stored, 4 new, interleaved
+    assert bulk_save_results(batch, db) == {'inserted': 4, 'duplicates': 3}
+    db.commit()
+
+    assert db.query(LotteryResult).count() == 7
+    assert db.query(BallIndex).count() == 7 * 3
+    assert _stats(db).draws == 7
+
+
+def test_rows_skipped_by_on_conflict_are_not_indexed(db, insert_path):
+    """A draw stored after the existing-keys lookup (another writer) is skipped by ON CONFLICT, not indexed again"""
+    bulk_save_results([_result(4303)], db)
+    db.commit()
+
+    real_query, lookups = db.query, []
+
+    def query(*entities):
+        if not lookups:   # the existing-keys lookup misses the stored draw
+            lookups.append(entities)
+            return real_query(*entities).filter(false())
+        return real_query(*entities)
+
+    db.query = query
+    try:
+        assert bulk_save_results([_result(4303), _result(4304)], db) == {'inserted': 1, 'duplicates': 1}
+        db.commit()
+    finally:
+        db.query = real_query
+
+    assert db.query(BallIndex).count() == 2 * 3
+    assert _stats(db).draws == 2
+
+
+def test_migrate_legacy_table(db):
+    """A pre-board table with duplicate draws gets its boards, unique index and derived tables"""
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE ball_index"))
+        conn.execute(text("DROP TABLE lottery_results"))
+        conn.execute(text("DELETE FROM lottery_stats"))
+        conn.execute(text("""
+            CREATE TABLE lottery_results (
+                id INTEGER PRIMARY KEY, lottery_name VARCHAR, draw_number VARCHAR, draw_date DATETIME,
+                winning_numbers JSON, prize_amount VARCHAR, additional_data JSON, scraped_at DATETIME
+            )
+        """))
+        rows = [
+            ('govisetha', '4303', '["22", "33"]', '{}'),
+            ('govisetha', '4303', '["22", "33"]', '{}'),              # duplicate draw
+            ('sasiri', '100', '["1", "2"]', '{}'),
+            ('not_registered', '7', '["5"]', '{"source_url": "https://www.nlb.lk/results/x/7"}'),
+            ('also_unknown', '8', '["6"]', '{}'),
+        ]
+        for lottery_name, draw_number, numbers, extra in rows:
+            conn.execute(text("""
+                INSERT INTO lottery_results (lottery_name, draw_number, draw_date, winning_numbers, additional_data)
+                VALUES (:lottery_name, :draw_number, '2026-01-01 00:00:00.000000', :numbers, :extra)
+            """), {"lottery_name": lottery_name, "draw_number": draw_number, "numbers": numbers, "extra": extra})
+
+    init_db()
+
+    boards = dict(db.query(LotteryResult.lottery_name, LotteryResult.board))
+    assert boards == {'govisetha': 'NLB', 'sasiri': 'DLB', 'not_registered': 'NLB', 'also_unknown': None}
+    assert db.query(LotteryResult).count() == 4
+    assert 'uq_lottery_results_name_draw' in {i['name'] for i in inspect(engine).get_indexes('lottery_results')}
+    assert db.query(BallIndex).count() == 2 + 2 + 1 + 1
+    assert _stats(db).draws == 1
+
+    # Nothing left to do on the next start
+    init_db()
+    assert db.query(LotteryResult).count() == 4
+    assert bulk_save_results([_result(4303)], db) == {'inserted': 0, 'duplicates': 1}
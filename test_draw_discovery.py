@@ -0,0 +1,91 @@
+"""
+Draw-number discovery over the saved HTML corpus
+Runs DrawFinder's searches against the nlb/govisetha draw pages (4303-4306,
+held 2026-01-01 to 2026-01-04) through the real draw page parser
+"""
+
+import logging
+import os
+import re
+from datetime import date, datetime
+
+import pytest
+
+from draw_discovery import DrawFinder, draw_day
+from scraper import NLBScraper
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+logging.disable(logging.WARNING)
+
+
+class CorpusScraper(NLBScraper):
+    """Draw pages come from nlb/<slug>/; a draw without a saved page does not exist"""
+
+    def scrape_individual_draw(self, lottery_slug, draw_number):
+        path = os.path.join(ROOT, 'nlb', lottery_slug, f'nlb_{lottery_slug}_{draw_number}_scrape.html')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return self.parse_draw_page(f.read(), lottery_slug, draw_number)
+
+
+def _undated(content: bytes) -> bytes:
+    """A draw page with its <p><b>Date:</b> ...</p> paragraph removed"""
+    return re.sub(rb'<p>\s*<b>\s*Date:.*?</p>', b'', content, flags=re.S | re.I)
+
+
+class UndatedScraper(CorpusScraper):
+    """Corpus pages without their date paragraph, through the real parser"""
+
+    def parse_draw_page(self, content, lottery_slug, draw_number, url=None):
+        return super().parse_draw_page(_undated(content), lottery_slug, draw_number, url)
+
+
+class CorpusFinder(DrawFinder):
+    """Nothing stored: every answer comes from probing the corpus"""
+
+    def _stored_days(self):
+        return {}
+
+
+def test_draw_pages_have_dates():
+    """The corpus draw pages parse to their real draw date, not the parse time"""
+    with open(os.path.join(ROOT, 'nlb', 'govisetha', 'nlb_govisetha_4303_scrape.html'), 'rb') as f:
+        result = NLBScraper().parse_draw_page(f.read(), 'govisetha', 4303)
+    assert result['draw_date'] == datetime(2026, 1, 1)
+
+
+def test_undated_page_has_no_date():
+    """A page without a date parses to draw_date None, not the parse time"""
+    with open(os.path.join(ROOT, 'nlb', 'govisetha', 'nlb_govisetha_4303_scrape.html'), 'rb') as f:
+        page = f.read()
+    content = _undated(page)
+    assert len(content) < len(page)
+    result = NLBScraper().parse_draw_page(content, 'govisetha', 4303)
+    assert result['draw_number'] == '4303' and result['winning_numbers']
+    assert result['draw_date'] is None
+    assert draw_day(result['draw_date']) is None
+
+
+def test_latest_draw():
+    finder = CorpusFinder('govisetha', CorpusScraper())
+    assert finder.latest() == 4306
+    assert finder.probes < 10
+
+
+def test_dates_to_draw_numbers():
+    finder = CorpusFinder('govisetha', CorpusScraper())
+    assert finder.first_on_or_after(date(2026, 1, 1)) == 4303
+    assert finder.first_on_or_after(date(2025, 12, 1)) == 4303
+    assert finder.first_on_or_after(date(2026, 1, 3)) == 4305
+    assert finder.first_on_or_after(date(2026, 2, 1)) == 4307   # nothing held yet
+    assert finder.draws_between(date(2026, 1, 2), date(2026, 1, 3)) == range(4304, 4306)
+    assert finder.draws_between(date(2026, 1, 1)) == range(4303, 4307)
+    assert finder.probes < 40
+
+
+def test_undated_pages_raise():
+    finder = CorpusFinder('govisetha', UndatedScraper())
+    with pytest.raises(ValueError):
+        finder.first_on_or_after(date(2026, 1, 1))
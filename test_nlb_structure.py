@@ -6,18 +6,9 @@ This will help us understand the HTML and build proper scrapers
 import requests
 from bs4 import BeautifulSoup
 import json
+from datetime import date
 
-# NLB lottery configurations with their Jan 1 draw numbers
-NLB_LOTTERIES = {
-    'suba-dawasak': {'jan1_draw': 177, 'display_name': 'SUBA DAWASAK'},
-    'nlb-jaya': {'jan1_draw': 329, 'display_name': 'NLB JAYA'},
-    'ada-sampatha': {'jan1_draw': 636, 'display_name': 'ADA SAMPATHA'},
-    'handahana': {'jan1_draw': 1370, 'display_name': 'HANDAHANA'},
-    'dhana-nidhanaya': {'jan1_draw': 2091, 'display_name': 'DHANA NIDHANAYA'},
-    'mega-power': {'jan1_draw': 2409, 'display_name': 'MEGA POWER'},
-    'govisetha': {'jan1_draw': 4303, 'display_name': 'GOVISETHA'},
-    'mahajana-sampatha': {'jan1_draw': 6061, 'display_name': 'MAHAJANA SAMPATHA'},
-}
+from lottery_registry import registry
 
 def test_nlb_page(lottery_slug, draw_number):
     """Fetch and analyze a single NLB lottery result page"""
@@ -142,8 +133,7 @@ def main():
     test_lotteries = ['suba-dawasak', 'mahajana-sampatha', 'govisetha']
     
     for lottery_slug in test_lotteries:
-        lottery_info = NLB_LOTTERIES[lottery_slug]
-        draw_num = lottery_info['jan1_draw']
+        draw_num = registry.by_slug(lottery_slug).draw_for_date(date(2026, 1, 1))
         
         success = test_nlb_page(lottery_slug, draw_num)
         results[lottery_slug] = success
@@ -0,0 +1,85 @@
+"""
+Parse engine parity over the saved HTML corpus
+Checks that the fast (lxml subtree) engine returns exactly what the full
+BeautifulSoup engine returns for every page in nlb/ and dlb/
+"""
+
+import glob
+import logging
+import os
+import re
+from datetime import timedelta
+
+from scraper import DLBScraper, NLBScraper
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+logging.disable(logging.WARNING)
+
+
+def _same(fast, full):
+    """Compare parse results; dates that fell back to now() only need to be close"""
+    if fast is None or full is None:
+        return fast is None and full is None
+    fast, full = dict(fast), dict(full)
+    fast_date, full_date = fast.pop('draw_date'), full.pop('draw_date')
+    if fast_date is None or full_date is None:
+        if fast_date is not full_date:
+            return False
+    elif abs(fast_date - full_date) > timedelta(minutes=1):
+        return False
+    return fast == full
+
+
+def _nlb_pages():
+    for path in sorted(glob.glob(os.path.join(ROOT, 'nlb', '*', 'nlb_*_*.html'))):
+        match = re.match(r'nlb_(.+)_(\d+)_\w+\.html$', os.path.basename(path))
+        if match:
+            yield path, match.group(1), int(match.group(2))
+
+
+def test_nlb_draw_parity():
+    """Fast and full engines agree on every saved NLB draw page"""
+    pages = list(_nlb_pages())
+    assert pages, "No NLB pages in corpus"
+
+    for builder in ['html.parser', 'lxml']:
+        fast = NLBScraper(parser=builder, engine='fast')
+        full = NLBScraper(parser=builder, engine='full')
+        for path, slug, draw in pages:
+            with open(path, 'rb') as f:
+                content = f.read()
+            assert _same(fast.parse_draw_page(content, slug, draw), full.parse_draw_page(content, slug, draw)), \
+                f"{builder}: fast/full mismatch for {path}"
+
+
+def test_dlb_results_parity():
+    """Fast and full engines agree on the saved DLB results page"""
+    pages = sorted(glob.glob(os.path.join(ROOT, 'dlb', '*', '*.html')))
+    assert pages, "No DLB pages in corpus"
+
+    for builder in ['html.parser', 'lxml']:
+        fast = DLBScraper(parser=builder, engine='fast')
+        full = DLBScraper(parser=builder, engine='full')
+        for path in pages:
+            with open(path, 'rb') as f:
+                content = f.read()
+            fast_results = fast.parse_results_page(content)
+            full_results = full.parse_results_page(content)
+            assert fast_results, f"No results parsed from {path}"
+            assert len(fast_results) == len(full_results), f"{builder}: result count differs for {path}"
+            for a, b in zip(fast_results, full_results):
+                assert _same(a, b), f"{builder}: fast/full mismatch for {path}: {a} != {b}"
+
+
+def test_fast_engine_without_result_block():
+    """Challenge pages parse to None without building the full soup"""
+    challenge = b"<html><script>setCookie('human','abc',1); location.reload();</script></html>"
+    assert NLBScraper(engine='fast').parse_draw_page(challenge, 'govisetha', 1) is None
+
+
+if __name__ == "__main__":
+    test_nlb_draw_parity()
+    test_dlb_results_parity()
+    test_fast_engine_without_result_block()
+    print("✓ Fast and full parse engines agree on the whole corpus")
@@ -29,7 +29,7 @@ def test_dlb():
             print(f"    Prize: {result['prize_amount']}")
     else:
         print("\n❌ No results found!")
-        print("   Check dlb_debug.html to inspect the actual HTML structure")
+        print("   Inspect the fetched page: python page_archive.py list --source DLB, then show <hash>")
     
     return results
 
@@ -56,7 +56,7 @@ def test_nlb():
             print(f"    Prize: {result['prize_amount']}")
     else:
         print("\n❌ No results found!")
-        print("   Check nlb_debug.html to inspect the actual HTML structure")
+        print("   Inspect the fetched page: python page_archive.py list --source NLB, then show <hash>")
     
     return results
 
@@ -0,0 +1,78 @@
+"""
+Ticket matching against stored draws
+
+Draws store balls as {"type": "number" | "letter" | "zodiac" | "super", "value": "..."}
+(older rows may hold plain strings). DrawMatcher assigns each winning ball a bit
+once per draw; a ticket is turned into a bitmask with dictionary lookups and the
+match is a single AND, so verifying thousands of tickets against a draw costs
+one pass over the tickets.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+Ball = Union[str, dict]
+
+
+def normalize_value(value) -> str:
+    """Compare '05' and '5' as the same number, letters case-insensitively"""
+    text = str(value).strip().upper()
+    return str(int(text)) if text.isdigit() else text
+
+
+def normalize_ball(ball: Ball) -> Tuple[Optional[str], str]:
+    """(type or None, normalized value) for a structured or plain ball"""
+    if isinstance(ball, dict):
+        return (ball.get("type") or None), normalize_value(ball.get("value", ""))
+    if hasattr(ball, "value"):  # pydantic ball model
+        return getattr(ball, "type", None), normalize_value(ball.value)
+    return None, normalize_value(ball)
+
+
+class DrawMatcher:
+    """Precomputed bit positions for one draw's winning balls"""
+
+    __slots__ = ("result", "balls", "_by_value", "_by_typed_value")
+
+    def __init__(self, result):
+        self.result = result
+        self.balls: List[str] = []                       # display value per bit
+        self._by_value: Dict[str, int] = {}              # value -> mask of balls with that value
+        self._by_typed_value: Dict[Tuple[str, str], int] = {}
+
+        for bit, ball in enumerate(result.winning_numbers or []):
+            ball_type, value = normalize_ball(ball)
+            mask = 1 << bit
+            self.balls.append(ball["value"] if isinstance(ball, dict) else str(ball))
+            self._by_value[value] = self._by_value.get(value, 0) | mask
+            if ball_type:
+                key = (ball_type, value)
+                self._by_typed_value[key] = self._by_typed_value.get(key, 0) | mask
+
+    def ticket_mask(self, ticket_numbers: Iterable[Ball]) -> int:
+        """
+        Bitmask of winning balls the ticket matches
+
+        A typed ticket ball only matches a winning ball of the same type;
+        a plain value matches a winning ball of any type.
+        """
+        mask = 0
+        for ball in ticket_numbers:
+            ball_type, value = normalize_ball(ball)
+            if ball_type:
+                mask |= self._by_typed_value.get((ball_type, value), 0)
+            else:
+                mask |= self._by_value.get(value, 0)
+        return mask
+
+    def matched_numbers(self, mask: int) -> List[str]:
+        return [value for bit, value in enumerate(self.balls) if mask >> bit & 1]
+
+    def verify(self, ticket_numbers: Iterable[Ball]) -> dict:
+        mask = self.ticket_mask(ticket_numbers)
+        matched = self.matched_numbers(mask)
+        return {
+            "is_winner": mask != 0,
+            "matched_numbers": matched,
+            "match_count": len(matched),
+            "prize_info": self.result.prize_amount if mask else None,
+        }